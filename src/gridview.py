@@ -0,0 +1,433 @@
+"""
+Paged Treeview grid used by the list screens.
+
+Only a window of rows is ever held in the widget. More rows are fetched as the
+user scrolls, using keyset pagination (`WHERE (sort, key) > (?, ?) ORDER BY sort, key
+LIMIT ?`), so the cost of a page does not depend on how far down the table it is.
+The columns are compared bare, so an index on them (or the rowid) is searched
+rather than scanned. A row-value comparison with NULL is never true, so rows whose
+sort column is NULL are ordered after the rest (before them when descending) and
+paged through on the key alone. Key columns must not be NULL.
+Clicking a column heading re-sorts on the database side.
+
+`EditableGrid` adds in-place cell editing for the bulk edit screens.
+"""
+
+from tkinter import Frame, Entry, ttk, messagebox
+
+GRID_STYLE = "Grid.Treeview"
+
+
+def setUpGridStyle():
+    style = ttk.Style()
+    style.configure(GRID_STYLE, background="Light blue", fieldbackground="Light blue", font=("Consolas", 11), rowheight=22)
+    style.configure(GRID_STYLE + ".Heading", font=("Consolas", 11, "bold"))
+
+
+def keysetQuery(source, columnNames, keyColumns, sortColumn, descending=False, where="", params=(),
+                boundary=None, backwards=False, limit=100):
+    """(sql, parameters) for the page after boundary, or the first page if boundary is None.
+
+    Each row is the shown columns, then the sort column if it is not a key, then the
+    key; that tail is the boundary passed back in for the next page. Walking backwards
+    flips both the comparison and the sort direction."""
+    ascending = descending == backwards
+    direction = "ASC" if ascending else "DESC"
+    comparison = ">" if ascending else "<"
+    keyList = ", ".join(keyColumns)
+    keyPlaceholders = ", ".join("?" * len(keyColumns))
+    sortIsKey = sortColumn in keyColumns
+
+    selectList = list(columnNames) + ([] if sortIsKey else [sortColumn]) + list(keyColumns)
+    conditions = [f"({where})"] if where else []
+    parameters = list(params)
+
+    if boundary is not None:
+        if sortIsKey:
+            conditions.append(f"({keyList}) {comparison} ({keyPlaceholders})")
+            parameters += list(boundary)
+        elif boundary[0] is None:
+            # Inside the NULL tail only the key moves on; descending, the non-NULL rows follow it.
+            condition = f"{sortColumn} IS NULL AND ({keyList}) {comparison} ({keyPlaceholders})"
+            if not ascending:
+                condition += f" OR {sortColumn} IS NOT NULL"
+            conditions.append(f"({condition})")
+            parameters += list(boundary[1:])
+        else:
+            condition = f"{sortColumn} IS NOT NULL AND ({sortColumn}, {keyList}) {comparison} (?, {keyPlaceholders})"
+            if ascending:
+                condition += f" OR {sortColumn} IS NULL"
+            conditions.append(f"({condition})")
+            parameters += list(boundary)
+
+    orderTerms = [f"{keyColumn} {direction}" for keyColumn in keyColumns]
+    if not sortIsKey:
+        orderTerms = [f"{sortColumn} IS NULL {direction}", f"{sortColumn} {direction}"] + orderTerms
+
+    sql = f"SELECT {', '.join(selectList)} FROM {source}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(orderTerms) + " LIMIT ?"
+    parameters.append(limit)
+    return sql, parameters
+
+
+class PagedGrid(Frame):
+    """A Treeview over `SELECT columns FROM source` that materialises at most
+    `pageSize * maxPages` rows at a time.
+
+    columns     - list of (columnName, heading, width) tuples, shown in order
+    keyColumns  - column(s) that uniquely identify a row; passed to onSelect(*key)
+    source      - table name or FROM clause (joins are allowed)
+    where       - optional filter, with `?` placeholders bound from params
+    formatters  - optional {columnName: function(value) -> text}
+    """
+
+    def __init__(self, master, connection, source, columns, keyColumns, onSelect=None,
+                 where="", params=(), sortColumn=None, descending=False,
+                 formatters=None, pageSize=100, maxPages=5, **frameOptions):
+        super().__init__(master, **frameOptions)
+
+        self.connection = connection
+        self.source = source
+        self.columns = columns
+        self.keyColumns = list(keyColumns)
+        self.onSelect = onSelect
+        self.where = where
+        self.params = tuple(params)
+        self.sortColumn = sortColumn or self.keyColumns[0]
+        self.descending = descending
+        self.formatters = formatters or {}
+        self.pageSize = pageSize
+        self.maxRows = pageSize * maxPages
+
+        self.rowsByItem = {}
+        self.atStart = True
+        self.atEnd = True
+        self.loading = False
+
+        setUpGridStyle()
+        columnNames = [column[0] for column in columns]
+        self.tree = ttk.Treeview(self, columns=columnNames, show="headings", selectmode="browse", style=GRID_STYLE)
+        for columnName, heading, width in columns:
+            self.tree.heading(columnName, text=heading, command=lambda name=columnName: self.sortBy(name))
+            self.tree.column(columnName, width=width, anchor="w", stretch=False)
+
+        self.scrollBar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.onScroll)
+
+        self.scrollBar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<<TreeviewSelect>>", self.onTreeSelect)
+
+        self.refresh()
+
+    #------------------------------------------------------------------------------------------------------
+    #### QUERY BUILDING ####
+
+    def fetchPage(self, boundary=None, backwards=False):
+        sql, parameters = keysetQuery(self.source, [column[0] for column in self.columns], self.keyColumns,
+                                      self.sortColumn, self.descending, self.where, self.params,
+                                      boundary, backwards, self.pageSize)
+        rows = self.connection.execute(sql, parameters).fetchall()
+        if backwards:
+            rows.reverse()
+        return rows
+
+    #------------------------------------------------------------------------------------------------------
+    #### ROW WINDOW ####
+
+    def displayValues(self, row):
+        values = []
+        for (columnName, heading, width), value in zip(self.columns, row):
+            if value is None:
+                values.append("")
+            elif columnName in self.formatters:
+                values.append(self.formatters[columnName](value))
+            else:
+                values.append(value)
+        return values
+
+    def rowTags(self, row):
+        return ()
+
+    def boundaryOf(self, item):
+        return self.rowsByItem[item][len(self.columns):]
+
+    def keyOf(self, row):
+        return tuple(row[-len(self.keyColumns):])
+
+    def insertRows(self, rows, index):
+        for offset, row in enumerate(rows):
+            position = "end" if index == "end" else index + offset
+            item = self.tree.insert("", position, values=self.displayValues(row), tags=self.rowTags(row))
+            self.rowsByItem[item] = row
+
+    def removeItems(self, items):
+        self.tree.delete(*items)
+        for item in items:
+            del self.rowsByItem[item]
+
+    def refresh(self):
+        """Throw away the current window and load the first page again."""
+        if self.rowsByItem:
+            self.removeItems(list(self.rowsByItem))
+
+        rows = self.fetchPage()
+        self.insertRows(rows, "end")
+        self.atStart = True
+        self.atEnd = len(rows) < self.pageSize
+        self.tree.yview_moveto(0)
+
+    def loadNextPage(self):
+        items = self.tree.get_children()
+        if self.atEnd or not items:
+            self.loading = False
+            return
+
+        rows = self.fetchPage(self.boundaryOf(items[-1]))
+        self.insertRows(rows, "end")
+        self.atEnd = len(rows) < self.pageSize
+
+        surplus = len(self.rowsByItem) - self.maxRows
+        if surplus > 0:
+            self.removeItems(self.tree.get_children()[:surplus])
+            self.tree.yview_scroll(-surplus, "units")
+            self.atStart = False
+
+        self.loading = False
+
+    def loadPreviousPage(self):
+        items = self.tree.get_children()
+        if self.atStart or not items:
+            self.loading = False
+            return
+
+        rows = self.fetchPage(self.boundaryOf(items[0]), backwards=True)
+        self.insertRows(rows, 0)
+        self.atStart = len(rows) < self.pageSize
+        # Keep the rows the user was looking at in view.
+        self.tree.yview_scroll(len(rows), "units")
+
+        surplus = len(self.rowsByItem) - self.maxRows
+        if surplus > 0:
+            self.removeItems(self.tree.get_children()[-surplus:])
+            self.atEnd = False
+
+        self.loading = False
+
+    #------------------------------------------------------------------------------------------------------
+    #### EVENTS ####
+
+    def onScroll(self, first, last):
+        self.scrollBar.set(first, last)
+        if self.loading:
+            return
+
+        if float(last) >= 0.98 and not self.atEnd:
+            self.loading = True
+            self.after_idle(self.loadNextPage)
+        elif float(first) <= 0.02 and not self.atStart:
+            self.loading = True
+            self.after_idle(self.loadPreviousPage)
+
+    def sortBy(self, columnName):
+        if columnName == self.sortColumn:
+            self.descending = not self.descending
+        else:
+            self.sortColumn = columnName
+            self.descending = False
+
+        for name, heading, width in self.columns:
+            arrow = ""
+            if name == self.sortColumn:
+                arrow = " ▼" if self.descending else " ▲"
+            self.tree.heading(name, text=heading + arrow)
+
+        self.refresh()
+
+    def setFilter(self, where, params=()):
+        self.where = where
+        self.params = tuple(params)
+        self.refresh()
+
+    def selectedKey(self):
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self.keyOf(self.rowsByItem[selection[0]])
+
+    def onTreeSelect(self, event):
+        key = self.selectedKey()
+        if key is not None and self.onSelect is not None:
+            self.onSelect(*key)
+
+
+class EditableGrid(PagedGrid):
+    """A PagedGrid whose cells in `editableColumns` can be edited in place.
+
+    Double-click a cell (or press Return or F2 on a row) to edit it. Return saves the
+    cell and moves to the same column on the next row, Tab to the next editable
+    column, Escape cancels. validate(columnName, text) returns the value to store or
+    raises ValueError. Changed cells are kept as {key: {columnName: value}} by the
+    row's key, so they survive paging and sorting until saved or discarded; rows
+    with changes are highlighted. onChange() is called whenever that set changes.
+    The grid needs a single key column.
+    """
+
+    def __init__(self, master, connection, source, columns, keyColumns, editableColumns,
+                 validate=None, onChange=None, **gridOptions):
+        # Set before PagedGrid.__init__, which loads the first page.
+        self.editableColumns = list(editableColumns)
+        self.validate = validate or (lambda columnName, text: text)
+        self.onChange = onChange
+        self.dirty = {}
+        self.editor = None
+
+        super().__init__(master, connection, source, columns, keyColumns, **gridOptions)
+
+        self.tree.tag_configure("dirty", background="khaki")
+        self.tree.bind("<Double-1>", self.onDoubleClick)
+        self.tree.bind("<Return>", self.editSelectedRow)
+        self.tree.bind("<F2>", self.editSelectedRow)
+
+    #------------------------------------------------------------------------------------------------------
+    #### CHANGED CELLS ####
+
+    def columnIndex(self, columnName):
+        return [column[0] for column in self.columns].index(columnName)
+
+    def keyOfRow(self, row):
+        return self.keyOf(row)[0]
+
+    def displayValues(self, row):
+        changedValues = self.dirty.get(self.keyOfRow(row))
+        if changedValues:
+            row = list(row)
+            for columnName, value in changedValues.items():
+                row[self.columnIndex(columnName)] = value
+        return super().displayValues(row)
+
+    def rowTags(self, row):
+        return ("dirty",) if self.keyOfRow(row) in self.dirty else ()
+
+    def changes(self):
+        return {key: dict(changedValues) for key, changedValues in self.dirty.items()}
+
+    def changedCellCount(self):
+        return sum(len(changedValues) for changedValues in self.dirty.values())
+
+    def clearChanges(self):
+        """Forget every changed cell (after saving them, or to discard them) and reload."""
+        self.cancelEdit()
+        self.dirty.clear()
+        self.refresh()
+        if self.onChange is not None:
+            self.onChange()
+
+    def setCell(self, item, columnName, value):
+        row = self.rowsByItem[item]
+        key = self.keyOfRow(row)
+        changedValues = self.dirty.setdefault(key, {})
+        if value == row[self.columnIndex(columnName)]:
+            changedValues.pop(columnName, None)    # Changed back to what is saved
+        else:
+            changedValues[columnName] = value
+        if not changedValues:
+            del self.dirty[key]
+
+        self.tree.item(item, values=self.displayValues(row), tags=self.rowTags(row))
+        if self.onChange is not None:
+            self.onChange()
+
+    #------------------------------------------------------------------------------------------------------
+    #### CELL EDITOR ####
+
+    def onDoubleClick(self, event):
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        item = self.tree.identify_row(event.y)
+        columnName = self.columns[int(self.tree.identify_column(event.x)[1:]) - 1][0]
+        if item and columnName in self.editableColumns:
+            self.beginEdit(item, columnName)
+
+    def editSelectedRow(self, event=None):
+        selection = self.tree.selection()
+        if selection and self.editableColumns:
+            self.beginEdit(selection[0], self.editableColumns[0])
+
+    def beginEdit(self, item, columnName):
+        self.finishEdit()
+        self.tree.see(item)
+        self.tree.selection_set(item)
+        self.tree.update_idletasks()
+        bbox = self.tree.bbox(item, columnName)
+        if not bbox:
+            return
+
+        self.editor = Entry(self.tree, font=("Consolas", 11))
+        self.editor.item = item
+        self.editor.columnName = columnName
+        self.editor.insert(0, self.tree.set(item, columnName))
+        self.editor.select_range(0, "end")
+        self.editor.place(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
+        self.editor.focus_set()
+
+        self.editor.bind("<Return>", lambda event: self.moveEdit(rowStep=1))
+        self.editor.bind("<Tab>", lambda event: self.moveEdit(columnStep=1))
+        self.editor.bind("<Escape>", lambda event: self.cancelEdit())
+        # FocusOut can arrive after the editor has been replaced by the next one, so check which it is for.
+        self.editor.bind("<FocusOut>", lambda event, editor=self.editor: self.finishEdit() if self.editor is editor else None)
+
+    def finishEdit(self):
+        """Keep the text in the editor as the cell's new value. False if it was not valid."""
+        editor, self.editor = self.editor, None
+        if editor is None:
+            return True
+        text = editor.get()
+        item, columnName = editor.item, editor.columnName
+        editor.destroy()
+
+        if item not in self.rowsByItem or text == str(self.tree.set(item, columnName)):
+            return True
+        try:
+            value = self.validate(columnName, text)
+        except ValueError as e:
+            messagebox.showerror("Invalid Value", str(e))
+            return False
+        self.setCell(item, columnName, value)
+        return True
+
+    def cancelEdit(self):
+        editor, self.editor = self.editor, None
+        if editor is not None:
+            editor.destroy()
+            self.tree.focus_set()
+
+    def moveEdit(self, rowStep=0, columnStep=0):
+        item, columnName = self.editor.item, self.editor.columnName
+        if not self.finishEdit():
+            return "break"
+
+        if columnStep:
+            nextColumn = self.editableColumns.index(columnName) + columnStep
+            if nextColumn < len(self.editableColumns):
+                self.beginEdit(item, self.editableColumns[nextColumn])
+        else:
+            nextItem = self.tree.next(item)
+            if nextItem:
+                self.beginEdit(nextItem, columnName)
+            else:
+                self.tree.focus_set()
+        return "break"
+
+    def onScroll(self, first, last):
+        # Keep the editor over its cell, or save the cell once it scrolls out of view.
+        if self.editor is not None:
+            bbox = self.tree.bbox(self.editor.item, self.editor.columnName) if self.editor.item in self.rowsByItem else ""
+            if bbox:
+                self.editor.place(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
+            else:
+                self.finishEdit()
+        super().onScroll(first, last)
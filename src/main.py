@@ -17,15 +17,54 @@ Toby Smith
     https://github.com/tobezdev
 """
 
+#----------------------------------------------------------------------------------------------------------
+#### STARTUP TIMING ####
+import sys
+import time
+
+# `python src/main.py --profile-startup` prints how long each stage of startup took.
+profileStartup = "--profile-startup" in sys.argv
+startupTimes = [("start", time.perf_counter())]
+
+def markStartup(stage):
+    startupTimes.append((stage, time.perf_counter()))
+
+def printStartupProfile():
+    markStartup("first screen drawn")
+    print("Startup timing (ms):")
+    for (_, previousTime), (stage, stageTime) in zip(startupTimes, startupTimes[1:]):
+        print(f"  {stage:<28} {(stageTime - previousTime) * 1000:8.1f}")
+    print(f"  {'total':<28} {(startupTimes[-1][1] - startupTimes[0][1]) * 1000:8.1f}")
+
 #----------------------------------------------------------------------------------------------------------
 #### IMPORTS ####
 import os
 import sqlite3
-import hashlib
-import secrets
+import threading
 from datetime import date, datetime
-from tkinter import Tk, PhotoImage, StringVar, Menu, Listbox, Button, Label, Entry, Frame, ttk, messagebox, Canvas, END, LEFT, filedialog
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
+markStartup("standard library imports")
+
+from tkinter import Tk, PhotoImage, StringVar, Menu, Listbox, Button, Label, Entry, Frame, ttk, messagebox, Canvas, END, LEFT, TclError
+markStartup("tkinter imports")
+
+# Only what the login and main menu need is imported here. Report, import, archive and
+# sandbox modules (and tkinter's file dialogs) are imported by the screens that use them.
+from tobystrucks.database import connectDatabase, closeDatabase
+from tobystrucks.migrations import migrateDatabase
+from tobystrucks import queries
+from tobystrucks.dates import toIsoDate, toDisplayDate, toDisplayTimestamp
+from tobystrucks.executor import QueryExecutor
+from tobystrucks.auditlog import AuditLogWriter
+from tobystrucks.profiler import StatementProfiler
+from tobystrucks.refcache import ReferenceCache
+from tobystrucks.search import quickSearch
+from tobystrucks.stock import receiveStock, setStockLevel, stockHistory, reorderQueueCount
+from tobystrucks.passwords import DEFAULT_ITERATIONS, hashPassword, verifyPassword, needsRehash, newSalt
+from gridview import PagedGrid, EditableGrid
+from screens import ScreenManager
+markStartup("core package imports")
 
 root = os.path.dirname(os.path.dirname(__file__))
 src = os.path.join(root, 'src')
@@ -34,98 +73,81 @@ assets = os.path.join(src, 'assets')
 #----------------------------------------------------------------------------------------------------------
 #### DATABASE SETUP ####
 
-tobysTrucksDatabase = sqlite3.connect("data.db")
+databaseFile = "data.db"
+logArchiveDirectory = "log_archive"
+logRetentionDays = 365
+profitLinesPageSize = 100
+customQueryMaxRows = 1000
+customQueryTimeout = 30
+customQueryExportTimeout = 600
+customQueryMemoryLimit = 256 * 1024 * 1024
+slowStatementMs = 50
+quickSearchDelayMs = 150
+
+# Every statement on these connections is timed; see File > Performance.
+statementProfiler = StatementProfiler(capacity=500, slowThresholdMs=slowStatementMs)
+profiledConnection = statementProfiler.connectionFactory()
+
+tobysTrucksDatabase = connectDatabase(databaseFile, factory=profiledConnection)
+queryExecutor = QueryExecutor(databaseFile, factory=profiledConnection)
+auditLog = AuditLogWriter(databaseFile, factory=profiledConnection)
+markStartup("database connections")
+
+# Password hashing and other slow non-SQL work runs here, off the Tk thread.
+backgroundWorker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="BackgroundWorker")
+# Set while a CSV import holds the database's write lock; the screens' write paths wait for it.
+importRunning = threading.Event()
+pendingAdminCreation = None
+
+def createDefaultAdmin():
+    adminSalt = newSalt()
+    adminPasswordHash = hashPassword("admin123", adminSalt, DEFAULT_ITERATIONS)
+    defaultAdmin = [
+        "ADM001", "admin", adminPasswordHash, adminSalt, 
+        "Administrator", date.today().strftime('%d/%m/%Y'), "Y", DEFAULT_ITERATIONS
+    ]
 
-def hashPassword(password, salt):
-    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000).hex()
+    adminConnection = connectDatabase(databaseFile)
+    try:
+        queries.execute(adminConnection, "insertDefaultAdmin", defaultAdmin)
+        adminConnection.commit()
+    finally:
+        adminConnection.close()
 
 try:
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS truckTable (
-            truckID TEXT PRIMARY KEY,
-            make TEXT,
-            model TEXT,
-            size TEXT,
-            truckSupplierID TEXT,
-            buyingPrice FLOAT,
-            sellingPrice FLOAT,
-            stockLevel INTEGER,
-            reorderLevel INTEGER,
-            reorderAmount INTEGER
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS supplierTable (
-            supplierID TEXT PRIMARY KEY,
-            supplierName TEXT,
-            supplierAddress TEXT,
-            supplierPhone TEXT,
-            supplierEmail TEXT
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS customerTable (
-            customerID TEXT PRIMARY KEY,
-            customerName TEXT,
-            customerAddress TEXT,
-            customerPhone TEXT,
-            customerEmail TEXT
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS orderTable (
-            orderID TEXT PRIMARY KEY,
-            orderCustomerID TEXT,
-            orderDate TEXT,
-            paid TEXT
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS orderItemsTable (
-            orderItemsOrderID TEXT,
-            orderItemsTruckID TEXT,
-            quantity INTEGER
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS userTable (
-            userID TEXT PRIMARY KEY,
-            username TEXT UNIQUE,
-            passwordHash TEXT,
-            salt TEXT,
-            role TEXT,
-            createdDate TEXT,
-            isActive TEXT
-        )
-    """)
-    tobysTrucksDatabase.execute("""
-        CREATE TABLE IF NOT EXISTS logsTable (
-            logID INTEGER PRIMARY KEY AUTOINCREMENT,
-            userID TEXT,
-            username TEXT,
-            action TEXT,
-            tableName TEXT,
-            recordID TEXT,
-            timestamp TEXT,
-            details TEXT
-        )
-    """)
-    tobysTrucksDatabase.commit()
+    # An up-to-date database costs one PRAGMA user_version read here; DDL only runs when migrating.
+    migrateDatabase(tobysTrucksDatabase)
 
-    # Create default admin user if no users exist
-    userCount = tobysTrucksDatabase.execute("SELECT COUNT(*) FROM userTable").fetchone()[0]
-    if userCount == 0:
-        adminSalt = secrets.token_hex(32)
-        adminPasswordHash = hashPassword("admin123", adminSalt)
-        defaultAdmin = [
-            "ADM001", "admin", adminPasswordHash, adminSalt, 
-            "Administrator", date.today().strftime('%d/%m/%Y'), "Y"
-        ]
-        tobysTrucksDatabase.execute("INSERT INTO userTable VALUES (?,?,?,?,?,?,?)", defaultAdmin)
-        tobysTrucksDatabase.commit()
+    # A database with no users (new, or every user deleted) gets a default admin user, hashed in
+    # the background so startup isn't held up. The check is a single EXISTS lookup, so it runs every time.
+    hasUsers = queries.execute(tobysTrucksDatabase, "anyUsers").fetchone()[0]
+    if not hasUsers:
+        pendingAdminCreation = backgroundWorker.submit(createDefaultAdmin)
 
 except sqlite3.Error as e:
     print(f"Cannot setup database: {e}")
+markStartup("schema check")
+
+# Supplier, customer, truck and order IDs for the comboboxes and ID checks. The screens'
+# write paths invalidate the table they changed; other connections' writes are detected.
+referenceCache = ReferenceCache(tobysTrucksDatabase)
+
+def runLogRetention():
+    from tobystrucks.logs import archiveOldLogs
+
+    retentionConnection = connectDatabase(databaseFile)
+    try:
+        archivedCount = archiveOldLogs(retentionConnection, logArchiveDirectory, logRetentionDays)
+        if archivedCount:
+            logger.info(f"Archived {archivedCount} log rows older than {logRetentionDays} days to {logArchiveDirectory}")
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Cannot archive old logs: {e}")
+    finally:
+        retentionConnection.close()
+
+def startLogRetention():
+    # Its own thread rather than backgroundWorker, so a large first archive never queues up a login
+    threading.Thread(target=runLogRetention, name="LogRetention", daemon=True).start()
 
 #----------------------------------------------------------------------------------------------------------
 #### LOGGING SETUP ####
@@ -153,18 +175,11 @@ currentUserID = None
 currentUsername = None
 isLoggedIn = False
 
-def verifyPassword(password, salt, storedHash):
-    return hashPassword(password, salt) == storedHash
-
 def logUserAction(action, tableName="", recordID="", details=""):
     if currentUserID and currentUsername:
-        timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         logRecord = [currentUserID, currentUsername, action, tableName, recordID, timestamp, details]
-        tobysTrucksDatabase.execute("""
-            INSERT INTO logsTable (userID, username, action, tableName, recordID, timestamp, details) 
-            VALUES (?,?,?,?,?,?,?)
-        """, logRecord)
-        tobysTrucksDatabase.commit()
+        auditLog.log(logRecord)
 
 def requireLogin(func):
     @wraps(func)
@@ -176,37 +191,68 @@ def requireLogin(func):
         return func(*args, **kwargs)
     return wrapper
 
+def writesDatabase(func):
+    """For the screens' write paths. Refuses while a CSV import holds the write lock, and reports
+    a write that gives up waiting for a lock taken elsewhere (e.g. a command-line import)."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if importRunning.is_set():
+            messagebox.showerror("Import Running", "A CSV import is running. Save your changes once it has finished.")
+            return
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if tobysTrucksDatabase.in_transaction:
+                tobysTrucksDatabase.rollback()
+            messagebox.showerror("Database Busy", f"The change could not be saved: {e}. Try again in a moment.")
+    return wrapper
+
 def authenticateUser(username, password):
-    global currentUser, currentUserID, currentUsername, isLoggedIn
-    
+    """Look the user up and check the password. Runs on backgroundWorker, so it uses its own
+    connection and never touches Tk. Returns the user row, or None if the login is invalid."""
+    if pendingAdminCreation is not None:
+        pendingAdminCreation.result()
+
+    authConnection = connectDatabase(databaseFile)
     try:
-        queryResult = tobysTrucksDatabase.execute("""
-            SELECT userID, username, passwordHash, salt, role, isActive 
-            FROM userTable 
-            WHERE username = ? AND isActive = 'Y'
-        """, (username,)).fetchone()
-        
-        if queryResult and verifyPassword(password, queryResult[3], queryResult[2]):
-            currentUserID = queryResult[0]
-            currentUsername = queryResult[1]
-            currentUser = {
-                'userID': queryResult[0],
-                'username': queryResult[1],
-                'role': queryResult[4]
-            }
-            isLoggedIn = True
-            logUserAction("LOGIN", details=f"User {username} logged in")
-            return True
-        return False
-    except Exception as e:
-        messagebox.showerror("Authentication Error", f"Login failed: {str(e)}")
-        return False
+        queryResult = queries.execute(authConnection, "activeUserByName", (username,)).fetchone()
+
+        if not queryResult or not verifyPassword(password, queryResult[3], queryResult[2], queryResult[6]):
+            return None
+
+        # Transparently move the stored hash to the currently configured cost
+        if needsRehash(queryResult[6]):
+            upgradedSalt = newSalt()
+            try:
+                queries.execute(authConnection, "updateUserPassword",
+                                (hashPassword(password, upgradedSalt, DEFAULT_ITERATIONS), upgradedSalt, DEFAULT_ITERATIONS, queryResult[0]))
+                authConnection.commit()
+            except sqlite3.OperationalError:
+                authConnection.rollback()     # e.g. locked by an import; upgrade at the next login instead
+
+        return queryResult
+    finally:
+        authConnection.close()
+
+def completeLogin(queryResult):
+    global currentUser, currentUserID, currentUsername, isLoggedIn
+
+    currentUserID = queryResult[0]
+    currentUsername = queryResult[1]
+    currentUser = {
+        'userID': queryResult[0],
+        'username': queryResult[1],
+        'role': queryResult[4]
+    }
+    isLoggedIn = True
+    logUserAction("LOGIN", details=f"User {currentUsername} logged in")
 
 def logoutUser():
     global currentUser, currentUserID, currentUsername, isLoggedIn
     
     if isLoggedIn:
         logUserAction("LOGOUT", details=f"User {currentUsername} logged out")
+        auditLog.flush()
     
     currentUser = None
     currentUserID = None
@@ -217,7 +263,16 @@ def logoutUser():
 #### TKINTER SETUP ####
 
 mainWindow = Tk()
-tobysTrucksPicture = PhotoImage(file=os.path.join(assets, "tobys-trucks.png"))
+markStartup("Tk window")
+
+# Images are loaded the first time a screen shows them, not at startup.
+assetImages = {}
+
+def loadAssetImage(fileName):
+    if fileName not in assetImages:
+        assetImages[fileName] = PhotoImage(file=os.path.join(assets, fileName))
+    return assetImages[fileName]
+
 
 truckID = StringVar()
 make = StringVar()
@@ -247,6 +302,11 @@ orderItemsOrderID = StringVar()
 orderItemsTruckID = StringVar()
 quantity = StringVar()
 selectedTruckID = StringVar()
+stockTruckID = StringVar()
+orderLineTruckID = StringVar()
+orderLineQuantity = StringVar()
+stockReceivedQuantity = StringVar()
+stockReceivedNote = StringVar()
 selectedSupplierID = StringVar()
 selectedCustomerID = StringVar()
 selectedOrderID = StringVar()
@@ -254,52 +314,83 @@ yearForProfitReport = StringVar()
 customSQLQueryString = StringVar()
 loginUsername = StringVar()
 loginPassword = StringVar()
-
-firstTime = True
+logFilterUserID = StringVar()
+logFilterAction = StringVar()
+logFilterTable = StringVar()
+logFilterRecord = StringVar()
+logFilterFrom = StringVar()
+logFilterTo = StringVar()
+importTableName = StringVar()
+importFilePath = StringVar()
+
+# Every screen is built once and then raised (see screens.py); the menu bar and
+# status line in sessionWidgets are built once per login.
+screens = ScreenManager(mainWindow)
+sessionWidgets = {}
+markStartup("form variables")
 
 #==========================================================================================================
 #### THE MAIN FUNCTION ####
 
 def main():
+    setUpWindow()
+    queryExecutor.startPolling(mainWindow)
+    startLogRetention()
     showLoginScreen()
+    if profileStartup:
+        mainWindow.after_idle(printStartupProfile)
     mainWindow.mainloop()
 
 #----------------------------------------------------------------------------------------------------------
 #### LOGIN SCREEN ####
 
 def showLoginScreen():
-    clearMainWindow()
+    loginScreen = showScreen("login", buildLoginScreen)
     mainWindow.title("TOBY'S TRUCKS - LOGIN")
-    
-    loginFrame = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+
+    loginUsername.set("")
+    loginPassword.set("")
+    loginScreen["username"].focus()
+
+def buildLoginScreen(screen):
+    canvasPicture = Canvas(screen, width=1000, height=500)
+    canvasPicture.place(x=65, y=5)
+    drawPicture(canvasPicture)
+
+    loginFrame = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     loginFrame.place(x=300, y=150, width=400, height=250)
     
-    loginHeading = Label(mainWindow, text="LOGIN TO TOBY'S TRUCKS", font=('Arial', 16), bg="Light blue")
+    loginHeading = Label(screen, text="LOGIN TO TOBY'S TRUCKS", font=('Arial', 16), bg="Light blue")
     loginHeading.place(x=330, y=160, width=340, height=30)
     
-    Label(mainWindow, bg="Light blue", text="Username:").place(x=320, y=210)
-    Label(mainWindow, bg="Light blue", text="Password:").place(x=320, y=240)
+    Label(screen, bg="Light blue", text="Username:").place(x=320, y=210)
+    Label(screen, bg="Light blue", text="Password:").place(x=320, y=240)
     
-    usernameEntry = Entry(mainWindow, textvariable=loginUsername, width=25, bg="white")
+    usernameEntry = Entry(screen, textvariable=loginUsername, width=25, bg="white")
     usernameEntry.place(x=400, y=210)
     
-    passwordEntry = Entry(mainWindow, textvariable=loginPassword, width=25, bg="white", show="*")
+    passwordEntry = Entry(screen, textvariable=loginPassword, width=25, bg="white", show="*")
     passwordEntry.place(x=400, y=240)
     
-    loginButton = Button(mainWindow, text="Login", width=15, command=processLogin)
+    loginButton = Button(screen, text="Login", width=15, command=processLogin)
     loginButton.place(x=430, y=280)
+
+    loginStatusLabel = Label(screen, bg="Light blue", text="")
+    loginStatusLabel.place(x=320, y=345)
+
+    loginProgress = ttk.Progressbar(screen, mode="indeterminate", length=360)
+    loginProgress.place(x=320, y=370)
     
-    exitButton = Button(mainWindow, text="Exit", width=15, command=exitProgram)
+    exitButton = Button(screen, text="Exit", width=15, command=exitProgram)
     exitButton.place(x=430, y=310)
     
-    usernameEntry.focus()
     passwordEntry.bind("<Return>", lambda event: processLogin())
-    
-    loginUsername.set("")
-    loginPassword.set("")
+
+    return {"username": usernameEntry, "button": loginButton, "status": loginStatusLabel, "progress": loginProgress}
 
 def logoutAndShowLogin():
     logoutUser()
+    endSession()
     showLoginScreen()
 
 def processLogin():
@@ -309,32 +400,70 @@ def processLogin():
     if not username or not password:
         messagebox.showerror("Login Error", "Please enter both username and password.")
         return
-    
-    if authenticateUser(username, password):
+
+    loginScreen = screens.widgets["login"]
+    if str(loginScreen["button"]["state"]) == "disabled":
+        return  # A login is already being checked
+
+    loginScreen["button"].config(state="disabled")
+    loginScreen["status"].config(text="Checking username and password…")
+    loginScreen["progress"].start(15)
+
+    loginAttempt = backgroundWorker.submit(authenticateUser, username, password)
+    whenFinished(loginAttempt, finishLogin)
+
+def finishLogin(loginAttempt):
+    loginScreen = screens.widgets["login"]
+    loginScreen["progress"].stop()
+    loginScreen["status"].config(text="")
+    loginScreen["button"].config(state="normal")
+
+    try:
+        queryResult = loginAttempt.result()
+    except Exception as e:
+        messagebox.showerror("Authentication Error", f"Login failed: {str(e)}")
+        return
+
+    if queryResult:
+        completeLogin(queryResult)
         messagebox.showinfo("Login Successful", f"Welcome, {currentUsername}!")
         setUpMainWindow()
     else:
         messagebox.showerror("Login Failed", "Invalid username or password.")
         loginPassword.set("")  # Clear password field
 
-#----------------------------------------------------------------------------------------------------------
+def whenFinished(future, callback, interval=50):
+    """Call callback(future) on the Tk thread once a backgroundWorker task has finished."""
+    if future.done():
+        callback(future)
+    else:
+        mainWindow.after(interval, whenFinished, future, callback, interval)
 
-def setUpMainWindow():
-    global firstTime
+#----------------------------------------------------------------------------------------------------------
 
+def setUpWindow():
+    """Window settings that never change, applied once at startup."""
     mainWindow.geometry("870x525")
     mainWindow.title("TOBY\'S TRUCKS")
     mainWindow.resizable(True, True)
+    try:
+        mainWindow.iconbitmap(os.path.join(assets, "tobys-trucks.ico"))
+    except TclError:
+        pass    # .ico icons are only supported on Windows
 
+def setUpMainWindow():
+    """Build the menu bar and status line once per login, then show the main menu."""
     menuBar = Menu(mainWindow)
 
     fileMenu = Menu(menuBar, tearoff=0)
     menuBar.add_cascade(label="File", menu=fileMenu)
     fileMenu.add_command(label="Exit", command=exitProgram)
-    fileMenu.add_command(label="Return to Main Menu", command=clearMainWindow)
+    fileMenu.add_command(label="Return to Main Menu", command=showMainMenu)
     fileMenu.add_command(label="Run Custom SQL Query", command=setupCustomQuery)
+    fileMenu.add_command(label="Import CSV Data", command=setupImport)
     fileMenu.add_separator()
     fileMenu.add_command(label="See System Logs", command=displaySystemLogs)
+    fileMenu.add_command(label="Performance", command=displayPerformance)
     fileMenu.add_separator()
     fileMenu.add_command(label="Logout", command=logoutAndShowLogin)
 
@@ -344,6 +473,8 @@ def setUpMainWindow():
     trucksMenu.add_command(label="Add a New Truck", command=addTruck)
     trucksMenu.add_command(label="Edit a Truck", command=listTrucks)
     trucksMenu.add_command(label="Delete a Truck", command=selectTruckToDelete)
+    trucksMenu.add_command(label="Stock Movements", command=showStockMovements)
+    trucksMenu.add_command(label="Bulk Edit Trucks", command=bulkEditTrucks)
 
     suppliersMenu = Menu(menuBar, tearoff=0)
     menuBar.add_cascade(label="Suppliers", menu=suppliersMenu)
@@ -351,6 +482,7 @@ def setUpMainWindow():
     suppliersMenu.add_command(label="Add a New Supplier", command=addSupplier)
     suppliersMenu.add_command(label="Edit a Supplier", command=listSuppliers)
     suppliersMenu.add_command(label="Delete a Supplier", command=selectSupplierToDelete)
+    suppliersMenu.add_command(label="Bulk Edit Suppliers", command=bulkEditSuppliers)
 
     customersMenu = Menu(menuBar, tearoff=0)
     menuBar.add_cascade(label="Customers", menu=customersMenu)
@@ -358,11 +490,13 @@ def setUpMainWindow():
     customersMenu.add_command(label="Add a New Customer", command=addCustomer)
     customersMenu.add_command(label="Edit a Customer", command=listCustomers)
     customersMenu.add_command(label="Delete a Customer", command=selectCustomerToDelete)
+    customersMenu.add_command(label="Bulk Edit Customers", command=bulkEditCustomers)
 
     ordersMenu = Menu(menuBar, tearoff=0)
     menuBar.add_cascade(label="Orders", menu=ordersMenu)
     ordersMenu.add_command(label="List Orders", command=listOrders)
     ordersMenu.add_command(label="Add a New Order", command=addOrder)
+    ordersMenu.add_command(label="Enter an Order with Items", command=enterOrder)
     ordersMenu.add_command(label="Edit an Order", command=listOrders)
     ordersMenu.add_command(label="Delete an Order", command=selectOrderToDelete)
 
@@ -381,20 +515,30 @@ def setUpMainWindow():
     reportsMenu.add_command(label="Trucks In Stock", command=trucksInStock)
 
     mainWindow.config(menu=menuBar)
-    mainWindow.iconbitmap(os.path.join(assets, "tobys-trucks.ico"))
-
-    if firstTime == True:    
-        canvasPicture = Canvas(mainWindow, width=1000, height=500)
-        canvasPicture.place(x=65, y=5)
-        canvasPicture.create_image(370, 240, image=tobysTrucksPicture)
+    mainWindow.bind("<Control-f>", focusQuickSearch)
 
     # Display logged in user status
-    if isLoggedIn and currentUsername:
-        statusLabel = Label(mainWindow, text=f"Logged in as: {currentUsername}", 
-                          font=('Arial', 10), bg="light green")
-        statusLabel.place(x=10, y=500)
+    statusLabel = Label(mainWindow, text=f"Logged in as: {currentUsername}", 
+                      font=('Arial', 10), bg="light green")
+    statusLabel.place(x=10, y=500)
+
+    reorderBadge = Label(mainWindow, font=('Arial', 10), cursor="hand2")
+    reorderBadge.bind("<Button-1>", lambda event: selectSupplierForOrderNotes())
 
-    firstTime = False
+    sessionWidgets["menu"] = menuBar
+    sessionWidgets["status"] = statusLabel
+    sessionWidgets["reorderBadge"] = reorderBadge
+
+    showMainMenu()
+
+def endSession():
+    """Remove the menu bar and status line, and every screen built while logged in."""
+    mainWindow.config(menu="")
+    mainWindow.unbind("<Control-f>")
+    for widget in sessionWidgets.values():
+        widget.destroy()
+    sessionWidgets.clear()
+    screens.clear()
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -402,51 +546,308 @@ def exitProgram():
     answer = messagebox.askyesno("EXIT PROGRAM", "Are you sure you want to exit? Any unsaved data will be lost.")
 
     if answer == True:
+        if activeQueryJob is not None:
+            activeQueryJob.cancel()
+        queryExecutor.shutdown()
+        backgroundWorker.shutdown(wait=True, cancel_futures=True)
+        auditLog.close()
+        closeDatabase(tobysTrucksDatabase)
         mainWindow.destroy()
 
 #----------------------------------------------------------------------------------------------------------
 
-def clearMainWindow():
-    for widgets in mainWindow.winfo_children():
-        widgets.destroy()
+def showScreen(name, build):
+    """Raise a screen, building it the first time. Any report still loading for the last screen is cancelled."""
+    if activeQueryJob is not None:
+        activeQueryJob.cancel()
+
+    screen = screens.show(name, build)
+    if "status" in sessionWidgets:
+        sessionWidgets["status"].lift()
+        updateReorderBadge()
+    return screen
+
+def updateReorderBadge():
+    """Show how many trucks are waiting to be reordered next to the status line."""
+    reorderBadge = sessionWidgets.get("reorderBadge")
+    if reorderBadge is None:
+        return
+    waiting = reorderQueueCount(tobysTrucksDatabase)
+    if waiting:
+        reorderBadge.config(text=f" {waiting} to reorder ", bg="orange")
+        reorderBadge.place(x=760, y=500)
+        reorderBadge.lift()
+    else:
+        reorderBadge.place_forget()
+
+def showMainMenu():
+    showScreen("mainMenu", buildMainMenu)
+    mainWindow.title("TOBY\'S TRUCKS")
+
+def buildMainMenu(screen):
+    canvasPicture = Canvas(screen, width=1000, height=500)
+    canvasPicture.place(x=65, y=5)
+    drawPicture(canvasPicture)
+
+    # Opening a search result goes to the same edit form as clicking the record in its list.
+    resultTypes = {
+        "truckTable": ("Truck", editTruck),
+        "customerTable": ("Customer", editCustomer),
+        "supplierTable": ("Supplier", editSupplier),
+        "orderTable": ("Order", editOrder),
+    }
+
+    searchText = StringVar(screen)
+    Label(screen, text="Search:", font=('Arial', 10)).place(x=20, y=10)
+    searchEntry = Entry(screen, textvariable=searchText, width=50, bg="white")
+    searchEntry.place(x=80, y=10)
+
+    searchResults = ttk.Treeview(screen, columns=("type", "id", "title", "details"), show="headings", selectmode="browse")
+    for columnName, heading, width in [("type", "Type", 80), ("id", "ID", 80), ("title", "Name", 300), ("details", "Details", 370)]:
+        searchResults.heading(columnName, text=heading)
+        searchResults.column(columnName, width=width, anchor="w", stretch=False)
+
+    pendingSearch = []
+    shownResults = {}
+
+    def searchSoon(*args):
+        # Wait until typing pauses rather than searching on every keystroke.
+        if pendingSearch:
+            mainWindow.after_cancel(pendingSearch.pop())
+        pendingSearch.append(mainWindow.after(quickSearchDelayMs, showSearchResults))
+
+    def showSearchResults():
+        pendingSearch.clear()
+        if not searchResults.winfo_exists():
+            return
+        searchResults.delete(*searchResults.get_children())
+        shownResults.clear()
+        text = searchText.get().strip()
+        rows = quickSearch(tobysTrucksDatabase, text) if len(text) >= 2 else []
+        for tableName, recordID, title, details in rows:
+            itemID = searchResults.insert("", "end", values=(resultTypes[tableName][0], recordID, title, details))
+            shownResults[itemID] = (tableName, recordID)
+        if rows:
+            searchResults.place(x=20, y=40, width=830, height=300)
+            searchResults.lift()
+        else:
+            searchResults.place_forget()
+
+    def openSearchResult(event):
+        selection = searchResults.selection()
+        if not selection:
+            return
+        tableName, recordID = shownResults[selection[0]]
+        _, openRecord = resultTypes[tableName]
+        openRecord(recordID)
+
+    searchText.trace_add("write", searchSoon)
+    searchResults.bind("<<TreeviewSelect>>", openSearchResult)
+    searchEntry.bind("<Escape>", lambda event: searchText.set(""))
+
+    def refreshSearch():
+        showSearchResults()
+        searchEntry.focus()
+
+    return {"search": searchEntry, "searchText": searchText, "refresh": refreshSearch}
+
+def focusQuickSearch(event=None):
+    showMainMenu()
+    screens.widgets["mainMenu"]["search"].focus()
+    screens.widgets["mainMenu"]["search"].select_range(0, END)
+
+def drawPicture(canvasPicture):
+    """Decode the picture once the screen has been drawn."""
+    def draw():
+        if canvasPicture.winfo_exists():
+            canvasPicture.create_image(370, 240, image=loadAssetImage("tobys-trucks.png"))
+    mainWindow.after_idle(draw)
+
+def deletedMessage(screen, text):
+    """The box a delete screen shows once the record has gone. The delete function places it."""
+    messageFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    Label(messageFrame, font="12", bg="Light blue", text=text, justify=LEFT).place(x=0, y=0)
+    return messageFrame
 
-    setUpMainWindow()
+#----------------------------------------------------------------------------------------------------------
+
+def formatPrice(value):
+    try:
+        return "%.2f" % float(value)
+    except (TypeError, ValueError):
+        return value
+
+def referencesExist(*references):
+    """Check (tableName, recordID, fieldName) references against the reference cache.
+    Blank IDs are allowed; the first unknown one is reported to the user."""
+    for tableName, recordID, fieldName in references:
+        if recordID.strip() and not referenceCache.exists(tableName, recordID):
+            messagebox.showerror("Unknown ID", f"{fieldName} '{recordID}' does not exist.")
+            return False
+    return True
+
+def loadRecord(tableName, recordID):
+    """The record an edit form shows, from the reference cache."""
+    record = referenceCache.record(tableName, recordID)
+    if record is None:
+        messagebox.showerror("Record Not Found", f"'{recordID}' has been deleted.")
+    return record
+
+#----------------------------------------------------------------------------------------------------------
+#### BACKGROUND QUERIES ####
+
+activeQueryJob = None
+
+def runInBackground(sql=None, params=(), function=None, onBatch=None, onDone=None, onError=None, maxRows=None):
+    """Run a report query on the executor thread, showing a loading indicator with a Cancel button.
+    Pass either sql (rows arrive in batches through onBatch) or function(connection)."""
+    global activeQueryJob
+
+    if activeQueryJob is not None:
+        activeQueryJob.cancel()
+
+    loadingLabel = Label(mainWindow, text="Loading…", font=('Arial', 10), bg="light yellow")
+    loadingLabel.place(x=300, y=495)
+
+    cancelButton = Button(mainWindow, text="Cancel", width=10)
+    cancelButton.place(x=380, y=492)
+
+    def finish(job):
+        global activeQueryJob
+        loadingLabel.destroy()
+        cancelButton.destroy()
+        if activeQueryJob is job:
+            activeQueryJob = None
+
+    def done(job, result):
+        finish(job)
+        if onDone is not None:
+            onDone(job, result)
+
+    def failed(job, error):
+        finish(job)
+        if onError is not None:
+            onError(job, error)
+        else:
+            messagebox.showerror("Query Error", f"The report could not be run: {error}")
+
+    def cancelled(job):
+        finish(job)
+
+    if function is not None:
+        job = queryExecutor.submitCall(function, onDone=done, onError=failed, onCancel=cancelled)
+    else:
+        job = queryExecutor.submit(sql, params, onBatch=onBatch, onDone=done, onError=failed, onCancel=cancelled, maxRows=maxRows)
+
+    def cancelQuery():
+        job.cancel()
+        messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Query Cancelled")
+        messageLabel.place(x=300, y=492)
+        mainWindow.after(3000, messageLabel.destroy)
+
+    cancelButton.config(command=cancelQuery)
+    activeQueryJob = job
+    return job
+
+
+def runSandboxed(sql, exportPath=None, onColumns=None, onBatch=None, onDone=None, onError=None):
+    """Run user-written SQL in a read-only worker process (see tobystrucks.sandbox), with
+    the same loading indicator and Cancel button as runInBackground."""
+    global activeQueryJob
+    from tobystrucks.sandbox import SandboxedQuery
+
+    if activeQueryJob is not None:
+        activeQueryJob.cancel()
+
+    loadingLabel = Label(mainWindow, text="Loading…", font=('Arial', 10), bg="light yellow")
+    loadingLabel.place(x=300, y=495)
+
+    cancelButton = Button(mainWindow, text="Cancel", width=10)
+    cancelButton.place(x=380, y=492)
+
+    def finish():
+        global activeQueryJob
+        loadingLabel.destroy()
+        cancelButton.destroy()
+        if activeQueryJob is sandboxedQuery:
+            activeQueryJob = None
+
+    def done(rowCount, truncated):
+        finish()
+        if onDone is not None:
+            onDone(rowCount, truncated)
+
+    def failed(message):
+        finish()
+        if onError is not None:
+            onError(message)
+
+    def cancelQuery():
+        sandboxedQuery.cancel()
+        messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Query Cancelled")
+        messageLabel.place(x=300, y=492)
+        mainWindow.after(3000, messageLabel.destroy)
+
+    sandboxedQuery = SandboxedQuery(
+        databaseFile, sql, timeout=customQueryExportTimeout if exportPath else customQueryTimeout,
+        maxRows=customQueryMaxRows, memoryLimit=customQueryMemoryLimit, exportPath=exportPath,
+        onColumns=onColumns, onBatch=onBatch, onDone=done, onError=failed, onCancel=finish
+    )
+
+    def poll():
+        if not sandboxedQuery.pump():
+            mainWindow.after(50, poll)
+
+    try:
+        sandboxedQuery.start()
+    except OSError as e:
+        finish()
+        messagebox.showerror("Query Error", f"The query process could not be started: {e}")
+        return None
+
+    cancelButton.config(command=cancelQuery)
+    activeQueryJob = sandboxedQuery
+    poll()
+    return sandboxedQuery
 
 #==========================================================================================================
 ############ TRUCKS TABLE ############
 
-def listTrucks():
-    clearMainWindow()
+# (columnName, heading, width) for the truck list and the truck bulk edit grid
+truckGridColumns = [
+    ("truckID", "ID", 60),
+    ("make", "Make", 100),
+    ("model", "Model", 100),
+    ("size", "Size", 50),
+    ("truckSupplierID", "Supplier", 90),
+    ("buyingPrice", "Buy Price", 90),
+    ("sellingPrice", "Sell Price", 90),
+    ("stockLevel", "Stock", 60),
+    ("reorderLevel", "Reorder Lvl", 80),
+    ("reorderAmount", "Reorder Amt", 80),
+]
 
+def listTrucks():
+    showScreen("truckList", buildTruckList)
     mainWindow.title("Toby's Trucks - Truck List")
 
-    listTrucks = Listbox(mainWindow, width=80, height=20, font=("Consolas",14), selectmode="single")
-    listTrucks.place(x=30, y=15)
-    listTrucks.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+def buildTruckList(screen):
+    headingLabel = Label(screen, text="TOBY'S TRUCKS - TRUCK LIST      Click on a Truck in the list to edit that truck.", font=('Arial', 12))
+    headingLabel.place(x=30, y=10)
 
-    listTrucks.bind("<<ListboxSelect>>", editTruck)
+    truckGrid = PagedGrid(screen, tobysTrucksDatabase, "truckTable", truckGridColumns, keyColumns=["truckID"], onSelect=editTruck, formatters={"buyingPrice": formatPrice, "sellingPrice": formatPrice})
+    truckGrid.place(x=30, y=40, width=810, height=440)
 
-    listTrucks.insert(END, " ")
-    listTrucks.insert(END, "             TOBY'S TRUCKS - TRUCK LIST")
-    listTrucks.insert(END, "             ==========================")
-    listTrucks.insert(END, " ")
-    listTrucks.insert(END, "  Click on a Truck in the list to edit that truck.")
-    listTrucks.insert(END, " ")
-    listTrucks.insert(END, " Truck Truck     Truck     Truck Truck      Buying   Selling  Stock Reorder ReOrder")
-    listTrucks.insert(END, " ID   Make     Model    Size Supplier  Price    Price          Level   Amount")
-    listTrucks.insert(END, " ---- -------- -------- ---- --------  -------  -------  ----- ------- -------")
-
-    for row in tobysTrucksDatabase.execute("SELECT * FROM truckTable"):
-        listTrucks.insert( END, " %-4s %-8s %-8s %-4s %-8s %8.2f %8.2f %4d %6d %6d" %(row))
+    return {"grid": truckGrid, "refresh": truckGrid.refresh}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
-def editTruck(event):
-    listIndex = event.widget.curselection()[0]
-    selectedTruckID.set(event.widget.get(listIndex)[1:5])
-    queryResults = tobysTrucksDatabase.execute(f"SELECT * FROM truckTable WHERE truckID = '{selectedTruckID.get()}'")
-    truckRecord = queryResults.fetchone()
+def editTruck(recordTruckID):
+    selectedTruckID.set(recordTruckID)
+    truckRecord = loadRecord("truckTable", selectedTruckID.get())
+    if truckRecord is None:
+        return
 
     truckID.set(truckRecord[0])
     make.set(truckRecord[1])
@@ -459,36 +860,34 @@ def editTruck(event):
     reorderLevel.set(truckRecord[8])
     reorderAmount.set(truckRecord[9])
 
-    setUpTruckForm("Edit Truck")
-
-    updateTruckButton = Button(mainWindow, text="Update Truck Details", command=updateTruckDetails)
-    updateTruckButton.place(x=350, y=320, width=200, height=30)
+    setUpTruckForm("Edit Truck", "Update Truck Details", updateTruckDetails)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def updateTruckDetails():
-    tobysTrucksDatabase.execute(f"""
-        UPDATE truckTable
-        SET 
-            truckID = {truckID.get()},
-            make = {make.get()},
-            model = {model.get()},
-            size = {size.get()},
-            truckSupplierID = {truckSupplierID.get()},
-            buyingPrice = {buyingPrice.get()},
-            sellingPrice = {sellingPrice.get()},
-            stockLevel = {stockLevel.get()},
-            reorderLevel = {reorderLevel.get()},
-            reorderAmount = {reorderAmount.get()}
-        WHERE 
-            truckID = {selectedTruckID.get()}
-    """)
+    if not referencesExist(("supplierTable", truckSupplierID.get(), "Supplier ID")):
+        return
+
+    try:
+        newStockLevel = int(stockLevel.get())
+    except ValueError:
+        messagebox.showerror("Invalid Stock Level", "The stock level must be a whole number.")
+        return
+
+    queries.execute(tobysTrucksDatabase, "updateTruck", (
+        truckID.get(), make.get(), model.get(), size.get(), truckSupplierID.get(), buyingPrice.get(),
+        sellingPrice.get(), reorderLevel.get(), reorderAmount.get(), selectedTruckID.get()
+    ))
+    # stockLevel is the stock ledger's running balance, so a new level is recorded as an adjustment.
+    setStockLevel(tobysTrucksDatabase, truckID.get(), newStockLevel, note=f"Stock level edited by {currentUsername}")
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")
+    updateReorderBadge()
     
     logUserAction("UPDATE", "truckTable", selectedTruckID.get(), f"Updated truck: {selectedTruckID.get()}")
 
-    labelMessage = Label(mainWindow, font="11", bg="Light blue", text="Truck Details Updated")
-    labelMessage.place(x=345, y=360)
+    screens.widgets["truckForm"]["message"].config(text="Truck Details Updated")
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -506,146 +905,246 @@ def addTruck():
     reorderLevel.set("")
     reorderAmount.set("")
 
-    setUpTruckForm("Add Truck")
-
-    buttonSaveTruck = Button(mainWindow, text="Save Truck Details", command=saveNewTruck)
-    buttonSaveTruck.place(x=350, y=320, width=200, height=30)
+    setUpTruckForm("Add Truck", "Save Truck Details", saveNewTruck)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def saveNewTruck():
+    if not referencesExist(("supplierTable", truckSupplierID.get(), "Supplier ID")):
+        return
+
     newTruckRecord = [
         truckID.get(), make.get(), model.get(), size.get(),
         truckSupplierID.get(), buyingPrice.get(), sellingPrice.get(),
         stockLevel.get(), reorderLevel.get(), reorderAmount.get()
     ]
 
-    tobysTrucksDatabase.execute("INSERT INTO truckTable VALUES (?,?,?,?,?,?,?,?,?,?)", newTruckRecord)
+    queries.execute(tobysTrucksDatabase, "insertTruck", newTruckRecord)
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")
+    updateReorderBadge()
     
     logUserAction("INSERT", "truckTable", truckID.get(), f"Added new truck: {truckID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="New Truck Saved")
-    messageLabel.place(x=350, y=360)
+    screens.widgets["truckForm"]["message"].config(text="New Truck Saved")
 
 #----------------------------------------------------------------------------------------------------------
 
-def setUpTruckForm(heading):
-    clearMainWindow()
+def setUpTruckForm(heading, buttonText, command):
+    truckForm = showScreen("truckForm", buildTruckForm)
+    truckForm["heading"].config(text=heading)
+    truckForm["button"].config(text=buttonText, command=command)
+    truckForm["message"].config(text="")
 
-    frameEdittruck = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+def buildTruckForm(screen):
+    frameEdittruck = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     frameEdittruck.place( x=200, y=10, width = 580, height = 400)
 
-    labelHeading = Label(mainWindow, text=heading, font=('Arial', 16), bg="Light blue")
+    labelHeading = Label(screen, font=('Arial', 16), bg="Light blue")
     labelHeading.place( x=320, y=12, width=200, height=30)
 
-    Label(mainWindow, bg="Light blue", text="Truck ID:").place(x=220, y=60)
-    Label(mainWindow, bg="Light blue", text="Make:").place(x=220, y=85)
-    Label(mainWindow, bg="Light blue", text="Model:").place(x=220, y=110)
-    Label(mainWindow, bg="Light blue", text="Size:").place(x=220, y=135)
-    Label(mainWindow, bg="Light blue", text="Truck Supplier ID:").place(x=220, y=160)
-    Label(mainWindow, bg="Light blue", text="Buy Price:").place(x=220, y=185)
-    Label(mainWindow, bg="Light blue", text="Sell Price:").place(x=220, y=210)
-    Label(mainWindow, bg="Light blue", text="Stock:").place(x=220, y=235)
-    Label(mainWindow, bg="Light blue", text="Reorder Level:").place(x=220, y=260)
-    Label(mainWindow, bg="Light blue", text="Reorder Amount:").place(x=220, y=285)
+    Label(screen, bg="Light blue", text="Truck ID:").place(x=220, y=60)
+    Label(screen, bg="Light blue", text="Make:").place(x=220, y=85)
+    Label(screen, bg="Light blue", text="Model:").place(x=220, y=110)
+    Label(screen, bg="Light blue", text="Size:").place(x=220, y=135)
+    Label(screen, bg="Light blue", text="Truck Supplier ID:").place(x=220, y=160)
+    Label(screen, bg="Light blue", text="Buy Price:").place(x=220, y=185)
+    Label(screen, bg="Light blue", text="Sell Price:").place(x=220, y=210)
+    Label(screen, bg="Light blue", text="Stock:").place(x=220, y=235)
+    Label(screen, bg="Light blue", text="Reorder Level:").place(x=220, y=260)
+    Label(screen, bg="Light blue", text="Reorder Amount:").place(x=220, y=285)
 
     # Place the Data Format Labels - Information for the user  (Validation - None Added Yet)
-    Label(mainWindow, bg="Light blue", text=": Format XX99").place(x=570, y=60)
-    Label(mainWindow, bg="Light blue", text=": Max 8 Characters").place(x=570, y=85)
-    Label(mainWindow, bg="Light blue", text=": Max 8 Characters").place(x=570, y=110)
-    Label(mainWindow, bg="Light blue", text=": XS,S,M,L,XL,XXL").place(x=570, y=135)
-    Label(mainWindow, bg="Light blue", text=": From Supplier Table").place(x=570, y=160)
-    Label(mainWindow, bg="Light blue", text=": Max £9999.99").place(x=570, y=185)
-    Label(mainWindow, bg="Light blue", text=": Max £9999.99").place(x=570, y=210)
-    Label(mainWindow, bg="Light blue", text=": 0-100").place(x=570, y=235)
-    Label(mainWindow, bg="Light blue", text=": 0-100").place(x=570, y=260)
-    Label(mainWindow, bg="Light blue", text=": 0-100").place(x=570, y=285)
-
-    entry0 = Entry(mainWindow, textvariable=truckID, width=30, bg="yellow").place(x=350, y=60)
-    entry1 = Entry(mainWindow, textvariable=make, width=30, bg="white").place(x=350, y=85)
-    entry2 = Entry(mainWindow, textvariable=model, width=30, bg="white").place(x=350, y=110)
-    entry3 = Entry(mainWindow, textvariable=size, width=30, bg="white").place(x=350, y=135)
-    entry4 = Entry(mainWindow, textvariable=truckSupplierID, width=30, bg="white").place(x=350, y=160)
-    entry5 = Entry(mainWindow, textvariable=buyingPrice, width=30, bg="white").place(x=350, y=185)
-    entry6 = Entry(mainWindow, textvariable=sellingPrice, width=30, bg="white").place(x=350, y=210)
-    entry7 = Entry(mainWindow, textvariable=stockLevel, width=30, bg="white").place(x=350, y=235)
-    entry8 = Entry(mainWindow, textvariable=reorderLevel, width=30, bg="white").place(x=350, y=260)
-    entry9 = Entry(mainWindow, textvariable=reorderAmount, width=30, bg="white").place(x=350, y=285)
+    Label(screen, bg="Light blue", text=": Format XX99").place(x=570, y=60)
+    Label(screen, bg="Light blue", text=": Max 8 Characters").place(x=570, y=85)
+    Label(screen, bg="Light blue", text=": Max 8 Characters").place(x=570, y=110)
+    Label(screen, bg="Light blue", text=": XS,S,M,L,XL,XXL").place(x=570, y=135)
+    Label(screen, bg="Light blue", text=": From Supplier Table").place(x=570, y=160)
+    Label(screen, bg="Light blue", text=": Max £9999.99").place(x=570, y=185)
+    Label(screen, bg="Light blue", text=": Max £9999.99").place(x=570, y=210)
+    Label(screen, bg="Light blue", text=": 0-100").place(x=570, y=235)
+    Label(screen, bg="Light blue", text=": 0-100").place(x=570, y=260)
+    Label(screen, bg="Light blue", text=": 0-100").place(x=570, y=285)
+
+    entry0 = Entry(screen, textvariable=truckID, width=30, bg="yellow").place(x=350, y=60)
+    entry1 = Entry(screen, textvariable=make, width=30, bg="white").place(x=350, y=85)
+    entry2 = Entry(screen, textvariable=model, width=30, bg="white").place(x=350, y=110)
+    entry3 = Entry(screen, textvariable=size, width=30, bg="white").place(x=350, y=135)
+    entry4 = Entry(screen, textvariable=truckSupplierID, width=30, bg="white").place(x=350, y=160)
+    entry5 = Entry(screen, textvariable=buyingPrice, width=30, bg="white").place(x=350, y=185)
+    entry6 = Entry(screen, textvariable=sellingPrice, width=30, bg="white").place(x=350, y=210)
+    entry7 = Entry(screen, textvariable=stockLevel, width=30, bg="white").place(x=350, y=235)
+    entry8 = Entry(screen, textvariable=reorderLevel, width=30, bg="white").place(x=350, y=260)
+    entry9 = Entry(screen, textvariable=reorderAmount, width=30, bg="white").place(x=350, y=285)
+
+    saveTruckButton = Button(screen)
+    saveTruckButton.place(x=350, y=320, width=200, height=30)
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=350, y=360)
+
+    return {"heading": labelHeading, "button": saveTruckButton, "message": messageLabel}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
 def selectTruckToDelete():
-    clearMainWindow()
+    deleteScreen = showScreen("truckDelete", buildTruckDelete)
     mainWindow.title("TOBY'S TRUCKS - DELETE A TRUCK")
 
-    enterTruckIDFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    deleteScreen["entry"].delete(0, END)
+    deleteScreen["messageFrame"].place_forget()
+
+def buildTruckDelete(screen):
+    enterTruckIDFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
     enterTruckIDFrame.place(x=50, y=10, width=280, height=280)
 
-    selectTruckIDHeadingLabel = Label(mainWindow, text="Select Truck ID", font=('Arial', 16), bg="Light blue")
+    selectTruckIDHeadingLabel = Label(screen, text="Select Truck ID", font=('Arial', 16), bg="Light blue")
     selectTruckIDHeadingLabel.place(x=70, y=12, width=200, height=40)
 
-    enterTruckIDLabel = Label(mainWindow, text="Enter Truck ID:")
+    enterTruckIDLabel = Label(screen, text="Enter Truck ID:")
     enterTruckIDLabel.place(x=70, y=60)
 
-    entrySelectedTruckID = Entry(mainWindow, textvariable=truckID, width=20, bg="yellow")
+    entrySelectedTruckID = Entry(screen, textvariable=truckID, width=20, bg="yellow")
     entrySelectedTruckID.place(x=170, y=60)
-    entrySelectedTruckID.delete(0, END)
 
-    deleteTruckButton = Button(mainWindow, text="Delete Truck", width=32, command=deleteTruck)
+    deleteTruckButton = Button(screen, text="Delete Truck", width=32, command=deleteTruck)
     deleteTruckButton.place(x=70, y=100)
 
+    return {"entry": entrySelectedTruckID, "messageFrame": deletedMessage(screen, "Truck Deleted")}
+
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
+@writesDatabase
 def deleteTruck():
-    tobysTrucksDatabase.execute(f"DELETE FROM truckTable WHERE truckID = '{truckID.get()}'")
+    queries.execute(tobysTrucksDatabase, "deleteTruck", (truckID.get(),))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")
+    updateReorderBadge()
     
     logUserAction("DELETE", "truckTable", truckID.get(), f"Deleted truck: {truckID.get()}")
 
-    frameMessage = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
-    frameMessage.place(x=90, y=160, width=200, height=100)
+    screens.widgets["truckDelete"]["messageFrame"].place(x=90, y=160, width=200, height=100)
 
-    labelMessage = Label(mainWindow, font="12", bg="Light blue", text="Truck Deleted", justify=LEFT)
-    labelMessage.place(x=92, y=162)
+#----------------------------------------------------------------------------------------------------------
+
+def showStockMovements():
+    showScreen("stockMovements", buildStockMovements)
+    mainWindow.title("TOBY'S TRUCKS - STOCK MOVEMENTS")
+
+def buildStockMovements(screen):
+    Label(screen, text="Select Truck ID : ", font=('Arial', 10)).place(x=20, y=12)
+
+    comboBoxTruckIDs = ttk.Combobox(screen, state="readonly", textvariable=stockTruckID)
+    comboBoxTruckIDs.place(x=140, y=12)
+
+    stockLevelLabel = Label(screen, font=('Arial', 10))
+    stockLevelLabel.place(x=320, y=12)
+
+    movementColumns = [("timestamp", "Time", 150), ("type", "Type", 90), ("quantity", "Change", 70),
+                       ("balance", "Balance", 70), ("order", "Order ID", 90), ("note", "Note", 350)]
+    movementTree = ttk.Treeview(screen, columns=[name for name, _, _ in movementColumns], show="headings", selectmode="none")
+    for columnName, heading, width in movementColumns:
+        movementTree.heading(columnName, text=heading)
+        movementTree.column(columnName, width=width, anchor="w", stretch=False)
+    movementTree.place(x=20, y=45, width=830, height=340)
+
+    receiptFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    receiptFrame.place(x=20, y=395, width=830, height=70)
+    Label(screen, text="Trucks received:", bg="Light blue").place(x=35, y=405)
+    Entry(screen, textvariable=stockReceivedQuantity, width=8, bg="white").place(x=145, y=405)
+    Label(screen, text="Note:", bg="Light blue").place(x=215, y=405)
+    Entry(screen, textvariable=stockReceivedNote, width=50, bg="white").place(x=255, y=405)
+    Button(screen, text="Record Delivery", width=16, command=recordDelivery).place(x=620, y=401)
+    messageLabel = Label(screen, text="", bg="Light blue")
+    messageLabel.place(x=35, y=435)
+
+    def showMovements(event=None):
+        movementTree.delete(*movementTree.get_children())
+        if not stockTruckID.get():
+            stockLevelLabel.config(text="")
+            return
+        movements = stockHistory(tobysTrucksDatabase, stockTruckID.get())
+        # Newest first; the balance column is still worked out oldest first.
+        for _, timestamp, movementType, movementQuantity, balance, movementOrderID, note in reversed(movements):
+            movementTree.insert("", "end", values=(toDisplayTimestamp(timestamp), movementType, "%+d" % movementQuantity,
+                                                   balance, movementOrderID, note))
+        truckRecord = referenceCache.record("truckTable", stockTruckID.get())
+        stockLevelLabel.config(text=f"In stock: {truckRecord[7] if truckRecord else 0}")
+
+    def refreshStockMovements():
+        truckIDs = referenceCache.ids("truckTable")
+        comboBoxTruckIDs.config(values=truckIDs)
+        if stockTruckID.get() not in truckIDs:
+            stockTruckID.set("")
+        messageLabel.config(text="")
+        showMovements()
+
+    comboBoxTruckIDs.bind("<<ComboboxSelected>>", showMovements)
+
+    refreshStockMovements()
+    return {"showMovements": showMovements, "message": messageLabel, "refresh": refreshStockMovements}
+
+@requireLogin
+@writesDatabase
+def recordDelivery():
+    stockScreen = screens.widgets["stockMovements"]
+    if not stockTruckID.get():
+        messagebox.showerror("No Truck Selected", "Select the truck that was delivered.")
+        return
+    try:
+        receivedQuantity = int(stockReceivedQuantity.get())
+        receiveStock(tobysTrucksDatabase, stockTruckID.get(), receivedQuantity, note=stockReceivedNote.get().strip() or None)
+    except ValueError:
+        messagebox.showerror("Invalid Quantity", "The number of trucks received must be a whole number more than 0.")
+        return
+    tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")
+    updateReorderBadge()
+
+    logUserAction("RECEIPT", "truckTable", stockTruckID.get(), f"Received {receivedQuantity} of truck {stockTruckID.get()}")
+
+    stockReceivedQuantity.set("")
+    stockReceivedNote.set("")
+    stockScreen["showMovements"]()
+    stockScreen["message"].config(text=f"{receivedQuantity} received")
 
 #==========================================================================================================
 ############ SUPPLIER TABLE ############
 
-def listSuppliers():
-    clearMainWindow()
+# (columnName, heading, width) for the supplier list and the supplier bulk edit grid
+supplierGridColumns = [
+    ("supplierID", "ID", 90),
+    ("supplierName", "Supplier Name", 180),
+    ("supplierAddress", "Address", 200),
+    ("supplierPhone", "Phone", 120),
+    ("supplierEmail", "Email", 200),
+]
 
+def listSuppliers():
+    showScreen("supplierList", buildSupplierList)
     mainWindow.title("TOBY'S TRUCKS - SUPPLIER LIST")
 
-    suppliersList = Listbox(mainWindow, width=80, height=20, font=("Consolas",14), selectmode="single")
-    suppliersList.place( x=30, y=15)
-    suppliersList.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
-
-    suppliersList.bind("<<ListboxSelect>>", editSupplier)
+def buildSupplierList(screen):
+    headingLabel = Label(screen, text="TOBY'S TRUCKS - SUPPLIER LIST      Click on a Supplier in the list to edit that Supplier.", font=('Arial', 12))
+    headingLabel.place(x=30, y=10)
 
-    suppliersList.insert(END, " ")
-    suppliersList.insert(END, "              TOBY'S TRUCKS - SUPPLIER LIST")
-    suppliersList.insert(END, "              =============================")
-    suppliersList.insert(END, " ")
-    suppliersList.insert(END, "  Click on a Supplier in the list to edit that Supplier.")
-    suppliersList.insert(END, " ")
-    suppliersList.insert(END, " ID       Supplier Name  Address        Phone        Email         ")
-    suppliersList.insert(END, " -------- -------------- -------------- ------------ --------------")
+    supplierGrid = PagedGrid(screen, tobysTrucksDatabase, "supplierTable", supplierGridColumns, keyColumns=["supplierID"], onSelect=editSupplier)
+    supplierGrid.place(x=30, y=40, width=810, height=440)
 
-    for row in tobysTrucksDatabase.execute("SELECT * FROM supplierTable"):
-        suppliersList.insert(END, " %-8s %-14s %-14s %-12s %-14s" %(row))
+    return {"grid": supplierGrid, "refresh": supplierGrid.refresh}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
-def editSupplier(event):
-    listIndex = event.widget.curselection()[0]
-    selectedSupplierID.set(event.widget.get(listIndex)[1:9])
+def editSupplier(recordSupplierID):
+    selectedSupplierID.set(recordSupplierID)
 
-    queryResults = tobysTrucksDatabase.execute(f"SELECT * FROM supplierTable WHERE supplierID = '{selectedSupplierID.get()}'")
-    supplierRecord = queryResults.fetchone()
+    supplierRecord = loadRecord("supplierTable", selectedSupplierID.get())
+    if supplierRecord is None:
+        return
 
     supplierID.set(supplierRecord[0])
     supplierName.set(supplierRecord[1])
@@ -653,31 +1152,21 @@ def editSupplier(event):
     supplierPhone.set(supplierRecord[3])
     supplierEmail.set(supplierRecord[4])
 
-    setUpSupplierForm("Edit Supplier")
-
-    saveSupplierButton = Button(mainWindow, text="Update Supplier Details", command=updateSupplierDetails)
-    saveSupplierButton.place( x=345, y=320, width=200, height=30 )
+    setUpSupplierForm("Edit Supplier", "Update Supplier Details", updateSupplierDetails)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def updateSupplierDetails():
-    tobysTrucksDatabase.execute(f"""
-        UPDATE supplierTable
-        SET
-            supplierID = '{supplierID.get()}',
-            supplierName = '{supplierName.get()}',
-            supplierAddress = '{supplierAddress.get()}',
-            supplierPhone = '{supplierPhone.get()}',
-            supplierEmail = '{supplierEmail.get()}'
-        WHERE
-            supplierID = '{selectedSupplierID.get()}'
-    """)
+    queries.execute(tobysTrucksDatabase, "updateSupplier", (
+        supplierID.get(), supplierName.get(), supplierAddress.get(), supplierPhone.get(), supplierEmail.get(), selectedSupplierID.get()
+    ))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("supplierTable")
     
     logUserAction("UPDATE", "supplierTable", selectedSupplierID.get(), f"Updated supplier: {selectedSupplierID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Supplier Updated")
-    messageLabel.place(x=345, y=360)
+    screens.widgets["supplierForm"]["message"].config(text="Supplier Updated")
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -690,132 +1179,143 @@ def addSupplier():
     supplierPhone.set("")
     supplierEmail.set("")
 
-    setUpSupplierForm("Add Supplier")
-
-    saveSupplierButton = Button(mainWindow, text="Save Supplier Details", command=saveNewSupplier)
-    saveSupplierButton.place(x=350, y=320, width=200, height=30)
+    setUpSupplierForm("Add Supplier", "Save Supplier Details", saveNewSupplier)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def saveNewSupplier():
     newSupplierRecord = [
         supplierID.get(), supplierName.get(), 
         supplierAddress.get(), supplierPhone.get(), supplierEmail.get()
     ]
 
-    tobysTrucksDatabase.execute("INSERT INTO supplierTable VALUES (?,?,?,?,?)", newSupplierRecord)
+    queries.execute(tobysTrucksDatabase, "insertSupplier", newSupplierRecord)
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("supplierTable")
     
     logUserAction("INSERT", "supplierTable", supplierID.get(), f"Added new supplier: {supplierID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="New Supplier Saved")
-    messageLabel.place(x=350, y=360)
+    screens.widgets["supplierForm"]["message"].config(text="New Supplier Saved")
 
 #----------------------------------------------------------------------------------------------------------
 
-def setUpSupplierForm(heading):
-
-    clearMainWindow()
+def setUpSupplierForm(heading, buttonText, command):
+    supplierForm = showScreen("supplierForm", buildSupplierForm)
+    supplierForm["heading"].config(text=heading)
+    supplierForm["button"].config(text=buttonText, command=command)
+    supplierForm["message"].config(text="")
 
-    editSupplierFrame = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+def buildSupplierForm(screen):
+    editSupplierFrame = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     editSupplierFrame.place( x=200, y=10, width = 580, height = 400)
 
-    addSupplierHeadingLabel = Label(mainWindow, text=heading, font=('Arial', 16), bg="Light blue")
+    addSupplierHeadingLabel = Label(screen, font=('Arial', 16), bg="Light blue")
     addSupplierHeadingLabel.place( x=320, y=12, width=200, height=30)
 
-    Label(mainWindow, bg="Light blue", text = "Supplier ID:").place( x=220, y=60)
-    Label(mainWindow, bg="Light blue", text = "Supplier Name:").place( x=220, y=85)
-    Label(mainWindow, bg="Light blue", text = "Address:").place( x=220, y=110)
-    Label(mainWindow, bg="Light blue", text = "Phone:").place( x=220, y=135)
-    Label(mainWindow, bg="Light blue", text = "Email:").place( x=220, y=160)
+    Label(screen, bg="Light blue", text = "Supplier ID:").place( x=220, y=60)
+    Label(screen, bg="Light blue", text = "Supplier Name:").place( x=220, y=85)
+    Label(screen, bg="Light blue", text = "Address:").place( x=220, y=110)
+    Label(screen, bg="Light blue", text = "Phone:").place( x=220, y=135)
+    Label(screen, bg="Light blue", text = "Email:").place( x=220, y=160)
 
     # Place the Data Format Labels - Information for the user   (Validation - None Added Yet)
-    Label(mainWindow, bg="Light blue", text=": Format XXXXXXXX").place(x=570, y=60)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=85)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=110)
-    Label(mainWindow, bg="Light blue", text=": 11 Digits").place(x=570, y=135)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=160)
+    Label(screen, bg="Light blue", text=": Format XXXXXXXX").place(x=570, y=60)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=85)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=110)
+    Label(screen, bg="Light blue", text=": 11 Digits").place(x=570, y=135)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=160)
+
+    entry0 = Entry(screen, textvariable=supplierID, width=30, bg="yellow").place(x=350, y=60)
+    entry1 = Entry(screen, textvariable=supplierName, width=30, bg="white").place(x=350, y=85)
+    entry2 = Entry(screen, textvariable=supplierAddress, width=30, bg="white").place(x=350, y=110)
+    entry3 = Entry(screen, textvariable=supplierPhone, width=30, bg="white").place(x=350, y=135)
+    entry4 = Entry(screen, textvariable=supplierEmail, width=30, bg="white").place(x=350, y=160)
+
+    saveSupplierButton = Button(screen)
+    saveSupplierButton.place( x=345, y=320, width=200, height=30 )
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=345, y=360)
 
-    entry0 = Entry(mainWindow, textvariable=supplierID, width=30, bg="yellow").place(x=350, y=60)
-    entry1 = Entry(mainWindow, textvariable=supplierName, width=30, bg="white").place(x=350, y=85)
-    entry2 = Entry(mainWindow, textvariable=supplierAddress, width=30, bg="white").place(x=350, y=110)
-    entry3 = Entry(mainWindow, textvariable=supplierPhone, width=30, bg="white").place(x=350, y=135)
-    entry4 = Entry(mainWindow, textvariable=supplierEmail, width=30, bg="white").place(x=350, y=160)
+    return {"heading": addSupplierHeadingLabel, "button": saveSupplierButton, "message": messageLabel}
 
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
 def selectSupplierToDelete():
-    clearMainWindow()
-
+    deleteScreen = showScreen("supplierDelete", buildSupplierDelete)
     mainWindow.title("TOBY'S TRUCKS - DELETE A SUPPLIER")
 
-    supplierIDFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    deleteScreen["entry"].delete(0, END)
+    deleteScreen["messageFrame"].place_forget()
+
+def buildSupplierDelete(screen):
+    supplierIDFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
     supplierIDFrame.place(x=50, y=10, width=280, height=280)
 
-    headingLabel = Label(mainWindow, text="Select Supplier ID", font=('Arial', 16), bg="Light blue")
+    headingLabel = Label(screen, text="Select Supplier ID", font=('Arial', 16), bg="Light blue")
     headingLabel.place(x=70, y=12, width=200, height=40)
 
-    labelEnterSupplierID = Label(mainWindow, text="Enter Supplier ID:")
+    labelEnterSupplierID = Label(screen, text="Enter Supplier ID:")
     labelEnterSupplierID.place(x=70, y=60)
 
-    entrySelectedSupplierID = Entry(mainWindow, textvariable=supplierID, width=20, bg="yellow")
+    entrySelectedSupplierID = Entry(screen, textvariable=supplierID, width=20, bg="yellow")
     entrySelectedSupplierID.place(x=170, y=60)
-    entrySelectedSupplierID.delete(0, END)
 
-    buttonDeleteSupplier = Button( mainWindow, text="Delete Supplier", width=32, command = deleteSupplier)
+    buttonDeleteSupplier = Button( screen, text="Delete Supplier", width=32, command = deleteSupplier)
     buttonDeleteSupplier.place( x=70, y=100)
 
+    return {"entry": entrySelectedSupplierID, "messageFrame": deletedMessage(screen, "Supplier Deleted")}
+
 #---------------------------------------------------------------------------------------
 
 @requireLogin
+@writesDatabase
 def deleteSupplier():
-    tobysTrucksDatabase.execute(f"DELETE FROM supplierTable WHERE supplierID = '{supplierID.get()}'")
+    queries.execute(tobysTrucksDatabase, "deleteSupplier", (supplierID.get(),))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("supplierTable")
     
     logUserAction("DELETE", "supplierTable", supplierID.get(), f"Deleted supplier: {supplierID.get()}")
 
-    messageFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
-    messageFrame.place(x=90, y=160, width=200, height=100)
-
-    messageLabel = Label(mainWindow, font="12", bg="Light blue", text="Supplier Deleted", justify=LEFT)
-    messageLabel.place( x=92, y=162)
+    screens.widgets["supplierDelete"]["messageFrame"].place(x=90, y=160, width=200, height=100)
 
 #==========================================================================================================
 ############ CUSTOMER TABLE ############
 
+# (columnName, heading, width) for the customer list and the customer bulk edit grid
+customerGridColumns = [
+    ("customerID", "ID", 90),
+    ("customerName", "Customer Name", 180),
+    ("customerAddress", "Address", 200),
+    ("customerPhone", "Phone", 120),
+    ("customerEmail", "Email", 200),
+]
+
 def listCustomers():
-    clearMainWindow()
+    showScreen("customerList", buildCustomerList)
     mainWindow.title("TOBY'S TRUCKS - CUSTOMER LIST")
 
-    listCustomers = Listbox(mainWindow, width=80, height=20, font=("Consolas",14), selectmode="single")
-    listCustomers.place(x=30, y=15)
-    listCustomers.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
-
-    listCustomers.bind("<<ListboxSelect>>", editCustomer)
+def buildCustomerList(screen):
+    headingLabel = Label(screen, text="TOBY'S TRUCKS - CUSTOMER LIST      Click on a Customer in the list to edit that Customer.", font=('Arial', 12))
+    headingLabel.place(x=30, y=10)
 
-    listCustomers.insert(END, " ")
-    listCustomers.insert(END, "              TOBY'S TRUCKS - CUSTOMER LIST")
-    listCustomers.insert(END, "              =============================")
-    listCustomers.insert(END, " ")
-    listCustomers.insert(END, "  Click on a Customer in the list to edit that Customer.")
-    listCustomers.insert(END, " ")
-    listCustomers.insert(END, " ID   Customer Name  Address        Phone        Email         ")
-    listCustomers.insert(END, " ---- -------------- -------------- ------------ --------------")
+    customerGrid = PagedGrid(screen, tobysTrucksDatabase, "customerTable", customerGridColumns, keyColumns=["customerID"], onSelect=editCustomer)
+    customerGrid.place(x=30, y=40, width=810, height=440)
 
-    for row in tobysTrucksDatabase.execute("SELECT * FROM customerTable"):
-        listCustomers.insert(END, " %-4s %-14s %-14s %-12s %-14s" %(row))
+    return {"grid": customerGrid, "refresh": customerGrid.refresh}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
-def editCustomer(event):
-    listIndex = event.widget.curselection()[0]
-    selectedCustomerID.set( event.widget.get(listIndex)[1:5])
+def editCustomer(recordCustomerID):
+    selectedCustomerID.set(recordCustomerID)
 
-    queryResults = tobysTrucksDatabase.execute(f"SELECT * FROM customerTable WHERE customerID = '{selectedCustomerID.get()}'")
-    customerRecord = queryResults.fetchone()
+    customerRecord = loadRecord("customerTable", selectedCustomerID.get())
+    if customerRecord is None:
+        return
 
     customerID.set(customerRecord[0])
     customerName.set(customerRecord[1])
@@ -823,31 +1323,21 @@ def editCustomer(event):
     customerPhone.set(customerRecord[3])
     customerEmail.set(customerRecord[4])
 
-    setUpCustomerForm("Edit Customer")
-
-    saveCustomerButton = Button(mainWindow, text="Update Customer Details", command=updateCustomerDetails)
-    saveCustomerButton.place(x=320, y=320, width=200, height=30)
+    setUpCustomerForm("Edit Customer", "Update Customer Details", updateCustomerDetails)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def updateCustomerDetails():
-    tobysTrucksDatabase.execute(f"""
-        UPDATE customerTable
-        SET
-            customerID = '{customerID.get()}',
-            customerName = '{customerName.get()}',
-            customerAddress = '{customerAddress.get()}',
-            customerPhone = '{customerPhone.get()}',
-            customerEmail = '{customerEmail.get()}'
-        WHERE
-            customerID = '{selectedCustomerID.get()}'
-    """)
+    queries.execute(tobysTrucksDatabase, "updateCustomer", (
+        customerID.get(), customerName.get(), customerAddress.get(), customerPhone.get(), customerEmail.get(), selectedCustomerID.get()
+    ))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("customerTable")
     
     logUserAction("UPDATE", "customerTable", selectedCustomerID.get(), f"Updated customer: {selectedCustomerID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Customer Updated")
-    messageLabel.place(x=345, y=360)
+    screens.widgets["customerForm"]["message"].config(text="Customer Updated")
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -860,13 +1350,11 @@ def addCustomer():
     customerPhone.set("")
     customerEmail.set("")
 
-    setUpCustomerForm("Add Customer")
-
-    saveCustomerButton = Button(mainWindow, text="Save Customer Details", command=saveNewCustomer)
-    saveCustomerButton.place(x=320, y=320, width=200, height=30)
+    setUpCustomerForm("Add Customer", "Save Customer Details", saveNewCustomer)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def saveNewCustomer():
 
     newCustomerRecord = [
@@ -874,148 +1362,155 @@ def saveNewCustomer():
         customerAddress.get(), customerPhone.get(), customerEmail.get()
     ]
 
-    tobysTrucksDatabase.execute("INSERT INTO customerTable VALUES(?,?,?,?,?)", newCustomerRecord)
+    queries.execute(tobysTrucksDatabase, "insertCustomer", newCustomerRecord)
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("customerTable")
     
     logUserAction("INSERT", "customerTable", customerID.get(), f"Added new customer: {customerID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="New Customer Saved")
-    messageLabel.place(x=320, y=360)
+    screens.widgets["customerForm"]["message"].config(text="New Customer Saved")
 #----------------------------------------------------------------------------------------------------------
 
-def setUpCustomerForm(heading):
-    clearMainWindow()
+def setUpCustomerForm(heading, buttonText, command):
+    customerForm = showScreen("customerForm", buildCustomerForm)
+    customerForm["heading"].config(text=heading)
+    customerForm["button"].config(text=buttonText, command=command)
+    customerForm["message"].config(text="")
 
-    editCustomerFrame = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+def buildCustomerForm(screen):
+    editCustomerFrame = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     editCustomerFrame.place(x=200, y=10, width=580, height=400)
 
-    addCustomerHeadingLabel = Label(mainWindow, text=heading, font=('Arial', 16), bg="Light blue")
+    addCustomerHeadingLabel = Label(screen, font=('Arial', 16), bg="Light blue")
     addCustomerHeadingLabel.place(x=320, y=12, width=200, height=30)
 
-    Label(mainWindow, bg="Light blue", text="Customer ID:").place(x=220, y=60)
-    Label(mainWindow, bg="Light blue", text="Name:").place(x=220, y=85)
-    Label(mainWindow, bg="Light blue", text="Address:").place(x=220, y=110)
-    Label(mainWindow, bg="Light blue", text="Phone:").place(x=220, y=135)
-    Label(mainWindow, bg="Light blue", text="Email:").place(x=220, y=160)
+    Label(screen, bg="Light blue", text="Customer ID:").place(x=220, y=60)
+    Label(screen, bg="Light blue", text="Name:").place(x=220, y=85)
+    Label(screen, bg="Light blue", text="Address:").place(x=220, y=110)
+    Label(screen, bg="Light blue", text="Phone:").place(x=220, y=135)
+    Label(screen, bg="Light blue", text="Email:").place(x=220, y=160)
 
     # Place the Data Format Labels - Information for the user   (Validation - None Added Yet)
-    Label(mainWindow, bg="Light blue", text=": Format 9999").place(x=570, y=60)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=85)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=110)
-    Label(mainWindow, bg="Light blue", text=": 11 Digits").place(x=570, y=135)
-    Label(mainWindow, bg="Light blue", text=": Max 14 Characters").place(x=570, y=160)
-
-    entry0 = Entry(mainWindow, textvariable=customerID, width=30, bg="yellow").place(x=320, y=60)
-    entry1 = Entry(mainWindow, textvariable=customerName, width=30, bg="white").place(x=320, y=85)
-    entry2 = Entry(mainWindow, textvariable=customerAddress, width=30, bg="white").place(x=320, y=110)
-    entry3 = Entry(mainWindow, textvariable=customerPhone, width=30, bg="white").place(x=320, y=135)
-    entry4 = Entry(mainWindow, textvariable=customerEmail, width=30, bg="white").place(x=320, y=160)
+    Label(screen, bg="Light blue", text=": Format 9999").place(x=570, y=60)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=85)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=110)
+    Label(screen, bg="Light blue", text=": 11 Digits").place(x=570, y=135)
+    Label(screen, bg="Light blue", text=": Max 14 Characters").place(x=570, y=160)
+
+    entry0 = Entry(screen, textvariable=customerID, width=30, bg="yellow").place(x=320, y=60)
+    entry1 = Entry(screen, textvariable=customerName, width=30, bg="white").place(x=320, y=85)
+    entry2 = Entry(screen, textvariable=customerAddress, width=30, bg="white").place(x=320, y=110)
+    entry3 = Entry(screen, textvariable=customerPhone, width=30, bg="white").place(x=320, y=135)
+    entry4 = Entry(screen, textvariable=customerEmail, width=30, bg="white").place(x=320, y=160)
+
+    saveCustomerButton = Button(screen)
+    saveCustomerButton.place(x=320, y=320, width=200, height=30)
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=320, y=360)
+
+    return {"heading": addCustomerHeadingLabel, "button": saveCustomerButton, "message": messageLabel}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
 def selectCustomerToDelete():
-    clearMainWindow()
-
+    deleteScreen = showScreen("customerDelete", buildCustomerDelete)
     mainWindow.title("TOBY'S TRUCKS - DELETE A SUPPLIER")
 
-    customerIDFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    deleteScreen["entry"].delete(0, END)
+    deleteScreen["messageFrame"].place_forget()
+
+def buildCustomerDelete(screen):
+    customerIDFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
     customerIDFrame.place(x=50, y=10, width=280, height=280)
 
-    customerIDHeadingLabel = Label(mainWindow, text="Select Customer ID", font=('Arial', 16), bg="Light blue")
+    customerIDHeadingLabel = Label(screen, text="Select Customer ID", font=('Arial', 16), bg="Light blue")
     customerIDHeadingLabel.place(x=70, y=12, width=200, height=40)
 
-    enterCustomerIDLabel = Label(mainWindow, text="Enter Customer ID:")
+    enterCustomerIDLabel = Label(screen, text="Enter Customer ID:")
     enterCustomerIDLabel.place(x=70, y=60)
 
-    selectedCustomerIDEntry = Entry(mainWindow, textvariable=customerID, width=20, bg="yellow")
+    selectedCustomerIDEntry = Entry(screen, textvariable=customerID, width=20, bg="yellow")
     selectedCustomerIDEntry.place(x=180, y=60)
-    selectedCustomerIDEntry.delete(0, END)
 
-    deleteCustomerButton = Button(mainWindow, text="Delete Customer", width=32, command=deleteCustomer)
+    deleteCustomerButton = Button(screen, text="Delete Customer", width=32, command=deleteCustomer)
     deleteCustomerButton.place(x=70, y=100)
 
+    return {"entry": selectedCustomerIDEntry, "messageFrame": deletedMessage(screen, "Customer Deleted")}
+
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
+@writesDatabase
 def deleteCustomer():
-    tobysTrucksDatabase.execute("DELETE FROM customerTable WHERE customerID = ?", (customerID.get(),))
+    queries.execute(tobysTrucksDatabase, "deleteCustomer", (customerID.get(),))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("customerTable")
     
     logUserAction("DELETE", "customerTable", customerID.get(), f"Deleted customer: {customerID.get()}")
 
-    messageFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
-    messageFrame.place(x=90, y=160, width=200, height=100)
-
-    messageLabel = Label(mainWindow, font="12", bg="Light blue", text="Customer Deleted", justify=LEFT)
-    messageLabel.place(x=92, y=162)
+    screens.widgets["customerDelete"]["messageFrame"].place(x=90, y=160, width=200, height=100)
 
 #==========================================================================================================
 ############ ORDER TABLE ############
 
 def listOrders():
-    clearMainWindow()
-
+    showScreen("orderList", buildOrderList)
     mainWindow.title("TOBY'S TRUCKS - ORDERS LIST")
 
-    listOrders = Listbox(mainWindow, width=80, height=20, font=("Consolas",14), selectmode="single")
-    listOrders.place( x=30, y=15)
-    listOrders.config( bg="Light blue", highlightbackground="blue", highlightthickness=2)
+def buildOrderList(screen):
+    headingLabel = Label(screen, text="TOBY'S TRUCKS - ORDER LIST      Click on a Order in the list to edit that Order.", font=('Arial', 12))
+    headingLabel.place(x=30, y=10)
 
-    listOrders.bind("<<ListboxSelect>>", editOrder)
+    orderGrid = PagedGrid(screen, tobysTrucksDatabase, "orderTable", [
+        ("orderID", "Order ID", 150),
+        ("orderCustomerID", "Customer ID", 150),
+        ("orderDate", "Order Date", 150),
+        ("paid", "Paid", 80),
+    ], keyColumns=["orderID"], onSelect=editOrder, formatters={"orderDate": toDisplayDate})
+    orderGrid.place(x=30, y=40, width=810, height=440)
 
-    listOrders.insert(END, " ")
-    listOrders.insert(END, "              TOBY'S TRUCKS - ORDER LIST")
-    listOrders.insert(END, "              ==========================")
-    listOrders.insert(END, " ")
-    listOrders.insert(END, "  Click on a Order in the list to edit that Order.")
-    listOrders.insert(END, " ")
-    listOrders.insert(END, " Order ID Customer ID Order Date Paid")
-    listOrders.insert(END, " -------- ----------- ---------- ----")
-
-    for row in tobysTrucksDatabase.execute("SELECT * FROM orderTable"):
-        listOrders.insert(END, " %-8s %-11s %-12s %-6s" %(row))
+    return {"grid": orderGrid, "refresh": orderGrid.refresh}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
-def editOrder(event):
-
-    listIndex = event.widget.curselection()[0]
-    selectedOrderID.set( event.widget.get(listIndex)[1:5])
+def editOrder(recordOrderID):
+    selectedOrderID.set(recordOrderID)
 
-    queryResults = tobysTrucksDatabase.execute("SELECT * FROM orderTable WHERE orderID = ?", (selectedOrderID.get(),))
-    orderRecord = queryResults.fetchone()
+    orderRecord = loadRecord("orderTable", selectedOrderID.get())
+    if orderRecord is None:
+        return
 
     orderID.set(orderRecord[0])
     orderCustomerID.set(orderRecord[1])
-    orderDate.set(orderRecord[2])
+    orderDate.set(toDisplayDate(orderRecord[2]))
     paid.set(orderRecord[3])
 
-    setUpOrderForm("Edit Order")
-
-    saveOrderButton = Button(mainWindow, text="Update Order Details", command=updateOrderDetails)
-    saveOrderButton.place(x=320, y=320, width=200, height=30)
+    setUpOrderForm("Edit Order", "Update Order Details", updateOrderDetails)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def updateOrderDetails():
-    tobysTrucksDatabase.execute(f"""
-        UPDATE orderTable
-        SET 
-            orderID = '{orderID.get()}',
-            orderCustomerID = '{orderCustomerID.get()}',
-            orderDate = '{orderDate.get()}',
-            paid = '{paid.get()}'
-        WHERE 
-            orderID = '{selectedOrderID.get()}'
-    """)
+    if not referencesExist(("customerTable", orderCustomerID.get(), "Customer ID")):
+        return
+
+    try:
+        isoOrderDate = toIsoDate(orderDate.get())
+    except ValueError as e:
+        messagebox.showerror("Invalid Date", str(e))
+        return
+
+    queries.execute(tobysTrucksDatabase, "updateOrder",
+                    (orderID.get(), orderCustomerID.get(), isoOrderDate, paid.get(), selectedOrderID.get()))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("orderTable")
     
     logUserAction("UPDATE", "orderTable", selectedOrderID.get(), f"Updated order: {selectedOrderID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Order Updated")
-    messageLabel.place(x=345, y=360)
+    screens.widgets["orderForm"]["message"].config(text="Order Updated")
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -1027,160 +1522,319 @@ def addOrder():
     orderDate.set("")
     paid.set("")
 
-    setUpOrderForm("Add Order")
-
-    saveOrderButton = Button(mainWindow, text="Save Order Details", command=saveNewOrder)
-    saveOrderButton.place(x=320, y=320, width=200, height=30)
+    setUpOrderForm("Add Order", "Save Order Details", saveNewOrder)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def saveNewOrder():
-    newOrderRecord = [orderID.get(), orderCustomerID.get(), orderDate.get(), paid.get()]
+    if not referencesExist(("customerTable", orderCustomerID.get(), "Customer ID")):
+        return
 
-    tobysTrucksDatabase.execute("INSERT INTO orderTable VALUES(?,?,?,?)",newOrderRecord)
+    try:
+        isoOrderDate = toIsoDate(orderDate.get())
+    except ValueError as e:
+        messagebox.showerror("Invalid Date", str(e))
+        return
+
+    newOrderRecord = [orderID.get(), orderCustomerID.get(), isoOrderDate, paid.get()]
+
+    queries.execute(tobysTrucksDatabase, "insertOrder", newOrderRecord)
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("orderTable")
     
     logUserAction("INSERT", "orderTable", orderID.get(), f"Added new order: {orderID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="New Order Saved")
-    messageLabel.place(x=320, y=360)
+    screens.widgets["orderForm"]["message"].config(text="New Order Saved")
 
 #----------------------------------------------------------------------------------------------------------
 
-def setUpOrderForm(heading):
-    clearMainWindow()
+def setUpOrderForm(heading, buttonText, command):
+    orderForm = showScreen("orderForm", buildOrderForm)
+    orderForm["heading"].config(text=heading)
+    orderForm["button"].config(text=buttonText, command=command)
+    orderForm["message"].config(text="")
 
-    editOrderFrame = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+def buildOrderForm(screen):
+    editOrderFrame = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     editOrderFrame.place(x=200, y=10, width=580, height=400)
 
-    addOrderHeadingLabel = Label(mainWindow, text=heading, font=('Arial', 16), bg="Light blue")
+    addOrderHeadingLabel = Label(screen, font=('Arial', 16), bg="Light blue")
     addOrderHeadingLabel.place(x=320, y=12, width=200, height=30)
 
-    Label(mainWindow, bg="Light blue", text="Order ID:").place(x=220, y=60)
-    Label(mainWindow, bg="Light blue", text="CustomerID:").place(x=220, y=85)
-    Label(mainWindow, bg="Light blue", text="OrderDate:").place(x=220, y=110)
-    Label(mainWindow, bg="Light blue", text="Paid").place(x=220, y=135)
+    Label(screen, bg="Light blue", text="Order ID:").place(x=220, y=60)
+    Label(screen, bg="Light blue", text="CustomerID:").place(x=220, y=85)
+    Label(screen, bg="Light blue", text="OrderDate:").place(x=220, y=110)
+    Label(screen, bg="Light blue", text="Paid").place(x=220, y=135)
 
     # Place the Data Format Labels - Information for the user   (Validation - None Added Yet)
-    Label(mainWindow, bg="Light blue", text=": Format X999").place(x=570, y=60)
-    Label(mainWindow, bg="Light blue", text=": From Customer Table").place(x=570, y=85)
-    Label(mainWindow, bg="Light blue", text=": Valid Date dd/mm/yyyy").place(x=570, y=110)
-    Label(mainWindow, bg="Light blue", text=": Y or N").place(x=570, y=135)
+    Label(screen, bg="Light blue", text=": Format X999").place(x=570, y=60)
+    Label(screen, bg="Light blue", text=": From Customer Table").place(x=570, y=85)
+    Label(screen, bg="Light blue", text=": Valid Date dd/mm/yyyy").place(x=570, y=110)
+    Label(screen, bg="Light blue", text=": Y or N").place(x=570, y=135)
+
+    entry0 = Entry(screen, textvariable=orderID, width=30, bg="yellow").place(x=320, y=60)
+    entry1 = Entry(screen, textvariable=orderCustomerID, width=30, bg="white").place(x=320, y=85)
+    entry2 = Entry(screen, textvariable=orderDate, width=30, bg="white").place(x=320, y=110)
+    entry4 = Entry(screen, textvariable=paid, width=30, bg="white").place(x=320, y=135)
+
+    saveOrderButton = Button(screen)
+    saveOrderButton.place(x=320, y=320, width=200, height=30)
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=320, y=360)
+
+    return {"heading": addOrderHeadingLabel, "button": saveOrderButton, "message": messageLabel}
+
+#----------------------------------------------------------------------------------------------------------
+
+@requireLogin
+def enterOrder():
+    """One screen for the order and all of its items, saved together in a single transaction."""
+    logUserAction("ACCESS", "orderTable", "", "Accessed Order Entry")
+    orderEntry = showScreen("orderEntry", buildOrderEntry)
+    mainWindow.title("TOBY'S TRUCKS - ORDER ENTRY")
+
+    orderID.set("")
+    orderCustomerID.set("")
+    orderDate.set(date.today().strftime('%d/%m/%Y'))
+    paid.set("N")
+    orderLineTruckID.set("")
+    orderLineQuantity.set("1")
+    orderEntry["clearLines"]()
+    orderEntry["message"].config(text="")
+
+def buildOrderEntry(screen):
+    orderEntryFrame = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
+    orderEntryFrame.place(x=20, y=10, width=830, height=470)
+
+    Label(screen, font=('Arial', 16), bg="Light blue", text="Order Entry").place(x=30, y=15)
+
+    Label(screen, bg="Light blue", text="Order ID:").place(x=40, y=55)
+    Label(screen, bg="Light blue", text="Customer ID:").place(x=40, y=80)
+    Label(screen, bg="Light blue", text="Order Date:").place(x=40, y=105)
+    Label(screen, bg="Light blue", text="Paid (Y/N):").place(x=40, y=130)
+
+    Entry(screen, textvariable=orderID, width=20, bg="yellow").place(x=130, y=55)
+    comboBoxCustomerIDs = ttk.Combobox(screen, textvariable=orderCustomerID, width=17)
+    comboBoxCustomerIDs.place(x=130, y=80)
+    Entry(screen, textvariable=orderDate, width=20, bg="white").place(x=130, y=105)
+    Entry(screen, textvariable=paid, width=20, bg="white").place(x=130, y=130)
+
+    Label(screen, bg="Light blue", text="Truck ID:").place(x=340, y=55)
+    comboBoxTruckIDs = ttk.Combobox(screen, textvariable=orderLineTruckID, width=17)
+    comboBoxTruckIDs.place(x=410, y=55)
+    Label(screen, bg="Light blue", text="Quantity:").place(x=340, y=80)
+    quantityEntry = Entry(screen, textvariable=orderLineQuantity, width=8, bg="white")
+    quantityEntry.place(x=410, y=80)
+
+    lineColumns = [("truckID", "Truck ID", 100), ("truck", "Truck", 300), ("quantity", "Quantity", 90)]
+    lineTree = ttk.Treeview(screen, columns=[name for name, _, _ in lineColumns], show="headings", selectmode="browse")
+    for columnName, heading, width in lineColumns:
+        lineTree.heading(columnName, text=heading)
+        lineTree.column(columnName, width=width, anchor="w", stretch=False)
+    lineTree.place(x=40, y=165, width=620, height=250)
+
+    lineCountLabel = Label(screen, bg="Light blue", text="")
+    lineCountLabel.place(x=40, y=420)
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=40, y=445)
+
+    # truckID: quantity, in the order the lines were added; one line per truck, as in orderItemsTable.
+    orderLines = {}
+
+    def showLines():
+        lineTree.delete(*lineTree.get_children())
+        truckLabels = dict(referenceCache.labels("truckTable"))
+        for lineTruckID, lineQuantity in orderLines.items():
+            lineTree.insert("", "end", iid=lineTruckID, values=(lineTruckID, truckLabels.get(lineTruckID, ""), lineQuantity))
+        lineCountLabel.config(text=f"{len(orderLines)} lines, {sum(orderLines.values())} trucks")
+
+    def addLine(event=None):
+        lineTruckID = orderLineTruckID.get().strip()
+        if not lineTruckID:
+            messagebox.showerror("No Truck", "Enter or choose a truck ID for the line.")
+            return
+        if not referencesExist(("truckTable", lineTruckID, "Truck ID")):
+            return
+        try:
+            lineQuantity = int(orderLineQuantity.get())
+        except ValueError:
+            lineQuantity = 0
+        if lineQuantity <= 0:
+            messagebox.showerror("Invalid Quantity", "The quantity must be a whole number more than 0.")
+            return
+
+        orderLines[lineTruckID] = orderLines.get(lineTruckID, 0) + lineQuantity
+        showLines()
+        orderLineTruckID.set("")
+        orderLineQuantity.set("1")
+        messageLabel.config(text="")
+        comboBoxTruckIDs.focus()
+
+    def removeLine():
+        for lineTruckID in lineTree.selection():
+            orderLines.pop(lineTruckID, None)
+        showLines()
+
+    def clearLines():
+        orderLines.clear()
+        showLines()
+
+    @writesDatabase
+    def saveOrder():
+        newOrderID = orderID.get().strip()
+        if not newOrderID:
+            messagebox.showerror("No Order ID", "Enter an ID for the order.")
+            return
+        if referenceCache.exists("orderTable", newOrderID):
+            messagebox.showerror("Order Exists", f"Order ID '{newOrderID}' is already used.")
+            return
+        if not orderLines:
+            messagebox.showerror("No Items", "Add at least one truck to the order.")
+            return
+        # Trucks are checked again in case one was deleted while the order was being entered.
+        if not referencesExist(("customerTable", orderCustomerID.get(), "Customer ID"),
+                               *[("truckTable", lineTruckID, "Truck ID") for lineTruckID in orderLines]):
+            return
+        try:
+            isoOrderDate = toIsoDate(orderDate.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Date", str(e))
+            return
+
+        # The order and every line are one transaction: one commit, and nothing is saved if any insert fails.
+        try:
+            queries.execute(tobysTrucksDatabase, "insertOrder", (newOrderID, orderCustomerID.get(), isoOrderDate, paid.get()))
+            queries.executemany(tobysTrucksDatabase, "insertOrderItem",
+                                [(newOrderID, lineTruckID, lineQuantity) for lineTruckID, lineQuantity in orderLines.items()])
+            tobysTrucksDatabase.commit()
+        except sqlite3.Error as e:
+            tobysTrucksDatabase.rollback()
+            messagebox.showerror("Order Not Saved", f"The order could not be saved: {e}")
+            return
+        referenceCache.invalidate("orderTable")
+        referenceCache.invalidate("truckTable")    # stock levels were moved by the ledger triggers
+        updateReorderBadge()
+
+        logUserAction("INSERT", "orderTable", newOrderID,
+                      f"Added new order: {newOrderID} with {len(orderLines)} items ({sum(orderLines.values())} trucks)")
+
+        messageLabel.config(text=f"Order {newOrderID} Saved with {len(orderLines)} Items")
+        orderID.set("")
+        clearLines()
+
+    Button(screen, text="Add Line", width=14, command=addLine).place(x=520, y=77)
+    Button(screen, text="Remove Line", width=14, command=removeLine).place(x=680, y=165)
+    Button(screen, text="Save Order", width=14, bg="light green", command=saveOrder).place(x=680, y=385)
+    quantityEntry.bind("<Return>", addLine)
 
-    entry0 = Entry(mainWindow, textvariable=orderID, width=30, bg="yellow").place(x=320, y=60)
-    entry1 = Entry(mainWindow, textvariable=orderCustomerID, width=30, bg="white").place(x=320, y=85)
-    entry2 = Entry(mainWindow, textvariable=orderDate, width=30, bg="white").place(x=320, y=110)
-    entry4 = Entry(mainWindow, textvariable=paid, width=30, bg="white").place(x=320, y=135)
+    def refreshOrderEntry():
+        comboBoxCustomerIDs.config(values=referenceCache.ids("customerTable"))
+        comboBoxTruckIDs.config(values=referenceCache.ids("truckTable"))
+
+    refreshOrderEntry()
+    return {"clearLines": clearLines, "message": messageLabel, "refresh": refreshOrderEntry}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
 def selectOrderToDelete():
-    clearMainWindow()
-    
+    deleteScreen = showScreen("orderDelete", buildOrderDelete)
     mainWindow.title("TOBY'S TRUCKS - DELETE AN ORDER")
 
-    enterOrderIDFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    deleteScreen["entry"].delete(0, END)
+    deleteScreen["messageFrame"].place_forget()
+
+def buildOrderDelete(screen):
+    enterOrderIDFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
     enterOrderIDFrame.place(x=50, y=10, width=280, height=280)
 
-    enterOrderIDHeadingLabel = Label(mainWindow, text="Select Order ID", font=('Arial', 16), bg="Light blue")
+    enterOrderIDHeadingLabel = Label(screen, text="Select Order ID", font=('Arial', 16), bg="Light blue")
     enterOrderIDHeadingLabel.place(x=70, y=12, width=200, height=40)
 
-    enterOrderIDLabel = Label(mainWindow, text="Enter Order ID:")
+    enterOrderIDLabel = Label(screen, text="Enter Order ID:")
     enterOrderIDLabel.place(x=70, y=60)
 
-    selectedOrderIDEntry = Entry(mainWindow, textvariable=orderID, width=20, bg="yellow")
+    selectedOrderIDEntry = Entry(screen, textvariable=orderID, width=20, bg="yellow")
     selectedOrderIDEntry.place(x=170, y=60)
-    selectedOrderIDEntry.delete(0, END)
 
-    deleteOrderButton = Button(mainWindow, text="Delete Order", width=32, command=deleteOrder)
+    deleteOrderButton = Button(screen, text="Delete Order", width=32, command=deleteOrder)
     deleteOrderButton.place(x=70, y=100)
 
+    return {"entry": selectedOrderIDEntry, "messageFrame": deletedMessage(screen, "Order Deleted")}
+
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
+@writesDatabase
 def deleteOrder():
-    tobysTrucksDatabase.execute(f"DELETE FROM orderTable WHERE orderID = '{orderID.get()}'")
+    queries.execute(tobysTrucksDatabase, "deleteOrder", (orderID.get(),))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("orderTable")
     
     logUserAction("DELETE", "orderTable", orderID.get(), f"Deleted order: {orderID.get()}")
 
-    messageFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
-    messageFrame.place(x=90, y=160, width=200, height=100)
-
-    messageLabel = Label(mainWindow, font="12", bg="Light blue", text="Order Deleted", justify=LEFT)
-    messageLabel.place(x=92, y=162)
+    screens.widgets["orderDelete"]["messageFrame"].place(x=90, y=160, width=200, height=100)
 
 
 #==========================================================================================================
 ############ ORDER ITEMS TABLE ############
 
 def listOrderItems():
-    clearMainWindow()
+    showScreen("orderItemList", buildOrderItemList)
     mainWindow.title("TOBY'S TRUCKS - ORDER ITEMS LIST")
 
-    orderItemsList = Listbox(mainWindow, width=80, height=20, font=("Consolas", 14), selectmode="single")
-    orderItemsList.place(x=30, y=15)
-    orderItemsList.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
-
-    orderItemsList.bind("<<ListboxSelect>>", editOrderItem)
+def buildOrderItemList(screen):
+    headingLabel = Label(screen, text="TOBY'S TRUCKS - ORDER ITEMS LIST      Click on an Order Item in the list to edit that Order Item.", font=('Arial', 12))
+    headingLabel.place(x=30, y=10)
 
-    orderItemsList.insert(END, " ")
-    orderItemsList.insert(END, "              TOBY'S TRUCKS - ORDER ITEMS LIST")
-    orderItemsList.insert(END, "              ================================")
-    orderItemsList.insert(END, " ")
-    orderItemsList.insert(END, "  Click on an Order Item in the list to edit that Order Item.")
-    orderItemsList.insert(END, " ")
-    orderItemsList.insert(END, " Order ID Truck ID Quantity")
-    orderItemsList.insert(END, " -------- ------- --------")
+    orderItemsGrid = PagedGrid(screen, tobysTrucksDatabase, "orderItemsTable", [
+        ("orderItemsOrderID", "Order ID", 200),
+        ("orderItemsTruckID", "Truck ID", 200),
+        ("quantity", "Quantity", 120),
+    ], keyColumns=["orderItemsOrderID", "orderItemsTruckID"], onSelect=editOrderItem)
+    orderItemsGrid.place(x=30, y=40, width=810, height=440)
 
-    for row in tobysTrucksDatabase.execute("SELECT * FROM orderItemsTable ORDER BY orderItemsOrderID, orderItemsTruckID"):
-        orderItemsList.insert(END, " %-9s %-10s %-5d" %(row))
+    return {"grid": orderItemsGrid, "refresh": orderItemsGrid.refresh}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
-def editOrderItem(event):
-    listIndex = event.widget.curselection()[0]
+def editOrderItem(recordOrderID, recordTruckID):
+    selectedOrderID.set(recordOrderID)
+    selectedTruckID.set(recordTruckID)
 
-    selectedOrderID.set( event.widget.get(listIndex)[1:5])
-    selectedTruckID.set( event.widget.get(listIndex)[11:15])
-
-    queryResults = tobysTrucksDatabase.execute(f"""
-        SELECT * FROM orderItemsTable
-        WHERE orderItemsOrderID = '{selectedOrderID.get()}'
-        AND orderItemsTruckID = '{selectedTruckID.get()}'
-    """)
+    queryResults = queries.execute(tobysTrucksDatabase, "selectOrderItem", (selectedOrderID.get(), selectedTruckID.get()))
     orderItemRecord = queryResults.fetchone()
+    if orderItemRecord is None:
+        messagebox.showerror("Record Not Found", f"'{recordOrderID}-{recordTruckID}' has been deleted.")
+        return
 
     orderItemsOrderID.set(orderItemRecord[0])
     orderItemsTruckID.set(orderItemRecord[1])
     quantity.set(orderItemRecord[2])
 
-    setUpOrderItemsForm("Edit Order Items")
-
-    saveOrderItemsButton = Button(mainWindow, text="Update Order Item Details", command=updateOrderItemDetails)
-    saveOrderItemsButton.place(x=320, y=320, width=200, height=30)
+    setUpOrderItemsForm("Edit Order Items", "Update Order Item Details", updateOrderItemDetails)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def updateOrderItemDetails():
-    tobysTrucksDatabase.execute(f"""
-        UPDATE orderItemsTable
-        SET
-            orderItemsOrderID = '{orderItemsOrderID.get()}',
-            orderItemsTruckID = '{orderItemsTruckID.get()}',
-            quantity = '{quantity.get()}'
-        WHERE
-            orderItemsOrderID = '{selectedOrderID.get()}'
-        AND orderItemsTruckID = '{selectedTruckID.get()}'
-    """)
+    if not referencesExist(("orderTable", orderItemsOrderID.get(), "Order ID"), ("truckTable", orderItemsTruckID.get(), "Truck ID")):
+        return
+
+    queries.execute(tobysTrucksDatabase, "updateOrderItem", (
+        orderItemsOrderID.get(), orderItemsTruckID.get(), quantity.get(), selectedOrderID.get(), selectedTruckID.get()
+    ))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")    # stock levels were moved by the ledger triggers
+    updateReorderBadge()
     
     logUserAction("UPDATE", "orderItemsTable", f"{selectedOrderID.get()}-{selectedTruckID.get()}", f"Updated order item: Order {selectedOrderID.get()}, Truck {selectedTruckID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="Order Items Updated")
-    messageLabel.place(x=335, y=360)
+    screens.widgets["orderItemsForm"]["message"].config(text="Order Items Updated")
 
 #----------------------------------------------------------------------------------------------------------
 
@@ -1191,327 +1845,558 @@ def addOrderItem():
     orderItemsTruckID.set("")
     quantity.set("")
 
-    setUpOrderItemsForm("Add Order Item")
-
-    saveOrderItemButton = Button(mainWindow, text="Save Order Item Details", command=saveNewOrderItem)
-    saveOrderItemButton.place(x=320, y=320, width=200, height=30)
+    setUpOrderItemsForm("Add Order Item", "Save Order Item Details", saveNewOrderItem)
 
 #----------------------------------------------------------------------------------------------------------
 
+@writesDatabase
 def saveNewOrderItem():
+    if not referencesExist(("orderTable", orderItemsOrderID.get(), "Order ID"), ("truckTable", orderItemsTruckID.get(), "Truck ID")):
+        return
+
     newOrderItemsRecord = [orderItemsOrderID.get(), orderItemsTruckID.get(), quantity.get()]
 
-    tobysTrucksDatabase.execute("INSERT INTO orderItemsTable VALUES(?,?,?)", newOrderItemsRecord)
+    queries.execute(tobysTrucksDatabase, "insertOrderItem", newOrderItemsRecord)
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")    # stock levels were moved by the ledger triggers
+    updateReorderBadge()
     
     logUserAction("INSERT", "orderItemsTable", f"{orderItemsOrderID.get()}-{orderItemsTruckID.get()}", f"Added order item: Order {orderItemsOrderID.get()}, Truck {orderItemsTruckID.get()}")
 
-    messageLabel = Label(mainWindow, font="11", bg="Light blue", text="New Order Item Saved")
-    messageLabel.place(x=320, y=360)
+    screens.widgets["orderItemsForm"]["message"].config(text="New Order Item Saved")
 
 #----------------------------------------------------------------------------------------------------------
 
-def setUpOrderItemsForm(heading):
-    clearMainWindow()
+def setUpOrderItemsForm(heading, buttonText, command):
+    orderItemsForm = showScreen("orderItemsForm", buildOrderItemsForm)
+    orderItemsForm["heading"].config(text=heading)
+    orderItemsForm["button"].config(text=buttonText, command=command)
+    orderItemsForm["message"].config(text="")
 
-    frameEditOrderItem = Frame(mainWindow, bg="Light blue", highlightbackground="red", highlightthickness=2)
+def buildOrderItemsForm(screen):
+    frameEditOrderItem = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
     frameEditOrderItem.place(x=200, y=10, width=580, height=400)
 
-    labelHeadingAddOrderItem = Label(mainWindow, text=heading, font=('Arial', 16), bg="Light blue")
+    labelHeadingAddOrderItem = Label(screen, font=('Arial', 16), bg="Light blue")
     labelHeadingAddOrderItem.place(x=320, y=12, width=200, height=30)
 
     # Place the Labels
-    Label(mainWindow, bg="Light blue", text="Order ID:").place(x=220, y=60)
-    Label(mainWindow, bg="Light blue", text="Truck ID:").place(x=220, y=85)
-    Label(mainWindow, bg="Light blue", text="Quantity:").place(x=220, y=110)
+    Label(screen, bg="Light blue", text="Order ID:").place(x=220, y=60)
+    Label(screen, bg="Light blue", text="Truck ID:").place(x=220, y=85)
+    Label(screen, bg="Light blue", text="Quantity:").place(x=220, y=110)
 
     # Place the Data Format Labels - Information for the user    (Validation - None Added Yet)
-    Label(mainWindow, bg="Light blue", text=": From Order Table").place(x=570, y=60)
-    Label(mainWindow, bg="Light blue", text=": From Truck Table").place(x=570, y=85)
-    Label(mainWindow, bg="Light blue", text=": 1 - 100").place(x=570, y=110)
+    Label(screen, bg="Light blue", text=": From Order Table").place(x=570, y=60)
+    Label(screen, bg="Light blue", text=": From Truck Table").place(x=570, y=85)
+    Label(screen, bg="Light blue", text=": 1 - 100").place(x=570, y=110)
+
+    entry0 = Entry(screen, textvariable=orderItemsOrderID, width=30, bg="yellow").place(x=320, y=60)
+    entry1 = Entry(screen, textvariable=orderItemsTruckID, width=30, bg="yellow").place(x=320, y=85)
+    entry2 = Entry(screen, textvariable=quantity, width=30, bg="white").place(x=320, y=110)
 
-    entry0 = Entry(mainWindow, textvariable=orderItemsOrderID, width=30, bg="yellow").place(x=320, y=60)
-    entry1 = Entry(mainWindow, textvariable=orderItemsTruckID, width=30, bg="yellow").place(x=320, y=85)
-    entry2 = Entry(mainWindow, textvariable=quantity, width=30, bg="white").place(x=320, y=110)
+    saveOrderItemButton = Button(screen)
+    saveOrderItemButton.place(x=320, y=320, width=200, height=30)
+
+    messageLabel = Label(screen, font="11", bg="Light blue", text="")
+    messageLabel.place(x=320, y=360)
+
+    return {"heading": labelHeadingAddOrderItem, "button": saveOrderItemButton, "message": messageLabel}
 
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
 def selectOrderItemToDelete():
-    clearMainWindow()
+    deleteScreen = showScreen("orderItemDelete", buildOrderItemDelete)
     mainWindow.title("TOBY'S TRUCKS - DELETE A ORDER ITEM")
 
-    enterOrderItemFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    orderItemsOrderID.set("")
+    orderItemsTruckID.set("")
+    deleteScreen["messageFrame"].place_forget()
+
+def buildOrderItemDelete(screen):
+    enterOrderItemFrame = Frame(screen, bg="Light blue", highlightbackground="blue", highlightthickness=2)
     enterOrderItemFrame.place(x=50, y=10, width=380, height=280)
 
-    headingLabel = Label(mainWindow, text="Select Order Item to Delete", font=('Arial', 16), bg="Light blue")
+    headingLabel = Label(screen, text="Select Order Item to Delete", font=('Arial', 16), bg="Light blue")
     headingLabel.place( x=70, y=12, width=300, height=40)
 
-    enterOrderItemOrderIDLabel = Label(mainWindow, text="Enter Order Item Order ID:")
+    enterOrderItemOrderIDLabel = Label(screen, text="Enter Order Item Order ID:")
     enterOrderItemOrderIDLabel.place( x=70, y=60)
-    enterOrderItemTruckIDLabel = Label(mainWindow, text="Enter Order Item Truck ID:")
+    enterOrderItemTruckIDLabel = Label(screen, text="Enter Order Item Truck ID:")
     enterOrderItemTruckIDLabel.place( x=70, y=85)
 
-    orderItemsOrderID.set("")
-    orderItemsTruckID.set("")
-
-    entrySelectedOrderItemOrderID = Entry(mainWindow, textvariable=orderItemsOrderID, width=20, bg="yellow")
+    entrySelectedOrderItemOrderID = Entry(screen, textvariable=orderItemsOrderID, width=20, bg="yellow")
     entrySelectedOrderItemOrderID.place(x=280, y=60)
-    entrySelectedOrderItemTruckID = Entry(mainWindow, textvariable=orderItemsTruckID, width=20, bg="yellow")
+    entrySelectedOrderItemTruckID = Entry(screen, textvariable=orderItemsTruckID, width=20, bg="yellow")
     entrySelectedOrderItemTruckID.place(x=280, y=85)
 
 
-    buttonDeleteOrderItem = Button(mainWindow, text="Delete Order Item", width=32, command=deleteOrderItem)
+    buttonDeleteOrderItem = Button(screen, text="Delete Order Item", width=32, command=deleteOrderItem)
     buttonDeleteOrderItem.place(x=100, y=130)
 
+    return {"messageFrame": deletedMessage(screen, "Order Item Deleted")}
+
 #----------------------------------------------------------------------------------------------------------
 
 @requireLogin
+@writesDatabase
 def deleteOrderItem():
-    tobysTrucksDatabase.execute(f"DELETE FROM orderItemsTable WHERE orderItemsOrderID = '{orderItemsOrderID.get()}' AND orderItemsTruckID = '{orderItemsTruckID.get()}'")
+    queries.execute(tobysTrucksDatabase, "deleteOrderItem", (orderItemsOrderID.get(), orderItemsTruckID.get()))
     tobysTrucksDatabase.commit()
+    referenceCache.invalidate("truckTable")    # stock levels were moved by the ledger triggers
+    updateReorderBadge()
     
     logUserAction("DELETE", "orderItemsTable", f"{orderItemsOrderID.get()}-{orderItemsTruckID.get()}", f"Deleted order item: Order {orderItemsOrderID.get()}, Truck {orderItemsTruckID.get()}")
 
-    messageFrame = Frame(mainWindow, bg="Light blue", highlightbackground="blue", highlightthickness=2)
-    messageFrame.place(x=90, y=160, width=200, height=100)
-
-    messageLabel = Label(mainWindow, font="12", bg="Light blue", text="Order Item Deleted", justify=LEFT)
-    messageLabel.place(x=92, y=162)
+    screens.widgets["orderItemDelete"]["messageFrame"].place(x=90, y=160, width=200, height=100)
     
+#==========================================================================================================
+############ BULK EDIT ############
+
+@requireLogin
+def bulkEditTrucks():
+    showScreen("truckBulkEdit", lambda screen: buildBulkEdit(screen, "truckTable", truckGridColumns,
+                                                              formatters={"buyingPrice": formatPrice, "sellingPrice": formatPrice}))
+    mainWindow.title("TOBY'S TRUCKS - BULK EDIT TRUCKS")
+
+@requireLogin
+def bulkEditSuppliers():
+    showScreen("supplierBulkEdit", lambda screen: buildBulkEdit(screen, "supplierTable", supplierGridColumns))
+    mainWindow.title("TOBY'S TRUCKS - BULK EDIT SUPPLIERS")
+
+@requireLogin
+def bulkEditCustomers():
+    showScreen("customerBulkEdit", lambda screen: buildBulkEdit(screen, "customerTable", customerGridColumns))
+    mainWindow.title("TOBY'S TRUCKS - BULK EDIT CUSTOMERS")
+
+def buildBulkEdit(screen, tableName, columns, formatters=None):
+    """A grid of tableName whose changed cells are all saved together with Save Changes."""
+    from tobystrucks.bulkedit import EDITABLE_TABLES, convertValue
+
+    keyColumn, converters = EDITABLE_TABLES[tableName]
+
+    headingLabel = Label(screen, font=('Arial', 12),
+                         text="Double-click a cell to change it. Return moves down, Tab moves across, Escape cancels.")
+    headingLabel.place(x=30, y=10)
+
+    def validateCell(columnName, text):
+        value = convertValue(tableName, columnName, text)
+        if columnName == "truckSupplierID" and value and not referenceCache.exists("supplierTable", value):
+            raise ValueError(f"Supplier ID '{value}' does not exist.")
+        return value
+
+    def showChangeCount():
+        changedCells = bulkGrid.changedCellCount()
+        changesLabel.config(text=f"{changedCells} changed cells in {len(bulkGrid.dirty)} rows" if changedCells else "No changes")
+        saveButton.config(state="normal" if changedCells else "disabled")
+        discardButton.config(state="normal" if changedCells else "disabled")
+
+    bulkGrid = EditableGrid(screen, tobysTrucksDatabase, tableName, columns, keyColumns=[keyColumn],
+                            editableColumns=[columnName for columnName, _, _ in columns if columnName in converters],
+                            validate=validateCell, onChange=showChangeCount, formatters=formatters)
+    bulkGrid.place(x=30, y=40, width=810, height=410)
+
+    changesLabel = Label(screen, font=('Arial', 10))
+    changesLabel.place(x=30, y=460)
+    saveButton = Button(screen, text="Save Changes", width=14, bg="light green", command=lambda: saveBulkEdit(tableName, bulkGrid))
+    saveButton.place(x=600, y=456)
+    discardButton = Button(screen, text="Discard Changes", width=14, command=bulkGrid.clearChanges)
+    discardButton.place(x=730, y=456)
+
+    def refreshBulkEdit():
+        # Unsaved changes are kept while moving between screens; reload only when there are none.
+        if not bulkGrid.dirty:
+            bulkGrid.refresh()
+        showChangeCount()
+
+    showChangeCount()
+    return {"grid": bulkGrid, "refresh": refreshBulkEdit}
+
+@writesDatabase
+def saveBulkEdit(tableName, bulkGrid):
+    from tobystrucks.bulkedit import saveChanges, describeChanges
+
+    if not bulkGrid.finishEdit():
+        return
+    changes = bulkGrid.changes()
+    if not changes:
+        return
+
+    # Every changed row goes in one transaction with one commit; if any update fails, none are saved.
+    try:
+        rowsUpdated = saveChanges(tobysTrucksDatabase, tableName, changes)
+        tobysTrucksDatabase.commit()
+    except (sqlite3.Error, ValueError) as e:
+        tobysTrucksDatabase.rollback()
+        messagebox.showerror("Changes Not Saved", f"The changes could not be saved: {e}")
+        return
+    referenceCache.invalidate(tableName)
+    if tableName == "truckTable":
+        updateReorderBadge()    # Reorder levels may have changed
+
+    logUserAction("BULK UPDATE", tableName, "", describeChanges(changes))
+
+    bulkGrid.clearChanges()
+    messagebox.showinfo("Changes Saved", f"{rowsUpdated} rows updated.")
+
 #==========================================================================================================
 ############ SYSTEM LOGS ############
 
 def displaySystemLogs():
     """Display system activity logs"""
-    clearMainWindow()
+    auditLog.flush()  # Make sure queued actions are on screen
+
+    showScreen("systemLogs", buildSystemLogs)
     mainWindow.title("TOBY'S TRUCKS - SYSTEM LOGS")
 
-    logsList = Listbox(mainWindow, width=120, height=25, font=("Consolas", 9), selectmode="single")
-    logsList.place(x=30, y=15)
-    logsList.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
-
-    logsList.insert(END, " ")
-    logsList.insert(END, "                               TOBY'S TRUCKS - SYSTEM ACTIVITY LOGS")
-    logsList.insert(END, "                               ===================================")
-    logsList.insert(END, " ")
-    logsList.insert(END, " Log ID  User ID   Username     Action      Table       Record ID   Timestamp           Details")
-    logsList.insert(END, " ------- --------- ------------ ----------- ----------- ----------- ------------------- ---------------------------------")
-
-    queryResults = tobysTrucksDatabase.execute("""
-        SELECT logID, userID, username, action, tableName, recordID, timestamp, details
-        FROM logsTable
-        ORDER BY logID DESC
-    """)
-
-    for row in queryResults:
-        logLine = " %-7s %-9s %-12s %-11s %-11s %-11s %-19s %s" % (
-            str(row[0]), str(row[1] or ""), str(row[2] or ""), 
-            str(row[3] or ""), str(row[4] or ""), str(row[5] or ""), 
-            str(row[6] or ""), str(row[7] or "")
-        )
-        logsList.insert(END, logLine)
+def buildSystemLogs(screen):
+    from tobystrucks.logs import buildLogFilter, distinctLogValues, searchArchivedLogs, LOG_COLUMNS
+
+    Label(screen, text="User ID:").place(x=20, y=10)
+    Label(screen, text="Action:").place(x=190, y=10)
+    Label(screen, text="Table:").place(x=350, y=10)
+    Label(screen, text="Record ID:").place(x=530, y=10)
+    Label(screen, text="From (dd/mm/yyyy):").place(x=20, y=40)
+    Label(screen, text="To (dd/mm/yyyy):").place(x=250, y=40)
+
+    userIDChoice = ttk.Combobox(screen, textvariable=logFilterUserID, width=12)
+    userIDChoice.place(x=75, y=10)
+    actionChoice = ttk.Combobox(screen, textvariable=logFilterAction, width=12)
+    actionChoice.place(x=240, y=10)
+    tableChoice = ttk.Combobox(screen, textvariable=logFilterTable, width=15)
+    tableChoice.place(x=395, y=10)
+    Entry(screen, textvariable=logFilterRecord, width=14, bg="white").place(x=600, y=10)
+    Entry(screen, textvariable=logFilterFrom, width=12, bg="white").place(x=140, y=40)
+    Entry(screen, textvariable=logFilterTo, width=12, bg="white").place(x=355, y=40)
+
+    logsGrid = PagedGrid(screen, tobysTrucksDatabase, "logsTable", [
+        ("logID", "Log ID", 60),
+        ("userID", "User ID", 70),
+        ("username", "Username", 90),
+        ("action", "Action", 80),
+        ("tableName", "Table", 110),
+        ("recordID", "Record ID", 90),
+        ("timestamp", "Timestamp", 150),
+        ("details", "Details", 300),
+    ], keyColumns=["logID"], sortColumn="logID", descending=True, formatters={"timestamp": toDisplayTimestamp})
+    logsGrid.place(x=20, y=70, width=830, height=395)
+
+    archiveResults = ttk.Treeview(screen, columns=LOG_COLUMNS, show="headings", style=logsGrid.tree["style"])
+    for columnName, heading, width in logsGrid.columns:
+        archiveResults.heading(columnName, text=heading)
+        archiveResults.column(columnName, width=width, anchor="w", stretch=False)
+
+    def readLogFilters():
+        try:
+            dateFrom = toIsoDate(logFilterFrom.get()) if logFilterFrom.get().strip() else ""
+            dateTo = toIsoDate(logFilterTo.get()) if logFilterTo.get().strip() else ""
+        except ValueError as e:
+            messagebox.showerror("Invalid Date", str(e))
+            return None
+
+        return (logFilterUserID.get().strip(), logFilterAction.get().strip(), logFilterTable.get().strip(),
+                logFilterRecord.get().strip(), dateFrom, dateTo)
+
+    def applyLogFilters():
+        logFilters = readLogFilters()
+        if logFilters is None:
+            return
+
+        archiveResults.place_forget()
+        logsGrid.place(x=20, y=70, width=830, height=395)
+        where, params = buildLogFilter(*logFilters)
+        logsGrid.setFilter(where, params)
+
+    def clearLogFilters():
+        for filterVariable in (logFilterUserID, logFilterAction, logFilterTable, logFilterRecord, logFilterFrom, logFilterTo):
+            filterVariable.set("")
+        applyLogFilters()
+
+    def searchArchive():
+        logFilters = readLogFilters()
+        if logFilters is None:
+            return
+
+        logsGrid.place_forget()
+        archiveResults.place(x=20, y=70, width=830, height=395)
+        archiveResults.delete(*archiveResults.get_children())
+        searchButton.config(state="disabled", text="Searching…")
+
+        badSegments = []
+        archiveSearch = backgroundWorker.submit(
+            lambda: list(searchArchivedLogs(logArchiveDirectory, *logFilters, badSegments=badSegments)))
+        whenFinished(archiveSearch, lambda archiveSearch: showArchiveResults(archiveSearch, badSegments))
+
+    def showArchiveResults(archiveSearch, badSegments):
+        if not searchButton.winfo_exists():
+            return  # Logged out while the archive was being searched
+        searchButton.config(state="normal", text="Search Archive")
+        try:
+            archivedRecords = archiveSearch.result()
+        except (OSError, EOFError, ValueError) as e:
+            messagebox.showerror("Archive Search", f"Cannot search the log archive: {e}")
+            return
+
+        for record in archivedRecords:
+            values = [record.get(columnName) or "" for columnName in LOG_COLUMNS]
+            values[LOG_COLUMNS.index("timestamp")] = toDisplayTimestamp(record.get("timestamp"))
+            archiveResults.insert("", "end", values=values)
+        if not archivedRecords:
+            archiveResults.insert("", "end", values=["", "", "", "", "", "", "", "No archived logs match these filters"])
+        if badSegments:
+            skipped = "\n".join(f"{segmentName}: {error}" for segmentName, error in badSegments)
+            messagebox.showwarning("Archive Search", f"These archive segments could not be read to the end and were skipped:\n{skipped}")
+
+    Button(screen, text="Apply Filters", width=14, bg="light green", command=applyLogFilters).place(x=480, y=37)
+    Button(screen, text="Clear Filters", width=14, command=clearLogFilters).place(x=610, y=37)
+    searchButton = Button(screen, text="Search Archive", width=14, command=searchArchive)
+    searchButton.place(x=740, y=37)
+
+    statsLabel = Label(screen, font=('Arial', 9))
+    statsLabel.place(x=20, y=470)
+
+    def refreshLogs():
+        # The filter choices, the rows and the queue statistics change between visits.
+        userIDChoice.config(values=[""] + distinctLogValues(tobysTrucksDatabase, "userID"))
+        actionChoice.config(values=[""] + distinctLogValues(tobysTrucksDatabase, "action"))
+        tableChoice.config(values=[""] + distinctLogValues(tobysTrucksDatabase, "tableName"))
+        applyLogFilters()
+
+        auditStats = auditLog.stats()
+        statsLabel.config(text="Audit queue: %d waiting, %d written in %d flushes, last flush %.1f ms, average %.1f ms, max %.1f ms" % (
+            auditStats["queueDepth"], auditStats["recordsWritten"], auditStats["flushes"],
+            auditStats["lastFlushMs"], auditStats["averageFlushMs"], auditStats["maxFlushMs"]
+        ))
+
+    refreshLogs()
+    return {"refresh": refreshLogs}
+
+#----------------------------------------------------------------------------------------------------------
+########  PERFORMANCE  #######
+
+def displayPerformance():
+    showScreen("performance", buildPerformance)
+    mainWindow.title("TOBY'S TRUCKS - PERFORMANCE")
+
+def buildPerformance(screen):
+    from tkinter import filedialog
+
+    headingLabel = Label(screen, font=('Arial', 12),
+                         text=f"Slowest SQL statements - plans are captured for anything over {slowStatementMs} ms")
+    headingLabel.place(x=20, y=10)
+
+    statementColumns = [("maxMs", "Slowest ms", 80), ("totalMs", "Total ms", 80), ("calls", "Calls", 60),
+                        ("rows", "Rows", 70), ("sql", "Statement", 530)]
+    statementTree = ttk.Treeview(screen, columns=[name for name, _, _ in statementColumns], show="headings", selectmode="browse")
+    for columnName, heading, width in statementColumns:
+        statementTree.heading(columnName, text=heading)
+        statementTree.column(columnName, width=width, anchor="w", stretch=False)
+    statementTree.place(x=20, y=40, width=830, height=250)
+
+    detailText = scrolledtext.ScrolledText(screen, width=100, height=9, font=("Consolas", 9), wrap="word")
+    detailText.place(x=20, y=300, width=830, height=150)
+    detailText.config(bg="Light blue", state="disabled")
+
+    catalogueLabel = Label(screen, bg="Light blue")
+    catalogueLabel.place(x=450, y=463)
+
+    shownStatements = {}
+
+    def showStatements():
+        statementTree.delete(*statementTree.get_children())
+        shownStatements.clear()
+        catalogueTotals = queries.stats()["total"]
+        catalogueLabel.config(text=f"Statement catalogue: {catalogueTotals['calls']} calls to "
+                                   f"{catalogueTotals['statements']} named statements")
+        for statement in statementProfiler.slowestStatements():
+            itemID = statementTree.insert("", "end", values=(
+                "%.1f" % statement["maxMs"], "%.1f" % statement["totalMs"], statement["calls"], statement["rows"], statement["sql"]
+            ))
+            shownStatements[itemID] = statement
+
+        detailText.config(state="normal")
+        detailText.delete("1.0", END)
+        detailText.config(state="disabled")
+
+    def showStatementDetail(event):
+        selection = statementTree.selection()
+        if not selection:
+            return
+        statement = shownStatements[selection[0]]
+
+        detailText.config(state="normal")
+        detailText.delete("1.0", END)
+        detailText.insert(END, "Last run as:\n  " + (statement["lastExpandedSql"] or statement["sql"]) + "\n\n")
+        if statement["plan"]:
+            detailText.insert(END, "Query plan:\n  " + statement["plan"].replace("\n", "\n  "))
+        else:
+            detailText.insert(END, f"No query plan captured (only statements slower than {slowStatementMs} ms are explained).")
+        detailText.config(state="disabled")
+
+    def resetStatistics():
+        statementProfiler.reset()
+        queries.catalogue.reset()
+        showStatements()
+
+    def exportStatistics():
+        filePath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if not filePath:
+            return
+        try:
+            statementProfiler.exportStats(filePath)
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"The statistics could not be saved: {e}")
+            return
+        messagebox.showinfo("Export Successful", f"Statement statistics saved to {filePath}.")
+
+    statementTree.bind("<<TreeviewSelect>>", showStatementDetail)
+
+    Button(screen, text="Refresh", width=14, bg="light green", command=showStatements).place(x=20, y=460)
+    Button(screen, text="Reset", width=14, command=resetStatistics).place(x=150, y=460)
+    Button(screen, text="Export Statistics", width=16, command=exportStatistics).place(x=280, y=460)
+
+    showStatements()
+    return {"refresh": showStatements}
 
 #==========================================================================================================
 ############ REPORTS ############
 
 
 def selectSupplierForOrderNotes():
-    clearMainWindow()
+    showScreen("orderNotes", buildOrderNotes)
     mainWindow.title("TOBY'S TRUCKS - ORDER TRUCKS FROM SUPPLIER")
 
-    labelSupplierID = Label(mainWindow, text="Select Supplier ID for Order Notes : ", font=('Arial', 10))
+def buildOrderNotes(screen):
+    labelSupplierID = Label(screen, text="Select Supplier ID for Order Notes : ", font=('Arial', 10))
     labelSupplierID.place(x=120, y=8, width=220, height=40)
-    
-    comboBoxValues = []
-    for row in tobysTrucksDatabase.execute("SELECT supplierID from supplierTable"):
-        comboBoxValues += row
 
-    comboBoxSupplierIDs = ttk.Combobox(state="readonly", textvariable=supplierID, values=comboBoxValues)
+    comboBoxSupplierIDs = ttk.Combobox(screen, state="readonly", textvariable=supplierID)
     comboBoxSupplierIDs.place(x=360, y=17)
 
     comboBoxSupplierIDs.bind("<<ComboboxSelected>>", displayOrderNotes)
+
+    allNotesButton = Button(screen, text="Generate All Reorder Notes", width=24, command=generateAllOrderNotes)
+    allNotesButton.place(x=540, y=15)
+
+    listReport = Listbox(screen, width=71, height=25, font=("Consolas",10), selectmode="single")
+    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    def refreshOrderNotes():
+        comboBoxSupplierIDs.config(values=referenceCache.ids("supplierTable"))
+        listReport.place_forget()
+
+    refreshOrderNotes()
+    return {"report": listReport, "refresh": refreshOrderNotes}
     
 #----------------------------------------------------------------------------------------------------------
 
 def displayOrderNotes(event):
+    from tobystrucks.reports import reorderNotes, formatReorderNote
+
     mainWindow.title("TOBY'S TRUCKS - ORDER NOTES")
 
-    listReport = Listbox(mainWindow, width=71, height=25, font=("Consolas",10), selectmode="single")
+    listReport = screens.widgets["orderNotes"]["report"]
+    listReport.delete(0, END)
+    listReport.place(x=100, y=55)
+
+    selectedSupplier = supplierID.get()
+
+    def showOrderNotes(job, orderNotes):
+        for supplierRow, truckRows in orderNotes:
+            for line in formatReorderNote(supplierRow, truckRows):
+                listReport.insert(END, line)
+
+    runInBackground(function=lambda connection: reorderNotes(connection, selectedSupplier), onDone=showOrderNotes)
+
+#----------------------------------------------------------------------------------------------------------
+
+def generateAllOrderNotes():
+    from tkinter import filedialog
+    from tobystrucks.reports import reorderNotes, formatReorderNote, writeReorderNotes
+
+    outputDirectory = filedialog.askdirectory(title="Choose a folder for the reorder notes")
+    if not outputDirectory:
+        return
+
+    listReport = screens.widgets["orderNotes"]["report"]
+    listReport.delete(0, END)
     listReport.place(x=100, y=55)
-    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
 
-    queryResults = tobysTrucksDatabase.execute(f"""
-        SELECT 
-            supplierID, supplierName, supplierAddress, 
-            supplierPhone, supplierEmail
-        FROM 
-            supplierTable
-        WHERE
-            supplierID = '{supplierID.get()}'
-        ORDER BY supplierID
-    """).fetchall()
-
-    for supplierRow in queryResults:
-        listReport.insert( END, "  ")
-        listReport.insert( END, " =====================================================================")
-        listReport.insert( END, "          TOBY'S TRUCKS - FOR ALL YOUR TRUCKING NEEDS                 ")
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, "    Toby's Trucks, Spokane, South Wales.     Tel 018871 8181181       ")
-        listReport.insert( END, "    enquiries@TobysTrucks.com          VAT Reg Number 120987245       ")
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, "               Order Note for Supplier ID :" + supplierRow[0]          )
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, "               Supplier Name     : " + supplierRow[1]  )
-        listReport.insert( END, "               Supplier Address  : " + supplierRow[2]  )        
-        listReport.insert( END, "               Supplier Phone    : " + supplierRow[3]  )
-        listReport.insert( END, "               Supplier Email    : " + supplierRow[4]  )
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, " Please send the following trucks :")
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, " Truck Truck     Truck     Truck  Truck      ReOrder  Sub")
-        listReport.insert( END, " ID   Make     Model    Size  Price     Amount   Total")
-        listReport.insert( END, " ---- -------- -------- ----  --------- -------  ---------")  
-
-        queryResults = tobysTrucksDatabase.execute(f"""
-            SELECT 
-                truckID, make, model, size, truckSupplierID,
-                buyingPrice, stockLevel, reorderLevel, reorderAmount
-            FROM truckTable
-            WHERE 
-                truckSupplierID = '{supplierRow[0]}'
-            AND stockLevel <= reorderLevel
-            ORDER BY truckID
-        """)
-
-        grandTotal = float(0)
-
-        for truckRow in queryResults:
-            truckLine=( " %-5s"     %(truckRow[0]) + 
-                        "%-9s"      %(truckRow[1]) +
-                        "%-10s"     %(truckRow[2]) + 
-                        "%-5s"      %(truckRow[3]) +
-                        "£%8.2f"    %(truckRow[5]) +
-                        "%4d"       %(truckRow[8]) +
-                        "£%8.2f"    %(truckRow[5]  * truckRow[8])
-                    )
-            listReport.insert(END, truckLine)
-            grandTotal += (truckRow[5]) * (truckRow[8])
-
-        if grandTotal > 0:
-            listReport.insert( END, " =====================================================================")
-            listReport.insert( END, " "*30 + "      Grand Total  £" + "%8.2f" %(grandTotal)                 )              
-            listReport.insert( END, " =====================================================================")
-        else:            
-            listReport.insert( END, " =====================================================================")
-            listReport.insert( END, "               ***  NO TRUCKS TO ORDER CURRENTLY  ***                 ")            
-            listReport.insert( END, " =====================================================================")
+    def buildAllOrderNotes(connection):
+        orderNotes = reorderNotes(connection)
+        return orderNotes, writeReorderNotes(orderNotes, outputDirectory)
+
+    def showAllOrderNotes(job, result):
+        orderNotes, paths = result
+        for supplierRow, truckRows in orderNotes:
+            for line in formatReorderNote(supplierRow, truckRows):
+                listReport.insert(END, line)
+
+        if paths:
+            messagebox.showinfo("Reorder Notes", f"{len(paths)} reorder notes saved to {outputDirectory}")
+        else:
+            messagebox.showinfo("Reorder Notes", "No supplier has trucks at or below their reorder level.")
+
+    def failed(job, error):
+        messagebox.showerror("Reorder Notes", f"The reorder notes could not be saved: {error}")
+
+    runInBackground(function=buildAllOrderNotes, onDone=showAllOrderNotes, onError=failed)
 
 #----------------------------------------------------------------------------------------------------------
 ########  RECEIPT  ####### 
 
 def selectOrderForReceipt():
-    clearMainWindow()
+    showScreen("receipt", buildReceipt)
     mainWindow.title("TOBY'S TRUCKS - ORDER RECEIPT")
-    
-    enterOrderIDLabel = Label(mainWindow, text="Select Order ID for Receipt : ", font=('Arial', 10))
-    enterOrderIDLabel.place(x=110, y=8, width=200, height=40)
 
-    comboBoxValues = []
-    
-    for row in tobysTrucksDatabase.execute("SELECT orderID from orderTable"):
-        comboBoxValues += row
+def buildReceipt(screen):
+    enterOrderIDLabel = Label(screen, text="Select Order ID for Receipt : ", font=('Arial', 10))
+    enterOrderIDLabel.place(x=110, y=8, width=200, height=40)
 
-    comboBoxOrderIDs = ttk.Combobox(state="readonly", textvariable=orderID, values=comboBoxValues)
+    comboBoxOrderIDs = ttk.Combobox(screen, state="readonly", textvariable=orderID)
     comboBoxOrderIDs.place(x=300, y=17)
     comboBoxOrderIDs.bind("<<ComboboxSelected>>", displayReceipt)
 
+    listReport = Listbox(screen, width=71, height=24, font=("Consolas",10))
+    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    def refreshReceipt():
+        comboBoxOrderIDs.config(values=referenceCache.ids("orderTable"))
+        listReport.place_forget()
+
+    refreshReceipt()
+    return {"report": listReport, "refresh": refreshReceipt}
+
 #----------------------------------------------------------------------------------------------------------
 
 def displayReceipt(event):
+    from tobystrucks.reports import receipt, formatReceipt
+
     mainWindow.title("TOBY'S TRUCKS - RECEIPT")
 
-    listReport = Listbox(mainWindow, width=71, height=24, font=("Consolas",10))
+    listReport = screens.widgets["receipt"]["report"]
+    listReport.delete(0, END)
     listReport.place(x=100, y=55)
-    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
 
-    queryResults = tobysTrucksDatabase.execute(f"""
-        SELECT 
-            orderID, orderCustomerID, orderDate, paid,
-            customerID, customerName, customerAddress, 
-            customerPhone, customerEmail
-        FROM 
-            orderTable, customerTable
-        WHERE
-            orderID = '{orderID.get()}'
-        AND orderCustomerID = customerID
-    """).fetchall()
-
-    currentDate = date.today().strftime('%d-%m-%Y')
-
-    for row in queryResults:
-        listReport.insert( END, " ")
-        listReport.insert( END, " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-        listReport.insert( END, "          TOBY'S TRUCKS - RECEIPT - THANK YOU FOR YOUR ORDER          ")
-        listReport.insert( END, " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-        listReport.insert( END, " Toby's Trucks, Truck Island, Scotland.        Tel 018871 8181181     ")
-        listReport.insert( END, " E-Mail  enquiries@TobysTrucks.com          VAT Reg Number 120987245  ")
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, "   Receipt for Order ID : " + row[0] + "        Date : " + currentDate )
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, " ORDER ID    : " + "%-14s"  %(row[0]) + " CUSTOMER ID : "     + row[4] )
-        listReport.insert( END, " Order Date  : " + "%-14s"  %(row[2]) + " Name        : "     + row[5] )        
-        listReport.insert( END, " Paid        : " + "%-14s"  %(row[3]) + " Address     : "     + row[6] )
-        listReport.insert( END, " "*29                                 + " Phone       : "     + row[7] )
-        listReport.insert( END, " "*29                                 + " Email       : "     + row[8] )
-        listReport.insert( END, " ---------------------------------------------------------------------")
-        listReport.insert( END, " Truck Truck     Truck     Truck  Truck      Truck     Sub")
-        listReport.insert( END, " ID   Make     Model    Size  Price     Quantity Total")
-        listReport.insert( END, " ---- -------- -------- ----  --------- -------  ---------")  
-
-    queryResults = tobysTrucksDatabase.execute(f"""
-        SELECT 
-            orderItemsOrderID, orderItemstruckID, quantity,
-            truckID, make, model, size, sellingPrice
-        FROM   
-            orderItemsTable, truckTable 
-        WHERE
-            orderItemsOrderID = '{orderID.get()}'
-        AND orderItemstruckID = truckID
-    """).fetchall()
-
-    grandTotal = float(0)
-
-    for truckRow in queryResults:
-        truckLine=( " %-5s"     %(truckRow[3]) +
-                    "%-9s"      %(truckRow[4]) +
-                    "%-10s"     %(truckRow[5]) +
-                    "%-5s"      %(truckRow[6]) +
-                    "£%8.2f"    %(truckRow[7]) +
-                    "%4d"       %(truckRow[2]) +
-                    "£%8.2f"    %(truckRow[7] * truckRow[2])
-                )
-        listReport.insert(END, truckLine)
-        grandTotal += (truckRow[7]) * (truckRow[2])
-
-    if grandTotal > 0:
-        listReport.insert(END, " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-        listReport.insert(END, " "*30 + "      Grand Total  £" + "%8.2f" %(grandTotal))
-        listReport.insert(END, " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-    else:
-        listReport.insert(END, "=====================================================================")
-        listReport.insert(END, "                    ***  NO TRUCKS ON THE ORDER   ***                ")
-        listReport.insert(END, "=====================================================================")
+    selectedOrder = orderID.get()
+
+    def showReceipt(job, result):
+        orderRows, truckRows = result
+        for line in formatReceipt(orderRows, truckRows):
+            listReport.insert(END, line)
+
+    runInBackground(function=lambda connection: receipt(connection, selectedOrder), onDone=showReceipt)
 
 
 #----------------------------------------------------------------------------------------------------------
 ########  PROFIT REPORT  #######
 
 def selectYearForProfitReport():
-    clearMainWindow()
+    showScreen("profitReport", buildProfitReport)
     mainWindow.title("TOBY'S TRUCKS - PROFIT REPORT")
 
-    labelEnterOrderID = Label(mainWindow, text="Select Year for Profit Report : ", font=('Arial', 10))
+def buildProfitReport(screen):
+    labelEnterOrderID = Label(screen, text="Select Year for Profit Report : ", font=('Arial', 10))
     labelEnterOrderID.place( x=110, y=8, width=200, height=40)
     
     currentYear = int(date.today().strftime('%Y'))
@@ -1520,194 +2405,363 @@ def selectYearForProfitReport():
     for i in range(currentYear - 5, currentYear + 6):
         comboBoxValues.append(i)
 
-    comboBoxYears = ttk.Combobox(state="readonly", textvariable=yearForProfitReport, values=comboBoxValues)
+    comboBoxYears = ttk.Combobox(screen, state="readonly", textvariable=yearForProfitReport, values=comboBoxValues)
     comboBoxYears.place(x=300, y=17)
     comboBoxYears.bind("<<ComboboxSelected>>", profitReport)
 
+    listReport = Listbox(screen, width=71, height=26, font=("Consolas", 10))
+    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    linesButton = Button(screen, width=16)
+
+    def refreshProfitReport():
+        listReport.place_forget()
+        linesButton.place_forget()
+
+    return {"report": listReport, "linesButton": linesButton, "refresh": refreshProfitReport}
+
 #----------------------------------------------------------------------------------------------------------
     
 def profitReport(event):
+    from tobystrucks.reports import (
+        profitByMonth, profitTotals, profitLines, profitHeaderLines, profitMonthLine, profitTotalLines, profitLine,
+        PROFIT_LINE_HEADER,
+    )
+
     mainWindow.title("TOBY'S TRUCKS - PROFIT REPORT")
 
-    listReport = Listbox(mainWindow, width=71, height=26, font=("Consolas", 10))
+    profitScreen = screens.widgets["profitReport"]
+    listReport = profitScreen["report"]
+    listReport.delete(0, END)
     listReport.place(x=100, y=55)
-    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
 
-    currentDate = date.today().strftime('%d-%m-%Y')
-
-    listReport.insert(END, " ")
-    listReport.insert(END, " =====================================================================")
-    listReport.insert(END, "         TOBY'S TRUCKS - PROFIT REPORT FOR " + yearForProfitReport.get())
-    listReport.insert(END, " =====================================================================")
-    listReport.insert(END, "         Created on  : " + currentDate )
-    listReport.insert(END, " ---------------------------------------------------------------------")
-
-    currentDate = date.today().strftime('%d-%m-%Y')
-
-    queryResults = tobysTrucksDatabase.execute(f"""
-        SELECT 
-            orderID, orderDate, paid,
-            orderItemsOrderID, orderItemstruckID, quantity,
-            truckID, buyingPrice, sellingPrice,
-            ((sellingPrice - buyingPrice) * quantity)
-        FROM   
-            orderTable, orderItemsTable, truckTable
-        WHERE  
-            orderID = orderItemsOrderID
-        AND truckID = orderItemstruckID
-        AND SUBSTR(orderDate,7,10) = '{yearForProfitReport.get()}'
-    """)
-    allQueryResults = queryResults.fetchall()
-
-    totalTrucksSold = int(0)
-    totalOutGoings = float(0)
-    totalIncome = float(0)
-    unPaidIncome = float(0)
-    unPaidProfit = float(0)
-    totalProfit = float(0)
-
-    listReport.insert( END, " Order Order      Paid Quantity Truck  Buying     Selling    Order Item ")
-    listReport.insert( END, " ID    Date                     ID    Price      Price      Profit     ")
-    listReport.insert( END, " ----- ---------- ---- -------- ----  ---------- ---------- ---------- ")
-    
-    for row in allQueryResults:
-        orderItemLine=( "%-6s"    %(row[0])  + 
-                        "%-12s"   %(row[1])  + 
-                        "%-8s"    %(row[2])  + 
-                        "%-5s"    %(row[5])  + 
-                        "%-5s"    %(row[6])  +
-                        "£%8.2f"  %(row[7])  +
-                        "£%8.2f"  %(row[8])  +
-                        "£%8.2f"  %(row[9])  
-                    )
-        listReport.insert(END, orderItemLine)
-        totalOutGoings += (row[7] * row[5])
-        totalTrucksSold += int(row[5])
-
-        if row[2] == "Y":
-            totalProfit += row[9]
-            totalIncome += (row[8] * row[5])
+    reportYear = yearForProfitReport.get()
+
+    for line in profitHeaderLines(reportYear):
+        listReport.insert(END, line)
+
+    def fetchProfitSummary(connection):
+        return profitByMonth(connection, reportYear), profitTotals(connection, reportYear)
+
+    def addSummary(job, result):
+        months, totals = result
+        for row in months:
+            listReport.insert(END, profitMonthLine(row))
+        for line in profitTotalLines(totals):
+            listReport.insert(END, line)
+        linesButton.config(state="normal")
+
+    # Order lines are only fetched on request, a page at a time.
+    lastLine = {"row": None}
+
+    def showOrderLines():
+        linesButton.config(state="disabled")
+        if lastLine["row"] is None:
+            for line in PROFIT_LINE_HEADER:
+                listReport.insert(END, line)
+
+        after = lastLine["row"]
+        runInBackground(function=lambda connection: profitLines(connection, reportYear, after, profitLinesPageSize),
+                        onDone=addOrderItemLines)
+
+    def addOrderItemLines(job, rows):
+        for row in rows:
+            listReport.insert(END, profitLine(row))
+
+        if rows:
+            lastLine["row"] = rows[-1]
+            listReport.see(END)
+        if len(rows) == profitLinesPageSize:
+            linesButton.config(state="normal", text="More Order Lines")
         else:
-            unPaidProfit += row[9]
-            unPaidIncome += (row[8] * row[5])
-            
-    listReport.insert( END, " =====================================================================")             
-    listReport.insert( END, " Total Trucks Sold        " + "  %8d"  %(totalTrucksSold))
-    listReport.insert( END, " Total Out Goings        " + "£%9.2f" %(totalOutGoings))    
-    listReport.insert( END, " Total Actual Income     " + "£%9.2f" %(totalIncome))
-    listReport.insert( END, " ---------------------------------------------------------------------")
-    listReport.insert( END, " TOTAL ACTUAL PROFIT     " + "£%9.2f" %(totalProfit))
-    listReport.insert( END, " ---------------------------------------------------------------------")
-    listReport.insert( END, " Missing Unpaid Income   " + "£%9.2f" %(unPaidIncome))
-    listReport.insert( END, " Missing Unpaid Profit   " + "£%9.2f" %(unPaidProfit))
-    listReport.insert( END, " =====================================================================")
+            linesButton.config(state="disabled", text="All Lines Shown")
+
+    linesButton = profitScreen["linesButton"]
+    linesButton.config(text="Show Order Lines", state="disabled", command=showOrderLines)
+    linesButton.place(x=480, y=15)
+
+    runInBackground(function=fetchProfitSummary, onDone=addSummary)
 
 #----------------------------------------------------------------------------------------------------------
 ########  TRUCKS IN STOCK REPORT  #######
 
 def trucksInStock():
-    clearMainWindow()
+    from tobystrucks.reports import stockHeaderLines, stockLine, stockTotalLines
+
+    stockScreen = showScreen("trucksInStock", buildTrucksInStock)
     mainWindow.title("TOBY'S TRUCKS - TRUCKS IN STOCK")
     
-    listReport = Listbox(mainWindow, width=71, height=26, font=("Consolas",10))
-    listReport.place( x=100, y=15)
-    listReport.config( bg="Light blue", highlightbackground="blue", highlightthickness=2)
+    listReport = stockScreen["report"]
+    listReport.delete(0, END)
 
-    currentDate = date.today().strftime('%d-%m-%Y')
-
-    listReport.insert( END, " ")
-    listReport.insert( END, " =====================================================================")
-    listReport.insert( END, "    TOBY'S TRUCKS - STOCK REPORT WITH TOTAL                           ")
-    listReport.insert( END, " =====================================================================")
-    listReport.insert( END, "         Created on  : " + currentDate )
-    listReport.insert( END, " ---------------------------------------------------------------------")
-    listReport.insert( END, " Truck Truck     Truck     Truck   Stock ")
-    listReport.insert( END, " ID   Make     Model    Size   Level")
-    listReport.insert( END, " ---- -------- -------- ----   --------")
-    
-    queryResults = tobysTrucksDatabase.execute("SELECT truckID, make, model, size, stockLevel FROM truckTable ORDER BY truckID")
-    allQueryResults = queryResults.fetchall()
-    
-    for row in allQueryResults:
-        listReport.insert( END, " %-4s %-8s %-8s  %-4s %4d" %(row))
+    for line in stockHeaderLines():
+        listReport.insert(END, line)
+
+    totals = {"stock": 0}
 
-    listReport.insert( END, " ---------------------------------------------------------------------")
-    queryResults = tobysTrucksDatabase.execute("SELECT SUM(stockLevel) FROM truckTable")
-    totalStock = queryResults.fetchone()[0]
+    def addTruckLines(job, rows):
+        for row in rows:
+            listReport.insert(END, stockLine(row))
+            totals["stock"] += row[4] or 0
 
-    listReport.insert( END, " =====================================================================")
-    listReport.insert( END, " Total Trucks in stock :         " + str(totalStock) )
-    listReport.insert( END, " =====================================================================")
+    def addTotal(job, rowCount):
+        for line in stockTotalLines(totals["stock"]):
+            listReport.insert(END, line)
+
+    runInBackground(queries.sql("stockReport"), onBatch=addTruckLines, onDone=addTotal)
+
+def buildTrucksInStock(screen):
+    listReport = Listbox(screen, width=71, height=26, font=("Consolas",10))
+    listReport.place( x=100, y=15)
+    listReport.config( bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    return {"report": listReport}
 
 # =======================================================================================================
 #### CUSTOM SQL QUERY ####
 
 def setupCustomQuery():
-    clearMainWindow()
+    queryScreen = showScreen("customQuery", buildCustomQuery)
     mainWindow.title("TOBY'S TRUCKS - CUSTOM SQL QUERY")
 
-    labelEnterSQL = Label(mainWindow, text="Enter SQL Query : ", font=('Arial', 10))
+    queryScreen["entry"].delete(0, END)
+    clearQueryResults(queryScreen)
+
+def buildCustomQuery(screen):
+    labelEnterSQL = Label(screen, text="Enter SQL Query : ", font=('Arial', 10))
     labelEnterSQL.place(x=100, y=8, width=120, height=40)
 
-    entrySQLQuery = Entry(mainWindow, textvariable=customSQLQueryString, width=75, bg="light blue")
+    entrySQLQuery = Entry(screen, textvariable=customSQLQueryString, width=75, bg="light blue")
     entrySQLQuery.place(x=220, y=17)
-    entrySQLQuery.delete(0, END)
 
-    buttonRunSQL = Button(mainWindow, text="Run SQL Query", width=20, bg="light green", command=runCustomQuery)
+    buttonRunSQL = Button(screen, text="Run SQL Query", width=20, bg="light green", command=runCustomQuery)
     buttonRunSQL.place(x=700, y=15)
 
+    # Result widgets are placed by runCustomQuery as the results arrive.
+    listReport = Listbox(screen, width=100, height=25, font=("Consolas",10))
+    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    resultText = scrolledtext.ScrolledText(screen, width=100, height=25, font=("Consolas", 10), wrap="word")
+    resultText.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
+
+    copyButton = Button(screen, text="Copy Data to Clipboard", bg="light green")
+    saveButton = Button(screen, text="Save Data to File", bg="light green")
+    previewLabel = Label(screen, font=('Arial', 9))
+    messageLabel = Label(screen, font="11", bg="red")
+
+    return {"entry": entrySQLQuery, "list": listReport, "text": resultText, "copy": copyButton,
+            "save": saveButton, "preview": previewLabel, "message": messageLabel}
+
+def clearQueryResults(queryScreen):
+    for widgetName in ("list", "text", "copy", "save", "preview", "message"):
+        queryScreen[widgetName].place_forget()
+    queryScreen["list"].delete(0, END)
+    queryScreen["text"].config(state="normal")
+    queryScreen["text"].delete("1.0", END)
+
 
 def runCustomQuery():
+    from tkinter import filedialog
+
     mainWindow.title("TOBY'S TRUCKS - CUSTOM SQL QUERY RESULTS")
 
-    listReport = Listbox(mainWindow, width=100, height=25, font=("Consolas",10))
+    queryScreen = screens.widgets["customQuery"]
+    clearQueryResults(queryScreen)
+
+    listReport = queryScreen["list"]
     listReport.place(x=30, y=55)
-    listReport.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
 
-    try:
-        queryResults = tobysTrucksDatabase.execute(customSQLQueryString.get())
-        allQueryResults = queryResults.fetchall()
+    resultText = queryScreen["text"]
+    resultWidgets = {"columns": [], "textShown": False}
 
-        if len(allQueryResults) >= 1:
+    queryText = customSQLQueryString.get()
+
+    def copy_data():
+        mainWindow.clipboard_clear()
+        mainWindow.clipboard_append(resultText.get("0.0", "end").strip())
+
+    def save_data_to_file():
+        # Runs the query again and streams every row to the file, not just the preview.
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[
+            ("CSV files", "*.csv"),
+            ("JSON Lines", "*.jsonl"),
+            ("SQLite database", "*.db"),
+        ])
+        if not file_path:
+            messagebox.showwarning("Save Cancelled", "No file was chosen, so nothing was saved.")
+            return
 
-            listReport.destroy()
-            resultText = scrolledtext.ScrolledText(mainWindow, width=100, height=25, font=("Consolas", 10), wrap="word")
+        def showSaved(rowCount, truncated):
+            messagebox.showinfo("Save Successful", f"{rowCount} rows saved to {file_path}.")
+
+        def showSaveError(message):
+            messagebox.showerror("Save Failed", f"The results could not be saved: {message}")
+
+        runSandboxed(queryText, exportPath=file_path, onDone=showSaved, onError=showSaveError)
+
+    def setColumns(columns):
+        resultWidgets["columns"] = columns
+
+    def addResultRows(rows):
+        if not resultWidgets["textShown"]:
+            listReport.place_forget()
             resultText.place(x=30, y=55)
-            resultText.config(bg="Light blue", highlightbackground="blue", highlightthickness=2)
-
-            resultText.insert(END, str(allQueryResults))
-            resultText.config(state="disabled")
-
-            def copy_data():
-                mainWindow.clipboard_clear()
-                mainWindow.clipboard_append(resultText.get("0.0", "end").strip())
-
-            def save_data_to_file():
-                file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[
-                    ("Text files", "*.txt"), 
-                    ("Javascript Object Notation (JSON)", "*.json"), 
-                    ("Binary Archive", "*.bin"),
-                    ("All files", "*.*")
-                ])
-                if file_path:
-                    with open(file_path, 'w') as file:
-                        file.write(resultText.get("0.0", "end").strip())
-                    messagebox.showinfo("Save Successful", f"Data saved to {file_path}.")
-                else:
-                    messagebox.showwarning("Save Cancelled", "The filepath you selected did not exist or could not be created. Please try again later.")
-
-            copyButton = Button(mainWindow, text="Copy Data to Clipboard", command=copy_data, bg="light green")
-            copyButton.place(x=720, y=415, width=130, height=30)
-
-            saveButton = Button(mainWindow, text="Save Data to File", command=save_data_to_file, bg="light green")
-            saveButton.place(x=720, y=455, width=130, height=30)
+            resultText.insert(END, str(tuple(resultWidgets["columns"])) + "\n")
+            resultWidgets["textShown"] = True
 
-        else:
+            queryScreen["copy"].config(command=copy_data)
+            queryScreen["copy"].place(x=720, y=415, width=130, height=30)
+
+            queryScreen["save"].config(command=save_data_to_file)
+            queryScreen["save"].place(x=720, y=455, width=130, height=30)
+
+        resultText.config(state="normal")
+        resultText.insert(END, "".join(str(tuple(row)) + "\n" for row in rows))
+        resultText.config(state="disabled")
+
+    def showNoRecords(rowCount, truncated):
+        if rowCount == 0:
             listReport.insert(END, " No Records Found ")
+        elif truncated:
+            queryScreen["preview"].config(text=f"Showing the first {rowCount} rows - save to a file for the full result")
+            queryScreen["preview"].place(x=30, y=470)
 
-    except Exception as e:
-        messageLabel = Label(mainWindow, font="11", bg="red", text="Error in SQL Query: " + str(e))
-        messageLabel.place(x=320, y=360)
+    def showQueryError(message):
+        queryScreen["message"].config(text="Error in SQL Query: " + message)
+        queryScreen["message"].place(x=320, y=360)
+
+    runSandboxed(queryText, onColumns=setColumns, onBatch=addResultRows, onDone=showNoRecords, onError=showQueryError)
+
+# =======================================================================================================
+#### CSV IMPORT ####
+
+def setupImport():
+    importScreen = showScreen("import", buildImport)
+    mainWindow.title("TOBY'S TRUCKS - IMPORT CSV DATA")
+
+    if str(importScreen["importButton"]["state"]) == "normal":
+        importFilePath.set("")    # Keep the file of an import that is still running
+
+def buildImport(screen):
+    from tkinter import filedialog
+    from tobystrucks.importer import TABLE_SCHEMAS, importCsv
+
+    frameImport = Frame(screen, bg="Light blue", highlightbackground="red", highlightthickness=2)
+    frameImport.place(x=150, y=40, width=580, height=300)
+
+    Label(screen, text="Import CSV Data", font=('Arial', 16), bg="Light blue").place(x=340, y=50)
+    Label(screen, bg="Light blue", text="Import into table:").place(x=170, y=110)
+    Label(screen, bg="Light blue", text="CSV file:").place(x=170, y=145)
+    Label(screen, bg="Light blue", text="The first row must name the columns, as in DB_STRUCTURES.md.").place(x=170, y=180)
+
+    comboBoxTables = ttk.Combobox(screen, state="readonly", textvariable=importTableName, values=list(TABLE_SCHEMAS))
+    comboBoxTables.place(x=300, y=110)
+
+    Entry(screen, textvariable=importFilePath, width=45).place(x=300, y=145)
+
+    def browseForFile():
+        chosenPath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if chosenPath:
+            importFilePath.set(chosenPath)
+
+    Button(screen, text="Browse…", width=10, command=browseForFile).place(x=600, y=141)
+
+    progressLabel = Label(screen, bg="Light blue", font=('Arial', 10), text="")
+    progressLabel.place(x=170, y=260)
+
+    importButton = Button(screen, text="Import", width=14, bg="light green")
+    importButton.place(x=300, y=215)
+    cancelButton = Button(screen, text="Cancel", width=14, state="disabled")
+    cancelButton.place(x=430, y=215)
+
+    # Written by the import thread, read by showProgress on the Tk thread.
+    progress = {"counts": None}
+    cancelRequested = threading.Event()
+
+    def showProgress(counts):
+        rowsRead, rowsImported, rowsRejected, seconds = counts
+        rowsPerSecond = rowsRead / seconds if seconds else 0
+        progressLabel.config(text=f"{rowsRead:,} rows read, {rowsImported:,} imported, {rowsRejected:,} rejected - {rowsPerSecond:,.0f} rows/s")
+
+    def runImport(tableName, path):
+        importConnection = connectDatabase(databaseFile)
+        try:
+            return importCsv(importConnection, tableName, path,
+                             onProgress=lambda *counts: progress.update(counts=counts),
+                             cancelled=cancelRequested.is_set)
+        finally:
+            importConnection.close()
+            importRunning.clear()
+
+    def pollProgress(importJob):
+        if not progressLabel.winfo_exists():
+            return
+        if progress["counts"] is not None:
+            showProgress(progress["counts"])
+        if not importJob.done():
+            mainWindow.after(200, pollProgress, importJob)
+
+    def finishImport(importJob, tableName, path):
+        try:
+            result = importJob.result()
+        except InterruptedError:
+            result = None
+            message = "Import cancelled - nothing was saved"
+        except (OSError, ValueError, sqlite3.Error) as e:
+            messagebox.showerror("Import Failed", f"The file could not be imported: {e}")
+            result = None
+            message = ""
+        else:
+            logUserAction("IMPORT", tableName, "",
+                          f"Imported {result['rowsImported']} rows from {os.path.basename(path)}, {result['rowsRejected']} rejected")
+
+        # The user may have logged out while the import ran.
+        if not progressLabel.winfo_exists():
+            return
+        importButton.config(state="normal")
+        cancelButton.config(state="disabled")
+        if result is None:
+            progressLabel.config(text=message)
+            return
+
+        showProgress((result["rowsRead"], result["rowsImported"], result["rowsRejected"], result["seconds"]))
+        if result["rejectPath"]:
+            messagebox.showwarning("Import Finished", f"{result['rowsRejected']} rows were rejected. See {result['rejectPath']}")
+
+    def startImport():
+        if not importTableName.get() or not importFilePath.get():
+            messagebox.showerror("Import", "Choose a table and a CSV file first.")
+            return
+        if importRunning.is_set():
+            messagebox.showerror("Import Running", "Another import is still running.")
+            return
+
+        cancelRequested.clear()
+        progress["counts"] = None
+        importButton.config(state="disabled")
+        cancelButton.config(state="normal")
+        progressLabel.config(text="Importing…")
+
+        tableName, path = importTableName.get(), importFilePath.get()
+        importJob = Future()
+        importRunning.set()     # the import holds the write lock until it commits or rolls back
+
+        def runImportThread():
+            try:
+                importJob.set_result(runImport(tableName, path))
+            except BaseException as e:
+                importJob.set_exception(e)
+
+        # Its own thread rather than backgroundWorker, so a long import never queues up a login
+        # or an archive search behind it.
+        threading.Thread(target=runImportThread, name="CsvImport", daemon=True).start()
+        pollProgress(importJob)
+        whenFinished(importJob, lambda finishedJob: finishImport(finishedJob, tableName, path))
+
+    importButton.config(command=startImport)
+    cancelButton.config(command=cancelRequested.set)
+
+    return {"importButton": importButton}
 
 
 #=========================================================================================================
@@ -0,0 +1,49 @@
+"""
+Screen manager for the main window.
+
+Each screen is built once, into its own Frame covering the window, the first
+time it is shown. After that, showing it again only raises its Frame with
+`tkraise`, so moving between screens does not destroy and recreate widgets.
+"""
+
+from tkinter import Frame
+
+
+class ScreenManager:
+    """`show(name, build)` raises the named screen, calling build(frame) the first time.
+
+    build places the screen's widgets in frame and returns a dict of whatever the
+    screen needs again later; `show` returns that dict. If the dict has a "refresh"
+    function it is called each time the screen is shown again, before it is raised,
+    so lists can reload without being rebuilt."""
+
+    def __init__(self, master):
+        self.master = master
+        self.frames = {}
+        self.widgets = {}
+        self.current = None
+
+    def show(self, name, build):
+        if name not in self.frames:
+            frame = Frame(self.master)
+            frame.place(x=0, y=0, relwidth=1, relheight=1)
+            try:
+                self.widgets[name] = build(frame) or {}
+            except BaseException:
+                frame.destroy()
+                raise
+            self.frames[name] = frame
+        elif "refresh" in self.widgets[name]:
+            self.widgets[name]["refresh"]()
+
+        self.frames[name].tkraise()
+        self.current = name
+        return self.widgets[name]
+
+    def clear(self):
+        """Destroy every screen, e.g. at logout so nothing from the session is kept."""
+        for frame in self.frames.values():
+            frame.destroy()
+        self.frames.clear()
+        self.widgets.clear()
+        self.current = None
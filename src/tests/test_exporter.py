@@ -0,0 +1,86 @@
+"""
+Tests for the streaming export: a failed export must leave the target as it was,
+and the database being queried can never be exported over.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tobystrucks.database import connectDatabase
+from tobystrucks.exporter import exportQuery, partialPath
+from tobystrucks.migrations import migrateDatabase
+
+
+class ExporterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.databasePath = self.path("data.db")
+        self.connection = connectDatabase(self.databasePath)
+        migrateDatabase(self.connection)
+        self.connection.executemany("INSERT INTO customerTable (customerID, customerName) VALUES (?, ?)",
+                                    [(f"CUST{number:02}", f"Customer {number}") for number in range(20)])
+        self.connection.commit()
+
+        def failAfter(number):
+            if number >= 15:
+                raise ValueError("stopped part way")
+            return number
+        self.connection.create_function("failAfter", 1, failAfter)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def path(self, fileName):
+        return os.path.join(self.directory.name, fileName)
+
+    def readBytes(self, path):
+        with open(path, "rb") as exportedFile:
+            return exportedFile.read()
+
+    def testExportingOverTheQueriedDatabaseIsRefused(self):
+        before = self.readBytes(self.databasePath)
+        for target in (self.databasePath, os.path.join(self.directory.name, ".", "data.db")):
+            with self.subTest(target=target):
+                with self.assertRaisesRegex(ValueError, "database being queried"):
+                    exportQuery(self.connection, "SELECT * FROM customerTable", target)
+        self.assertEqual(self.readBytes(self.databasePath), before)
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM customerTable").fetchone(), (20,))
+
+    def testExportingOverAReadOnlyConnectionsDatabaseIsRefused(self):
+        readOnly = sqlite3.connect(f"file:{self.databasePath}?mode=ro", uri=True)
+        self.addCleanup(readOnly.close)
+        with self.assertRaisesRegex(ValueError, "database being queried"):
+            exportQuery(readOnly, "SELECT * FROM customerTable", self.databasePath)
+
+    def testAFailedExportLeavesTheExistingFileUntouched(self):
+        for extension in (".csv", ".jsonl", ".db"):
+            with self.subTest(extension=extension):
+                target = self.path("customers" + extension)
+                with open(target, "wb") as existingFile:
+                    existingFile.write(b"the user's original file")
+
+                with self.assertRaises(sqlite3.Error):
+                    exportQuery(self.connection, "SELECT customerID, failAfter(rowid) FROM customerTable ORDER BY rowid",
+                                target, batchSize=5)
+
+                self.assertEqual(self.readBytes(target), b"the user's original file")
+                self.assertFalse(os.path.exists(partialPath(target)))
+
+    def testASuccessfulExportReplacesTheExistingFile(self):
+        target = self.path("customers.db")
+        for _ in range(2):
+            rowCount = exportQuery(self.connection, "SELECT customerID, customerName FROM customerTable", target, batchSize=7)
+            self.assertEqual(rowCount, 20)
+
+        exported = sqlite3.connect(target)
+        self.addCleanup(exported.close)
+        self.assertEqual(exported.execute("SELECT COUNT(*) FROM results").fetchone(), (20,))
+        self.assertFalse(os.path.exists(partialPath(target)))
+
+
+if __name__ == "__main__":
+    unittest.main()
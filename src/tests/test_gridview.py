@@ -0,0 +1,84 @@
+"""
+Tests for the paged grids' keyset queries. Only the SQL is built here, so no
+display is needed.
+"""
+
+import sqlite3
+import unittest
+
+from gridview import keysetQuery
+
+
+class KeysetQueryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE customerTable (customerID TEXT PRIMARY KEY NOT NULL, customerName TEXT)")
+        self.connection.executemany("INSERT INTO customerTable VALUES (?, ?)", [
+            (f"CUST{number:03}", None if number % 3 == 0 else f"Name {number % 7}") for number in range(100)
+        ])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def page(self, sortColumn, descending, boundary=None, backwards=False, limit=9):
+        sql, parameters = keysetQuery("customerTable", ["customerID", "customerName"], ["customerID"],
+                                      sortColumn, descending, boundary=boundary, backwards=backwards, limit=limit)
+        rows = self.connection.execute(sql, parameters).fetchall()
+        if backwards:
+            rows.reverse()
+        return rows
+
+    def walk(self, sortColumn, descending):
+        """Every row, a page at a time forwards, then the same again backwards from the last row."""
+        forwards = self.page(sortColumn, descending)
+        while True:
+            rows = self.page(sortColumn, descending, boundary=forwards[-1][2:])
+            forwards += rows
+            if not rows:
+                break
+
+        backwards = [forwards[-1]]
+        while True:
+            rows = self.page(sortColumn, descending, boundary=backwards[0][2:], backwards=True)
+            backwards = rows + backwards
+            if not rows:
+                break
+        return forwards, backwards
+
+    def expectedOrder(self, sortColumn, descending):
+        nullsLast = "IS NULL" if not descending else "IS NULL DESC"
+        direction = "DESC" if descending else "ASC"
+        order = f"customerID {direction}" if sortColumn == "customerID" else \
+            f"customerName {nullsLast}, customerName {direction}, customerID {direction}"
+        return [row[0] for row in self.connection.execute(f"SELECT customerID FROM customerTable ORDER BY {order}")]
+
+    def testEveryRowIsPagedOnceInOrderWhateverTheSort(self):
+        for sortColumn in ("customerID", "customerName"):
+            for descending in (False, True):
+                with self.subTest(sortColumn=sortColumn, descending=descending):
+                    forwards, backwards = self.walk(sortColumn, descending)
+                    self.assertEqual([row[0] for row in forwards], self.expectedOrder(sortColumn, descending))
+                    self.assertEqual(backwards, forwards)
+
+    def testRowsWithANullSortValueComeLastAscendingAndFirstDescending(self):
+        forwards, _ = self.walk("customerName", False)
+        self.assertIsNone(forwards[-1][1])
+        self.assertIsNotNone(forwards[0][1])
+
+        forwards, _ = self.walk("customerName", True)
+        self.assertIsNone(forwards[0][1])
+        self.assertIsNotNone(forwards[-1][1])
+
+    def testPagingOnTheKeySearchesItsIndex(self):
+        for descending in (False, True):
+            for backwards in (False, True):
+                sql, parameters = keysetQuery("customerTable", ["customerID", "customerName"], ["customerID"], "customerID",
+                                              descending, boundary=("CUST050",), backwards=backwards)
+                plan = " ".join(row[-1] for row in self.connection.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+                self.assertIn("SEARCH customerTable", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
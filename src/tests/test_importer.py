@@ -0,0 +1,253 @@
+"""
+Tests for the streaming CSV import, run against a migrated database in a
+temporary directory. From src: python -m unittest discover -s tests -t .
+"""
+
+import csv
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tobystrucks.database import connectDatabase
+from tobystrucks.importer import importCsv, secondaryIndexes
+from tobystrucks.migrations import migrateDatabase
+from tobystrucks.stock import ledgerMismatches, reorderQueueCount
+
+ORDER_INDEXES = ["orderCustomerIndex", "orderDateIndex"]
+
+
+class ImporterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = connectDatabase(self.path("data.db"))
+        migrateDatabase(self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def path(self, fileName):
+        return os.path.join(self.directory.name, fileName)
+
+    def writeCsv(self, fileName, header, rows):
+        with open(self.path(fileName), "w", newline="", encoding="utf-8") as csvFile:
+            writer = csv.writer(csvFile)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return self.path(fileName)
+
+    def readRejects(self, rejectPath):
+        with open(rejectPath, newline="", encoding="utf-8") as rejectFile:
+            return list(csv.reader(rejectFile))
+
+    def orderIDs(self):
+        return [row[0] for row in self.connection.execute("SELECT orderID FROM orderTable ORDER BY orderID")]
+
+    def indexNames(self):
+        return sorted(name for name, _ in secondaryIndexes(self.connection, "orderTable"))
+
+    #------------------------------------------------------------------------------------------------------
+    #### REJECTS ####
+
+    def testInvalidRowsAreWrittenToTheRejectFileWithTheirReason(self):
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], [
+            ["ORD001", "CUST01", "12/09/2025", "Y"],
+            ["", "CUST01", "12/09/2025", "Y"],
+            ["ORD003", "CUST01", "not a date", "N"],
+            ["ORD004", "CUST01", "13/09/2025", "maybe"],
+            ["ORD005", "CUST01"],
+        ])
+
+        counts = importCsv(self.connection, "orderTable", csvPath)
+
+        self.assertEqual(counts["rowsRead"], 5)
+        self.assertEqual(counts["rowsImported"], 1)
+        self.assertEqual(counts["rowsRejected"], 4)
+        self.assertEqual(counts["rejectPath"], self.path("orders.rejects.csv"))
+        self.assertEqual(self.orderIDs(), ["ORD001"])
+
+        rejects = self.readRejects(counts["rejectPath"])
+        self.assertEqual(rejects[0], ["line", "orderID", "orderCustomerID", "orderDate", "paid", "error"])
+        self.assertEqual([row[0] for row in rejects[1:]], ["3", "4", "5", "6"])
+        self.assertEqual(rejects[1][-1], "orderID is required")
+        self.assertIn("orderDate 'not a date'", rejects[2][-1])
+        self.assertEqual(rejects[3][-1], "paid 'maybe' is not a valid flag")
+        self.assertEqual(rejects[4][-1], "expected 4 fields, found 2")
+
+    def testNoRejectFileIsWrittenWhenEveryRowLoads(self):
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], [
+            ["ORD001", "CUST01", "12/09/2025", "Y"],
+        ])
+
+        counts = importCsv(self.connection, "orderTable", csvPath)
+
+        self.assertIsNone(counts["rejectPath"])
+        self.assertFalse(os.path.exists(self.path("orders.rejects.csv")))
+
+    #------------------------------------------------------------------------------------------------------
+    #### KEY VIOLATIONS ####
+
+    def testABatchThatBreaksAKeyIsRetriedRowByRow(self):
+        self.connection.execute("INSERT INTO orderTable VALUES ('ORD002', 'CUST01', '2025-09-01', 'Y')")
+        self.connection.commit()
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], [
+            ["ORD001", "CUST01", "12/09/2025", "Y"],
+            ["ORD002", "CUST02", "12/09/2025", "N"],
+            ["ORD003", "CUST01", "12/09/2025", "N"],
+            ["ORD003", "CUST03", "14/09/2025", "N"],
+            ["ORD004", "CUST01", "15/09/2025", "Y"],
+        ])
+
+        counts = importCsv(self.connection, "orderTable", csvPath, batchSize=100)
+
+        self.assertEqual(counts["rowsImported"], 3)
+        self.assertEqual(counts["rowsRejected"], 2)
+        self.assertEqual(self.orderIDs(), ["ORD001", "ORD002", "ORD003", "ORD004"])
+        # The rows already in the table and the first of a duplicated pair are the ones kept.
+        self.assertEqual(self.connection.execute("SELECT orderCustomerID FROM orderTable WHERE orderID = 'ORD002'").fetchone(), ("CUST01",))
+        self.assertEqual(self.connection.execute("SELECT orderCustomerID FROM orderTable WHERE orderID = 'ORD003'").fetchone(), ("CUST01",))
+
+        rejects = self.readRejects(counts["rejectPath"])
+        self.assertEqual([row[0] for row in rejects[1:]], ["3", "5"])
+        self.assertTrue(all("UNIQUE constraint failed" in row[-1] for row in rejects[1:]))
+
+    #------------------------------------------------------------------------------------------------------
+    #### CANCEL AND INDEXES ####
+
+    def testCancellingRollsBackTheWholeImport(self):
+        rows = [[f"ORD{number:03}", "CUST01", "12/09/2025", "Y"] for number in range(50)]
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], rows)
+        progress = []
+
+        with self.assertRaises(InterruptedError):
+            importCsv(self.connection, "orderTable", csvPath, batchSize=10,
+                      onProgress=lambda *counts: progress.append(counts), cancelled=lambda: len(progress) >= 2)
+
+        self.assertEqual(len(progress), 2)
+        self.assertEqual(progress[-1][1], 20)
+        self.assertFalse(self.connection.in_transaction)
+        self.assertEqual(self.orderIDs(), [])
+        self.assertEqual(self.indexNames(), ORDER_INDEXES)
+
+    def testIndexesAreRestoredAfterASuccessfulImport(self):
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], [
+            ["ORD001", "CUST01", "12/09/2025", "Y"],
+        ])
+
+        importCsv(self.connection, "orderTable", csvPath)
+
+        self.assertEqual(self.indexNames(), ORDER_INDEXES)
+        # The rebuilt index holds the imported rows.
+        indexedRows = self.connection.execute(
+            "SELECT orderID FROM orderTable INDEXED BY orderCustomerIndex WHERE orderCustomerID = 'CUST01'").fetchall()
+        self.assertEqual(indexedRows, [("ORD001",)])
+        self.assertEqual(self.connection.execute("PRAGMA integrity_check").fetchone(), ("ok",))
+
+    def testIndexesAreRestoredAfterAFailedImport(self):
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"], [
+            ["ORD001", "CUST01", "12/09/2025", "Y"],
+        ])
+
+        def failingProgress(*counts):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            importCsv(self.connection, "orderTable", csvPath, onProgress=failingProgress, batchSize=1)
+
+        self.assertEqual(self.orderIDs(), [])
+        self.assertEqual(self.indexNames(), ORDER_INDEXES)
+
+    def testAMissingColumnIsReportedAndChangesNothing(self):
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderDate"], [["ORD001", "12/09/2025"]])
+
+        with self.assertRaises(ValueError):
+            importCsv(self.connection, "orderTable", csvPath)
+
+        self.assertEqual(self.orderIDs(), [])
+        self.assertEqual(self.indexNames(), ORDER_INDEXES)
+
+    #------------------------------------------------------------------------------------------------------
+    #### CONCURRENT WRITES ####
+
+    def testAnotherConnectionCannotWriteUntilTheImportFinishes(self):
+        # The import holds the write lock for the whole file, which is why the screens refuse
+        # to save while it runs; readers still see the data as it was before the import.
+        csvPath = self.writeCsv("orders.csv", ["orderID", "orderCustomerID", "orderDate", "paid"],
+                                [[f"ORD{number:03}", "CUST01", "12/09/2025", "Y"] for number in range(30)])
+        otherConnection = connectDatabase(self.path("data.db"), busyTimeout=100)
+        self.addCleanup(otherConnection.close)
+        seenDuringImport = []
+        writeErrors = []
+
+        def writeFromOtherConnection(*counts):
+            seenDuringImport.append(otherConnection.execute("SELECT COUNT(*) FROM orderTable").fetchone()[0])
+            try:
+                otherConnection.execute("INSERT INTO customerTable (customerID) VALUES ('CUST98')")
+                otherConnection.rollback()
+                writeErrors.append(None)
+            except sqlite3.OperationalError as e:
+                otherConnection.rollback()
+                writeErrors.append(str(e))
+
+        counts = importCsv(self.connection, "orderTable", csvPath, batchSize=10, onProgress=writeFromOtherConnection)
+
+        # Called after each of the three batches, then once more after the commit.
+        self.assertEqual(counts["rowsImported"], 30)
+        self.assertEqual(seenDuringImport, [0, 0, 0, 30])
+        self.assertEqual(writeErrors, ["database is locked"] * 3 + [None])
+        otherConnection.execute("INSERT INTO customerTable (customerID) VALUES ('CUST99')")
+        otherConnection.commit()
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM customerTable").fetchone()[0], 1)
+
+    #------------------------------------------------------------------------------------------------------
+    #### ORDER HISTORY ####
+
+    def addTruck(self, truckID, stockLevel, reorderLevel):
+        self.connection.execute("INSERT INTO truckTable VALUES (?, 'Volvo', 'FH16', 'XL', 'SUP001', 25000, 32000, ?, ?, 5)",
+                                (truckID, stockLevel, reorderLevel))
+        self.connection.commit()
+
+    def stockLevel(self, truckID):
+        return self.connection.execute("SELECT stockLevel FROM truckTable WHERE truckID = ?", (truckID,)).fetchone()[0]
+
+    def movementCount(self, truckID):
+        return self.connection.execute("SELECT COUNT(*) FROM stockMovementTable WHERE truckID = ?", (truckID,)).fetchone()[0]
+
+    def testImportedOrderLinesDoNotMoveStock(self):
+        self.addTruck("TR01", 10, 3)
+        csvPath = self.writeCsv("orderItems.csv", ["orderItemsOrderID", "orderItemsTruckID", "quantity"],
+                                [[f"ORD{number:05}", "TR01", "1"] for number in range(20000)])
+
+        counts = importCsv(self.connection, "orderItemsTable", csvPath)
+
+        self.assertEqual(counts["rowsImported"], 20000)
+        self.assertEqual(self.stockLevel("TR01"), 10)
+        self.assertEqual(self.movementCount("TR01"), 1)     # just the opening balance
+        self.assertEqual(reorderQueueCount(self.connection), 0)
+        self.assertEqual(ledgerMismatches(self.connection), [])
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM stockLedgerPauseTable").fetchone()[0], 0)
+
+        # Order lines added after the import are sales again.
+        self.connection.execute("INSERT INTO orderItemsTable VALUES ('ORD99999', 'TR01', 2)")
+        self.connection.commit()
+        self.assertEqual(self.stockLevel("TR01"), 8)
+        self.assertEqual(self.movementCount("TR01"), 2)
+
+    def testACancelledOrderHistoryImportLeavesSalesRecorded(self):
+        self.addTruck("TR01", 10, 3)
+        csvPath = self.writeCsv("orderItems.csv", ["orderItemsOrderID", "orderItemsTruckID", "quantity"],
+                                [[f"ORD{number:03}", "TR01", "1"] for number in range(50)])
+
+        with self.assertRaises(InterruptedError):
+            importCsv(self.connection, "orderItemsTable", csvPath, batchSize=10, cancelled=lambda: True)
+
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM stockLedgerPauseTable").fetchone()[0], 0)
+        self.connection.execute("INSERT INTO orderItemsTable VALUES ('ORD999', 'TR01', 2)")
+        self.connection.commit()
+        self.assertEqual(self.stockLevel("TR01"), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Tests for the system log viewer's paging queries against a migrated logsTable,
+which grows without bound, so every page has to be an index search.
+"""
+
+import os
+import tempfile
+import unittest
+
+from gridview import keysetQuery
+from tobystrucks.database import connectDatabase
+from tobystrucks.logs import buildLogFilter
+from tobystrucks.migrations import migrateDatabase
+from tobystrucks.queries import LOG_COLUMNS
+
+
+class LogPagingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = connectDatabase(os.path.join(self.directory.name, "data.db"))
+        migrateDatabase(self.connection)
+        self.connection.executemany(
+            "INSERT INTO logsTable (userID, username, action, tableName, recordID, timestamp, details) VALUES (?,?,?,?,?,?,?)",
+            [(f"USR{number % 5}", "user", "UPDATE", "truckTable", f"TR{number % 50:02}",
+              f"2025-{number % 12 + 1:02}-01 10:00:00", "") for number in range(5000)])
+        self.connection.commit()
+        self.connection.execute("ANALYZE")
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def pagePlan(self, where="", params=(), backwards=False):
+        # The same grid the log viewer builds: newest first, keyed and sorted on logID.
+        sql, parameters = keysetQuery("logsTable", LOG_COLUMNS, ["logID"], "logID", descending=True,
+                                      where=where, params=params, boundary=(2500,), backwards=backwards)
+        rows = self.connection.execute(sql, parameters).fetchall()
+        self.assertTrue(rows)
+        return " ".join(row[-1] for row in self.connection.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+
+    def testPagesSeekOnTheRowidInBothDirections(self):
+        for backwards in (False, True):
+            with self.subTest(backwards=backwards):
+                plan = self.pagePlan(backwards=backwards)
+                self.assertIn("SEARCH logsTable USING INTEGER PRIMARY KEY", plan)
+                self.assertNotIn("SCAN", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def testFilteredPagesSearchAnIndexWithoutSorting(self):
+        where, params = buildLogFilter(userID="USR3")
+        plan = self.pagePlan(where, params)
+        self.assertIn("SEARCH logsTable", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests that the trigger-maintained profitSummaryTable (migration 6) always matches
+the same totals worked out from scratch with GROUP BY.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from tobystrucks.database import connectDatabase
+from tobystrucks.migrations import migrateDatabase
+
+RECOMPUTED_SUMMARY_SQL = """
+    SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(orderItemsTruckID, ''),
+           CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END, SUM(CAST(IFNULL(quantity, 0) AS INTEGER))
+    FROM orderTable JOIN orderItemsTable ON orderItemsOrderID = orderID
+    GROUP BY 1, 2, 3
+    HAVING SUM(CAST(IFNULL(quantity, 0) AS INTEGER)) <> 0
+    ORDER BY 1, 2, 3
+"""
+
+# Rows that have dropped to zero are left in the summary; they add nothing to the report.
+SUMMARY_SQL = """
+    SELECT yearMonth, truckID, paid, trucksSold FROM profitSummaryTable
+    WHERE trucksSold <> 0
+    ORDER BY 1, 2, 3
+"""
+
+TRUCK_IDS = ["TR01", "TR02", "TR03", "TR04"]
+ORDER_DATES = ["2025-01-15", "2025-01-28", "2025-02-03", "2025-03-30", "2024-12-31"]
+
+
+class ProfitSummaryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = connectDatabase(os.path.join(self.directory.name, "data.db"))
+        migrateDatabase(self.connection)
+        self.connection.executemany(
+            "INSERT INTO truckTable VALUES (?, 'Volvo', 'FH16', 'XL', 'SUP001', 25000, 32000, 100, 3, 5)",
+            [(truckID,) for truckID in TRUCK_IDS])
+        self.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def assertSummaryMatchesRecomputation(self):
+        self.assertEqual(self.connection.execute(SUMMARY_SQL).fetchall(),
+                         self.connection.execute(RECOMPUTED_SUMMARY_SQL).fetchall())
+
+    def addOrder(self, orderID, orderDate, paid, lines):
+        self.connection.execute("INSERT INTO orderTable VALUES (?, 'CUST01', ?, ?)", (orderID, orderDate, paid))
+        self.connection.executemany("INSERT INTO orderItemsTable VALUES (?, ?, ?)",
+                                    [(orderID, truckID, quantity) for truckID, quantity in lines])
+        self.connection.commit()
+
+    def testEachKindOfChangeKeepsTheSummaryInStep(self):
+        self.addOrder("ORD001", "2025-01-15", "Y", [("TR01", 2), ("TR02", 1)])
+        self.addOrder("ORD002", "2025-01-20", "N", [("TR01", 3)])
+        self.assertSummaryMatchesRecomputation()
+        self.assertEqual(self.connection.execute(SUMMARY_SQL).fetchall(), [
+            ("2025-01", "TR01", "N", 3), ("2025-01", "TR01", "Y", 2), ("2025-01", "TR02", "Y", 1),
+        ])
+
+        changes = [
+            ("UPDATE orderItemsTable SET quantity = 5 WHERE orderItemsOrderID = 'ORD001' AND orderItemsTruckID = 'TR01'", ()),
+            ("UPDATE orderItemsTable SET orderItemsTruckID = 'TR03' WHERE orderItemsOrderID = 'ORD002'", ()),
+            ("UPDATE orderItemsTable SET orderItemsOrderID = 'ORD002' WHERE orderItemsOrderID = 'ORD001' AND orderItemsTruckID = 'TR02'", ()),
+            ("UPDATE orderTable SET paid = 'Y' WHERE orderID = 'ORD002'", ()),
+            ("UPDATE orderTable SET orderDate = '2025-02-01' WHERE orderID = 'ORD001'", ()),
+            ("DELETE FROM orderItemsTable WHERE orderItemsOrderID = 'ORD002' AND orderItemsTruckID = 'TR03'", ()),
+            ("DELETE FROM orderTable WHERE orderID = 'ORD001'", ()),
+        ]
+        for sql, params in changes:
+            with self.subTest(sql=sql):
+                self.connection.execute(sql, params)
+                self.connection.commit()
+                self.assertSummaryMatchesRecomputation()
+
+    def testRandomChangesKeepTheSummaryInStep(self):
+        randomiser = random.Random(2025)
+        orderIDs = [f"ORD{number:03}" for number in range(12)]
+        for orderID in orderIDs:
+            lines = [(truckID, randomiser.randint(1, 4)) for truckID in randomiser.sample(TRUCK_IDS, randomiser.randint(0, 3))]
+            self.addOrder(orderID, randomiser.choice(ORDER_DATES), randomiser.choice("YN"), lines)
+        self.assertSummaryMatchesRecomputation()
+
+        for step in range(300):
+            orderID = randomiser.choice(orderIDs)
+            truckID = randomiser.choice(TRUCK_IDS)
+            change = randomiser.randrange(6)
+            if change == 0:
+                self.connection.execute("INSERT OR IGNORE INTO orderItemsTable VALUES (?, ?, ?)",
+                                        (orderID, truckID, randomiser.randint(1, 5)))
+            elif change == 1:
+                self.connection.execute("DELETE FROM orderItemsTable WHERE orderItemsOrderID = ? AND orderItemsTruckID = ?",
+                                        (orderID, truckID))
+            elif change == 2:
+                self.connection.execute("UPDATE orderItemsTable SET quantity = ? WHERE orderItemsOrderID = ? AND orderItemsTruckID = ?",
+                                        (randomiser.randint(1, 5), orderID, truckID))
+            elif change == 3:
+                self.connection.execute("UPDATE OR IGNORE orderItemsTable SET orderItemsTruckID = ? "
+                                        "WHERE orderItemsOrderID = ? AND orderItemsTruckID = ?",
+                                        (randomiser.choice(TRUCK_IDS), orderID, truckID))
+            elif change == 4:
+                self.connection.execute("UPDATE orderTable SET orderDate = ?, paid = ? WHERE orderID = ?",
+                                        (randomiser.choice(ORDER_DATES), randomiser.choice("YN"), orderID))
+            else:
+                self.connection.execute("DELETE FROM orderItemsTable WHERE orderItemsOrderID = ?", (orderID,))
+                self.connection.execute("DELETE FROM orderTable WHERE orderID = ?", (orderID,))
+                self.connection.execute("INSERT INTO orderTable VALUES (?, 'CUST01', ?, ?)",
+                                        (orderID, randomiser.choice(ORDER_DATES), randomiser.choice("YN")))
+            self.connection.commit()
+            with self.subTest(step=step, change=change):
+                self.assertSummaryMatchesRecomputation()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Tests for the stock movement ledger (migration 9) and reorder queue (migration 10)
+triggers, run against a migrated database in a temporary directory.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tobystrucks.database import connectDatabase
+from tobystrucks.migrations import migrateDatabase
+from tobystrucks.stock import ledgerMismatches, receiveStock, reorderQueueCount, setStockLevel, stockHistory
+
+
+class StockTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = connectDatabase(os.path.join(self.directory.name, "data.db"))
+        migrateDatabase(self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def addTruck(self, truckID, stockLevel, reorderLevel=2, supplierID="SUP001"):
+        self.connection.execute("INSERT INTO truckTable VALUES (?, 'Volvo', 'FH16', 'XL', ?, 25000, 32000, ?, ?, 5)",
+                                (truckID, supplierID, stockLevel, reorderLevel))
+
+    def addOrderItem(self, orderID, truckID, quantity):
+        self.connection.execute("INSERT INTO orderItemsTable (orderItemsOrderID, orderItemsTruckID, quantity) VALUES (?, ?, ?)",
+                                (orderID, truckID, quantity))
+
+    def stockLevel(self, truckID):
+        return self.connection.execute("SELECT stockLevel FROM truckTable WHERE truckID = ?", (truckID,)).fetchone()[0]
+
+    def ledgerTotal(self, truckID):
+        return self.connection.execute("SELECT SUM(quantity) FROM stockMovementTable WHERE truckID = ?",
+                                       (truckID,)).fetchone()[0]
+
+    def movements(self, truckID):
+        """[(movementType, quantity, orderID, note), ...] oldest first."""
+        return self.connection.execute(
+            "SELECT movementType, quantity, orderID, note FROM stockMovementTable WHERE truckID = ? ORDER BY movementID",
+            (truckID,)
+        ).fetchall()
+
+    def assertLedgerMatches(self, truckID):
+        self.assertEqual(self.stockLevel(truckID), self.ledgerTotal(truckID))
+        self.assertEqual(ledgerMismatches(self.connection), [])
+
+
+class StockLedgerTestCase(StockTestCase):
+
+    def testAddingATruckRecordsItsOpeningStock(self):
+        self.addTruck("TRK001", 10)
+        self.addTruck("TRK002", 0)
+
+        self.assertEqual(self.movements("TRK001"), [("opening", 10, None, "Stock level when the truck was added")])
+        self.assertEqual(self.movements("TRK002"), [])
+        self.assertLedgerMatches("TRK001")
+
+    def testAddingAnOrderItemRecordsASale(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+
+        self.assertEqual(self.movements("TRK001")[1:], [("sale", -3, "ORD001", "Order item added")])
+        self.assertEqual(self.stockLevel("TRK001"), 7)
+        self.assertLedgerMatches("TRK001")
+
+    def testRemovingAnOrderItemPutsTheStockBack(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+        self.connection.execute("DELETE FROM orderItemsTable WHERE orderItemsOrderID = 'ORD001'")
+
+        self.assertEqual(self.movements("TRK001")[2:], [("sale", 3, "ORD001", "Order item removed")])
+        self.assertEqual(self.stockLevel("TRK001"), 10)
+        self.assertLedgerMatches("TRK001")
+
+    def testChangingAnOrderItemsQuantityReversesTheOldSale(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+        self.connection.execute("UPDATE orderItemsTable SET quantity = 5 WHERE orderItemsOrderID = 'ORD001'")
+
+        self.assertEqual(self.movements("TRK001")[2:], [("sale", 3, "ORD001", "Order item changed"),
+                                                        ("sale", -5, "ORD001", "Order item changed")])
+        self.assertEqual(self.stockLevel("TRK001"), 5)
+        self.assertLedgerMatches("TRK001")
+
+    def testSavingAnOrderItemUnchangedRecordsNothing(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+        self.connection.execute("UPDATE orderItemsTable SET quantity = 3 WHERE orderItemsOrderID = 'ORD001'")
+
+        self.assertEqual(len(self.movements("TRK001")), 2)
+
+    def testMovingAnOrderItemToAnotherTruckMovesTheSale(self):
+        self.addTruck("TRK001", 10)
+        self.addTruck("TRK002", 4)
+        self.addOrderItem("ORD001", "TRK001", 3)
+        self.connection.execute("UPDATE orderItemsTable SET orderItemsTruckID = 'TRK002' WHERE orderItemsOrderID = 'ORD001'")
+
+        self.assertEqual(self.stockLevel("TRK001"), 10)
+        self.assertEqual(self.stockLevel("TRK002"), 1)
+        self.assertEqual(self.movements("TRK002")[1:], [("sale", -3, "ORD001", "Order item changed")])
+        self.assertLedgerMatches("TRK001")
+        self.assertLedgerMatches("TRK002")
+
+    def testStockLevelIsTheLedgerTotalAfterMixedMovements(self):
+        self.addTruck("TRK001", 10)
+        for number, quantity in enumerate([2, 1, 4]):
+            self.addOrderItem(f"ORD{number:03}", "TRK001", quantity)
+        receiveStock(self.connection, "TRK001", 6, note="Delivery")
+        self.connection.execute("UPDATE orderItemsTable SET quantity = 2 WHERE orderItemsOrderID = 'ORD002'")
+        self.connection.execute("DELETE FROM orderItemsTable WHERE orderItemsOrderID = 'ORD000'")
+        self.assertEqual(setStockLevel(self.connection, "TRK001", 12, note="Stock count"), -1)
+
+        self.assertEqual(self.stockLevel("TRK001"), 12)
+        self.assertEqual(stockHistory(self.connection, "TRK001")[-1][4], 12)
+        self.assertLedgerMatches("TRK001")
+
+    def testMovementsCannotBeChanged(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+
+        for column, value in [("quantity", -1), ("movementType", "adjustment"), ("orderID", "ORD999"), ("note", "edited")]:
+            with self.subTest(column=column):
+                with self.assertRaisesRegex(sqlite3.DatabaseError, "stock movements cannot be changed"):
+                    self.connection.execute(f"UPDATE stockMovementTable SET {column} = ? WHERE movementType = 'sale'", (value,))
+        self.assertEqual(self.movements("TRK001")[1:], [("sale", -3, "ORD001", "Order item added")])
+        self.assertLedgerMatches("TRK001")
+
+    def testMovementsCannotBeDeleted(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+
+        with self.assertRaisesRegex(sqlite3.DatabaseError, "stock movements cannot be deleted"):
+            self.connection.execute("DELETE FROM stockMovementTable WHERE truckID = 'TRK001'")
+        self.assertEqual(len(self.movements("TRK001")), 2)
+        self.assertLedgerMatches("TRK001")
+
+    def testRenamingATruckKeepsItsLedger(self):
+        self.addTruck("TRK001", 10)
+        self.addOrderItem("ORD001", "TRK001", 3)
+        self.connection.execute("UPDATE truckTable SET truckID = 'TRK100' WHERE truckID = 'TRK001'")
+
+        self.assertEqual(self.movements("TRK001"), [])
+        self.assertEqual(len(self.movements("TRK100")), 2)
+        self.assertLedgerMatches("TRK100")
+
+    def testChangingStockLevelDirectlyIsReportedAsAMismatch(self):
+        self.addTruck("TRK001", 10)
+        self.connection.execute("UPDATE truckTable SET stockLevel = 9 WHERE truckID = 'TRK001'")
+
+        self.assertEqual(ledgerMismatches(self.connection), [("TRK001", 9, 10)])
+
+
+class ReorderQueueTestCase(StockTestCase):
+
+    def queue(self):
+        return self.connection.execute("SELECT truckID, supplierID FROM reorderQueueTable ORDER BY truckID").fetchall()
+
+    def queuedAt(self, truckID):
+        return self.connection.execute("SELECT queuedAt FROM reorderQueueTable WHERE truckID = ?", (truckID,)).fetchone()[0]
+
+    def testATruckAddedAtItsReorderLevelIsQueued(self):
+        self.addTruck("TRK001", 2, reorderLevel=2)
+        self.addTruck("TRK002", 3, reorderLevel=2)
+
+        self.assertEqual(self.queue(), [("TRK001", "SUP001")])
+
+    def testSalesCrossingTheThresholdQueueTheTruckOnce(self):
+        self.addTruck("TRK001", 5, reorderLevel=2)
+        self.addOrderItem("ORD001", "TRK001", 2)
+        self.assertEqual(self.queue(), [])
+
+        self.addOrderItem("ORD002", "TRK001", 1)
+        self.assertEqual(self.queue(), [("TRK001", "SUP001")])
+
+        # Further sales while it is low keep the one entry and the time it was first queued.
+        self.connection.execute("UPDATE reorderQueueTable SET queuedAt = '2000-01-01 00:00:00'")
+        self.addOrderItem("ORD003", "TRK001", 1)
+        self.connection.execute("UPDATE orderItemsTable SET quantity = 2 WHERE orderItemsOrderID = 'ORD003'")
+        self.assertEqual(self.queue(), [("TRK001", "SUP001")])
+        self.assertEqual(self.queuedAt("TRK001"), "2000-01-01 00:00:00")
+        self.assertEqual(reorderQueueCount(self.connection), 1)
+
+    def testRestockingAboveTheThresholdClearsTheQueue(self):
+        self.addTruck("TRK001", 3, reorderLevel=2)
+        self.addOrderItem("ORD001", "TRK001", 2)
+        self.assertEqual(reorderQueueCount(self.connection), 1)
+
+        receiveStock(self.connection, "TRK001", 1)
+        self.assertEqual(self.queue(), [("TRK001", "SUP001")])
+
+        receiveStock(self.connection, "TRK001", 5)
+        self.assertEqual(self.queue(), [])
+        self.assertEqual(reorderQueueCount(self.connection), 0)
+
+    def testRemovingTheSaleThatCrossedTheThresholdClearsTheQueue(self):
+        self.addTruck("TRK001", 3, reorderLevel=2)
+        self.addOrderItem("ORD001", "TRK001", 1)
+        self.connection.execute("DELETE FROM orderItemsTable WHERE orderItemsOrderID = 'ORD001'")
+
+        self.assertEqual(self.queue(), [])
+
+    def testRaisingTheReorderLevelQueuesTheTruck(self):
+        self.addTruck("TRK001", 4, reorderLevel=2)
+        self.connection.execute("UPDATE truckTable SET reorderLevel = 4 WHERE truckID = 'TRK001'")
+        self.assertEqual(self.queue(), [("TRK001", "SUP001")])
+
+        self.connection.execute("UPDATE truckTable SET reorderLevel = 1 WHERE truckID = 'TRK001'")
+        self.assertEqual(self.queue(), [])
+
+    def testQueuedTrucksFollowRenamesSupplierChangesAndDeletes(self):
+        self.addTruck("TRK001", 1, reorderLevel=2)
+        self.connection.execute("UPDATE reorderQueueTable SET queuedAt = '2000-01-01 00:00:00'")
+
+        self.connection.execute("UPDATE truckTable SET truckSupplierID = 'SUP002' WHERE truckID = 'TRK001'")
+        self.assertEqual(self.queue(), [("TRK001", "SUP002")])
+        self.assertEqual(self.queuedAt("TRK001"), "2000-01-01 00:00:00")
+
+        self.connection.execute("UPDATE truckTable SET truckID = 'TRK100' WHERE truckID = 'TRK001'")
+        self.assertEqual(self.queue(), [("TRK100", "SUP002")])
+
+        self.connection.execute("DELETE FROM truckTable WHERE truckID = 'TRK100'")
+        self.assertEqual(self.queue(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,6 @@
+"""
+Toby's Trucks core package.
+
+Database access and business logic shared by the Tkinter front end in
+`src/main.py`.
+"""
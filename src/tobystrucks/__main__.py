@@ -0,0 +1,5 @@
+import sys
+
+from tobystrucks.cli import main
+
+sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Group-committed audit log writer.
+
+logUserAction only queues a record. A writer thread with its own connection
+collects records and writes them to logsTable with one executemany per
+transaction, whenever `batchSize` records are waiting or the oldest waiting record
+is `flushInterval` milliseconds old - whichever comes first.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from tobystrucks.database import connectDatabase
+
+INSERT_LOG_SQL = """
+    INSERT INTO logsTable (userID, username, action, tableName, recordID, timestamp, details)
+    VALUES (?,?,?,?,?,?,?)
+"""
+
+STOP = object()
+
+
+class AuditLogWriter:
+
+    def __init__(self, databasePath, batchSize=50, flushInterval=500, **connectionSettings):
+        self.databasePath = databasePath
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval / 1000
+        self.connectionSettings = connectionSettings
+
+        self.records = queue.Queue()
+        self.pending = []               # taken off the queue, not yet written; guarded by statsLock
+        self.statsLock = threading.Lock()
+        self.flushCount = 0
+        self.failedFlushCount = 0
+        self.recordsWritten = 0
+        self.lastFlushMs = 0.0
+        self.maxFlushMs = 0.0
+        self.totalFlushMs = 0.0
+
+        self.thread = threading.Thread(target=self.run, name="AuditLogWriter", daemon=True)
+        self.thread.start()
+
+    #------------------------------------------------------------------------------------------------------
+    #### CALLER SIDE ####
+
+    def log(self, logRecord):
+        """Queue one (userID, username, action, tableName, recordID, timestamp, details) record."""
+        self.records.put(tuple(logRecord))
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far has been written."""
+        if not self.thread.is_alive():
+            return
+        flushed = threading.Event()
+        self.records.put(flushed)
+        flushed.wait(timeout)
+
+    def close(self, timeout=5):
+        if self.thread.is_alive():
+            self.records.put(STOP)
+            self.thread.join(timeout)
+
+    def stats(self):
+        with self.statsLock:
+            return {
+                "queueDepth": self.records.qsize() + len(self.pending),
+                "flushes": self.flushCount,
+                "failedFlushes": self.failedFlushCount,
+                "recordsWritten": self.recordsWritten,
+                "lastFlushMs": self.lastFlushMs,
+                "maxFlushMs": self.maxFlushMs,
+                "averageFlushMs": self.totalFlushMs / self.flushCount if self.flushCount else 0.0,
+            }
+
+    #------------------------------------------------------------------------------------------------------
+    #### WRITER THREAD ####
+
+    def run(self):
+        connection = connectDatabase(self.databasePath, **self.connectionSettings)
+        deadline = None
+
+        try:
+            while True:
+                timeout = None if not self.pending else max(0, deadline - time.monotonic())
+                try:
+                    item = self.records.get(timeout=timeout)
+                except queue.Empty:
+                    self.writeRecords(connection)
+                    deadline = time.monotonic() + self.flushInterval
+                    continue
+
+                if item is STOP:
+                    self.writeRecords(connection)
+                    break
+
+                if isinstance(item, threading.Event):
+                    self.writeRecords(connection)
+                    item.set()
+                    continue
+
+                if not self.pending:
+                    deadline = time.monotonic() + self.flushInterval
+                with self.statsLock:
+                    self.pending.append(item)
+
+                if len(self.pending) >= self.batchSize:
+                    self.writeRecords(connection)
+        finally:
+            connection.close()
+
+    def writeRecords(self, connection):
+        """Write the pending records in one transaction. They stay pending if the write fails."""
+        if not self.pending:
+            return
+
+        started = time.perf_counter()
+        try:
+            with connection:
+                connection.executemany(INSERT_LOG_SQL, self.pending)
+        except sqlite3.Error as e:
+            # Keep the records and try again on the next flush, e.g. if the database was locked.
+            print(f"Cannot write audit log: {e}")
+            with self.statsLock:
+                self.failedFlushCount += 1
+            return
+
+        elapsedMs = (time.perf_counter() - started) * 1000
+        with self.statsLock:
+            self.flushCount += 1
+            self.recordsWritten += len(self.pending)
+            self.lastFlushMs = elapsedMs
+            self.maxFlushMs = max(self.maxFlushMs, elapsedMs)
+            self.totalFlushMs += elapsedMs
+            self.pending = []
@@ -0,0 +1,94 @@
+"""
+Saving the bulk edit grids.
+
+The grids collect every changed cell as {recordID: {columnName: value}}. The
+changes are saved with one parameterised UPDATE per distinct set of changed
+columns, each run once with `executemany` over all the rows that share it, so a
+repricing of hundreds of trucks is a single statement and a single commit.
+Like stock.py, nothing here commits: the caller does, once the whole batch has
+gone in.
+"""
+
+def toPrice(text):
+    try:
+        price = round(float(text), 2)
+    except ValueError:
+        raise ValueError("it must be a number") from None
+    if price < 0:
+        raise ValueError("a price cannot be negative")
+    return price
+
+
+def toWholeNumber(text):
+    try:
+        number = int(text)
+    except ValueError:
+        raise ValueError("it must be a whole number") from None
+    if number < 0:
+        raise ValueError("it cannot be negative")
+    return number
+
+
+def toText(text):
+    return text.strip()
+
+
+# tableName: (key column, {editable column: converter}). Keys are not editable, and
+# neither is stockLevel, which only changes through the stock ledger.
+EDITABLE_TABLES = {
+    "truckTable": ("truckID", {
+        "make": toText, "model": toText, "size": toText, "truckSupplierID": toText,
+        "buyingPrice": toPrice, "sellingPrice": toPrice, "reorderLevel": toWholeNumber, "reorderAmount": toWholeNumber,
+    }),
+    "supplierTable": ("supplierID", {
+        "supplierName": toText, "supplierAddress": toText, "supplierPhone": toText, "supplierEmail": toText,
+    }),
+    "customerTable": ("customerID", {
+        "customerName": toText, "customerAddress": toText, "customerPhone": toText, "customerEmail": toText,
+    }),
+}
+
+
+def convertValue(tableName, columnName, text):
+    """The value to store for text typed into a cell; raises ValueError if it is not valid there."""
+    _, converters = EDITABLE_TABLES[tableName]
+    if columnName not in converters:
+        raise ValueError(f"{columnName} cannot be edited here")
+    try:
+        return converters[columnName](text)
+    except ValueError as e:
+        raise ValueError(f"'{text}' is not a valid {columnName}: {e}.") from None
+
+
+def saveChanges(connection, tableName, changes):
+    """UPDATE every changed row. Returns the number of rows updated."""
+    keyColumn, converters = EDITABLE_TABLES[tableName]
+
+    batches = {}
+    for recordID, changedValues in changes.items():
+        columnNames = tuple(sorted(changedValues))
+        if any(columnName not in converters for columnName in columnNames):
+            raise ValueError(f"{tableName} columns {columnNames} cannot all be edited")
+        batches.setdefault(columnNames, []).append(
+            [changedValues[columnName] for columnName in columnNames] + [recordID]
+        )
+
+    rowsUpdated = 0
+    for columnNames, rows in batches.items():
+        assignments = ", ".join(f"{columnName} = ?" for columnName in columnNames)
+        cursor = connection.executemany(f"UPDATE {tableName} SET {assignments} WHERE {keyColumn} = ?", rows)
+        rowsUpdated += max(cursor.rowcount, 0)
+    return rowsUpdated
+
+
+def describeChanges(changes, limit=20):
+    """One line for the audit log: which columns changed on how many rows, and the first IDs."""
+    columnCounts = {}
+    for changedValues in changes.values():
+        for columnName in changedValues:
+            columnCounts[columnName] = columnCounts.get(columnName, 0) + 1
+
+    recordIDs = [str(recordID) for recordID in changes]
+    shownIDs = ", ".join(recordIDs[:limit]) + (f" and {len(recordIDs) - limit} more" if len(recordIDs) > limit else "")
+    columns = ", ".join(f"{columnName} x{count}" for columnName, count in sorted(columnCounts.items()))
+    return f"Bulk edit of {len(changes)} rows ({columns}): {shownIDs}"
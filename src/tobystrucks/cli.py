@@ -0,0 +1,170 @@
+"""
+Command line interface: `python -m tobystrucks <command>` (run from `src/`).
+
+Runs the reports, imports and exports without starting the Tkinter screens, so
+they can be scripted or scheduled on a machine with no display.
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from tobystrucks import passwords
+from tobystrucks.database import connectDatabase, closeDatabase
+from tobystrucks.exporter import exportQuery
+from tobystrucks.importer import TABLE_SCHEMAS, importCsv
+from tobystrucks.logs import archiveOldLogs
+from tobystrucks.migrations import getSchemaVersion, migrateDatabase
+from tobystrucks.reports import profitReport, stockReport, receipt, formatReceipt, reorderNotes, formatReorderNote, writeReorderNotes
+from tobystrucks.stock import stockAt, stockHistory
+
+#----------------------------------------------------------------------------------------------------------
+#### COMMANDS ####
+
+def printLines(lines):
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def profitCommand(connection, arguments):
+    printLines(profitReport(connection, arguments.year, includeLines=arguments.lines))
+
+
+def stockCommand(connection, arguments):
+    printLines(stockReport(connection))
+
+
+def stockHistoryCommand(connection, arguments):
+    if arguments.at:
+        print(stockAt(connection, arguments.truckID, arguments.at))
+        return
+    movements = stockHistory(connection, arguments.truckID)
+    if not movements:
+        raise SystemExit(f"No stock movements for truck {arguments.truckID}")
+    printLines(f"{timestamp}  {movementType:<10} {quantity:+6d} {balance:6d}  {orderID:<8} {note}"
+               for _, timestamp, movementType, quantity, balance, orderID, note in movements)
+
+
+def receiptCommand(connection, arguments):
+    orderRows, truckRows = receipt(connection, arguments.orderID)
+    if not orderRows:
+        raise SystemExit(f"No order {arguments.orderID}")
+    printLines(formatReceipt(orderRows, truckRows))
+
+
+def reorderNotesCommand(connection, arguments):
+    notes = reorderNotes(connection, arguments.supplier)
+    if not notes:
+        print("No supplier has trucks at or below their reorder level.", file=sys.stderr)
+    if arguments.output:
+        for path in writeReorderNotes(notes, arguments.output):
+            print(path)
+    else:
+        for supplierRow, truckRows in notes:
+            printLines(formatReorderNote(supplierRow, truckRows))
+
+
+def importCommand(connection, arguments):
+    def showProgress(rowsRead, rowsImported, rowsRejected, seconds):
+        rowsPerSecond = rowsRead / seconds if seconds else 0
+        print(f"\r{rowsRead:,} read, {rowsImported:,} imported, {rowsRejected:,} rejected, {rowsPerSecond:,.0f} rows/s",
+              end="", file=sys.stderr, flush=True)
+
+    result = importCsv(connection, arguments.table, arguments.csvFile, rejectPath=arguments.rejects,
+                       batchSize=arguments.batch_size, onProgress=showProgress)
+    print(file=sys.stderr)
+    if result["rejectPath"]:
+        print(f"{result['rowsRejected']} rows rejected, see {result['rejectPath']}", file=sys.stderr)
+
+
+def exportCommand(connection, arguments):
+    connection.execute("PRAGMA query_only = ON")
+    rowCount = exportQuery(connection, arguments.sql, arguments.outputFile)
+    print(f"{rowCount} rows written to {arguments.outputFile}", file=sys.stderr)
+
+
+def migrateCommand(connection, arguments):
+    print(f"Schema version {getSchemaVersion(connection)}")
+
+
+def archiveLogsCommand(connection, arguments):
+    archivedCount = archiveOldLogs(connection, arguments.archive_dir, arguments.retention_days)
+    print(f"{archivedCount} log rows archived to {arguments.archive_dir}")
+
+
+def benchmarkHashCommand(arguments):
+    passwords.main([str(arguments.iterations)] if arguments.iterations else [])
+
+#----------------------------------------------------------------------------------------------------------
+#### ARGUMENTS ####
+
+def buildParser():
+    parser = argparse.ArgumentParser(prog="python -m tobystrucks", description="Toby's Trucks reports and data tools.")
+    parser.add_argument("--database", default="data.db", help="SQLite database file (default: data.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("profit", help="print the profit report for a year")
+    command.add_argument("year", type=int)
+    command.add_argument("--lines", action="store_true", help="include every order line")
+    command.set_defaults(run=profitCommand)
+
+    command = commands.add_parser("stock", help="print the trucks in stock report")
+    command.set_defaults(run=stockCommand)
+
+    command = commands.add_parser("stock-history", help="print a truck's stock movements with the running balance")
+    command.add_argument("truckID")
+    command.add_argument("--at", help="only print the stock held at this 'yyyy-mm-dd HH:MM:SS'")
+    command.set_defaults(run=stockHistoryCommand)
+
+    command = commands.add_parser("receipt", help="print the receipt for an order")
+    command.add_argument("orderID")
+    command.set_defaults(run=receiptCommand)
+
+    command = commands.add_parser("reorder-notes", help="print or save supplier reorder notes")
+    command.add_argument("--supplier", help="only this supplier (default: every supplier with trucks to reorder)")
+    command.add_argument("--output", help="folder to save one text file per supplier into")
+    command.set_defaults(run=reorderNotesCommand)
+
+    command = commands.add_parser("import", help="load a CSV file into a table")
+    command.add_argument("table", choices=list(TABLE_SCHEMAS))
+    command.add_argument("csvFile")
+    command.add_argument("--rejects", help="reject file (default: <csvFile>.rejects.csv)")
+    command.add_argument("--batch-size", type=int, default=5000)
+    command.set_defaults(run=importCommand)
+
+    command = commands.add_parser("export", help="stream a query to .csv, .jsonl or .db")
+    command.add_argument("sql")
+    command.add_argument("outputFile")
+    command.set_defaults(run=exportCommand)
+
+    command = commands.add_parser("migrate", help="bring the database schema up to date")
+    command.set_defaults(run=migrateCommand)
+
+    command = commands.add_parser("archive-logs", help="move old log rows into compressed archive files")
+    command.add_argument("--retention-days", type=int, default=365)
+    command.add_argument("--archive-dir", default="log_archive")
+    command.set_defaults(run=archiveLogsCommand)
+
+    command = commands.add_parser("benchmark-hash", help="time a password hash on this machine")
+    command.add_argument("iterations", type=int, nargs="?")
+    command.set_defaults(run=None)
+
+    return parser
+
+
+def main(argv=None):
+    arguments = buildParser().parse_args(argv)
+
+    if arguments.command == "benchmark-hash":
+        benchmarkHashCommand(arguments)
+        return 0
+
+    connection = connectDatabase(arguments.database)
+    try:
+        migrateDatabase(connection)
+        arguments.run(connection, arguments)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        closeDatabase(connection)
+    return 0
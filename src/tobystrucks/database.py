@@ -0,0 +1,73 @@
+"""
+Connection factory for the Toby's Trucks SQLite database.
+
+Every connection the application opens goes through `connectDatabase` so that
+journaling, durability and caching settings are applied in one place.
+"""
+
+import sqlite3
+
+#----------------------------------------------------------------------------------------------------------
+#### CONNECTION SETTINGS ####
+
+# WAL lets readers carry on while a write is committing, and synchronous=NORMAL
+# only fsyncs the WAL at checkpoints instead of on every commit.
+DEFAULT_SETTINGS = {
+    "journalMode": "WAL",
+    "synchronous": "NORMAL",
+    "cacheSize": -16000,          # negative values are KiB, so roughly 16 MB of page cache
+    "mmapSize": 64 * 1024 * 1024, # bytes of the database file to memory map
+    "tempStore": "MEMORY",
+    "busyTimeout": 5000,          # milliseconds to wait on a locked database
+    "cachedStatements": 256,      # size of the sqlite3 prepared statement cache
+}
+
+
+def buildSettings(**overrides):
+    unknownSettings = set(overrides) - set(DEFAULT_SETTINGS)
+    if unknownSettings:
+        raise ValueError(f"Unknown database settings: {', '.join(sorted(unknownSettings))}")
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(overrides)
+    return settings
+
+
+def applyPragmas(connection, settings):
+    connection.execute(f"PRAGMA journal_mode = {settings['journalMode']}")
+    connection.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    connection.execute(f"PRAGMA cache_size = {int(settings['cacheSize'])}")
+    connection.execute(f"PRAGMA mmap_size = {int(settings['mmapSize'])}")
+    connection.execute(f"PRAGMA temp_store = {settings['tempStore']}")
+    connection.execute(f"PRAGMA busy_timeout = {int(settings['busyTimeout'])}")
+
+#----------------------------------------------------------------------------------------------------------
+#### OPEN AND CLOSE ####
+
+def connectDatabase(path="data.db", factory=sqlite3.Connection, **overrides):
+    """Open a tuned connection. Any key of DEFAULT_SETTINGS can be overridden.
+
+    factory is passed to sqlite3.connect, e.g. a StatementProfiler's connection class."""
+    settings = buildSettings(**overrides)
+
+    connection = sqlite3.connect(
+        path,
+        timeout=settings["busyTimeout"] / 1000,
+        cached_statements=settings["cachedStatements"],
+        factory=factory,
+    )
+    applyPragmas(connection, settings)
+    return connection
+
+
+def closeDatabase(connection):
+    """Commit, checkpoint the WAL back into the main file and close."""
+    try:
+        if connection.in_transaction:
+            connection.commit()
+        connection.execute("PRAGMA optimize")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except sqlite3.Error as e:
+        print(f"Cannot checkpoint database: {e}")
+    finally:
+        connection.close()
@@ -0,0 +1,42 @@
+"""
+Date helpers. Dates are stored as ISO-8601 text (YYYY-MM-DD) so they sort and
+range-scan correctly; the screens still show and accept dd/mm/yyyy.
+"""
+
+from datetime import datetime
+
+DISPLAY_FORMAT = "%d/%m/%Y"
+ISO_FORMAT = "%Y-%m-%d"
+
+
+def toIsoDate(text):
+    """Convert a dd/mm/yyyy (or already ISO) date to YYYY-MM-DD. Raises ValueError if invalid."""
+    text = text.strip()
+    for dateFormat in (DISPLAY_FORMAT, ISO_FORMAT):
+        try:
+            return datetime.strptime(text, dateFormat).strftime(ISO_FORMAT)
+        except ValueError:
+            pass
+    raise ValueError(f"'{text}' is not a valid date, use dd/mm/yyyy")
+
+
+def toDisplayDate(isoText):
+    """Convert a stored YYYY-MM-DD date to dd/mm/yyyy, leaving anything unparseable untouched."""
+    if not isoText:
+        return ""
+    try:
+        return datetime.strptime(isoText[:10], ISO_FORMAT).strftime(DISPLAY_FORMAT)
+    except ValueError:
+        return isoText
+
+
+def toDisplayTimestamp(isoText):
+    """Convert a stored 'YYYY-MM-DD HH:MM:SS' timestamp to 'dd/mm/yyyy HH:MM:SS'."""
+    if not isoText:
+        return ""
+    return (toDisplayDate(isoText[:10]) + isoText[10:]).strip()
+
+
+def yearRange(year):
+    """First and last ISO dates of a year, for `orderDate BETWEEN ? AND ?`."""
+    return (f"{int(year):04d}-01-01", f"{int(year):04d}-12-31")
@@ -0,0 +1,229 @@
+"""
+Background query executor.
+
+A single worker thread owns its own read connection and runs query jobs one at a
+time, streaming row batches back through a queue. The UI thread drains that queue
+with `pump()` (normally from a `widget.after` loop via `startPolling`), so every
+callback runs on the thread that owns the widgets.
+
+The queue holds at most `maxBatches` batches. When the UI falls behind, the worker
+waits for room instead of reading further ahead, so a large result is never
+buffered in memory all at once; cancelling the job ends the wait.
+"""
+
+import queue
+import sqlite3
+import threading
+
+from tobystrucks.database import connectDatabase
+
+#----------------------------------------------------------------------------------------------------------
+#### JOBS ####
+
+class QueryJob:
+    """Handle for a submitted query. Call `cancel()` to stop it."""
+
+    def __init__(self, executor, sql=None, params=(), function=None, onBatch=None, onDone=None,
+                 onError=None, onCancel=None, batchSize=200, maxRows=None):
+        self.executor = executor
+        self.sql = sql
+        self.params = params
+        self.function = function
+        self.onBatch = onBatch
+        self.onDone = onDone
+        self.onError = onError
+        self.onCancel = onCancel
+        self.batchSize = batchSize
+        self.maxRows = maxRows
+        self.columns = []
+        self.cancelled = False
+        self.finished = False
+
+    def cancel(self):
+        self.executor.cancel(self)
+
+#----------------------------------------------------------------------------------------------------------
+#### EXECUTOR ####
+
+class QueryExecutor:
+
+    def __init__(self, databasePath, batchSize=200, maxBatches=8, **connectionSettings):
+        self.databasePath = databasePath
+        self.batchSize = batchSize
+        self.connectionSettings = connectionSettings
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue(maxsize=maxBatches)
+        self.stopping = False
+        self.lock = threading.Lock()
+        self.connection = None
+        self.currentJob = None
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="QueryExecutor", daemon=True)
+            self.thread.start()
+
+    def submit(self, sql, params=(), onBatch=None, onDone=None, onError=None, onCancel=None, batchSize=None, maxRows=None):
+        """Run a query, calling onBatch(job, rows) per batch and onDone(job, rowCount) at the end."""
+        job = QueryJob(self, sql=sql, params=params, onBatch=onBatch, onDone=onDone, onError=onError,
+                       onCancel=onCancel, batchSize=batchSize or self.batchSize, maxRows=maxRows)
+        self.start()
+        self.jobs.put(job)
+        return job
+
+    def submitCall(self, function, onDone=None, onError=None, onCancel=None):
+        """Run function(connection) on the worker and call onDone(job, result) with its return value."""
+        job = QueryJob(self, function=function, onDone=onDone, onError=onError, onCancel=onCancel)
+        self.start()
+        self.jobs.put(job)
+        return job
+
+    def cancel(self, job):
+        with self.lock:
+            if job.finished or job.cancelled:
+                return
+            job.cancelled = True
+            if self.currentJob is job and self.connection is not None:
+                self.connection.interrupt()
+
+    def shutdown(self, timeout=2):
+        self.stopping = True
+        with self.lock:
+            if self.currentJob is not None:
+                self.currentJob.cancelled = True
+                if self.connection is not None:
+                    self.connection.interrupt()
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+        self.stopping = False
+
+    #------------------------------------------------------------------------------------------------------
+    #### WORKER THREAD ####
+
+    def run(self):
+        self.connection = connectDatabase(self.databasePath, **self.connectionSettings)
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                self.runJob(job)
+        finally:
+            self.connection.close()
+            self.connection = None
+
+    def runJob(self, job):
+        with self.lock:
+            cancelled = job.cancelled
+            if not cancelled:
+                self.currentJob = job
+        if cancelled:
+            self.putResult(("cancelled", job, None))
+            return
+
+        try:
+            if job.function is not None:
+                outcome = ("done", job, job.function(self.connection))
+            else:
+                outcome = ("done", job, self.streamRows(job))
+
+            if self.connection.in_transaction:
+                self.connection.commit()
+        except sqlite3.OperationalError as e:
+            outcome = ("cancelled", job, None) if job.cancelled else ("error", job, e)
+        except Exception as e:
+            outcome = ("error", job, e)
+
+        if self.connection.in_transaction:
+            self.connection.rollback()
+
+        with self.lock:
+            self.currentJob = None
+            job.finished = True
+            if job.cancelled:
+                outcome = ("cancelled", job, None)
+        self.putResult(outcome)
+
+    def putResult(self, outcome):
+        """Queue a job's final outcome, waiting for the UI to make room."""
+        while not self.stopping:
+            try:
+                self.results.put(outcome, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def putBatch(self, job, rows):
+        """Queue a batch, waiting for room. False if the job was cancelled while waiting."""
+        while not (job.cancelled or self.stopping):
+            try:
+                self.results.put(("batch", job, rows), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def streamRows(self, job):
+        cursor = self.connection.execute(job.sql, job.params)
+        job.columns = [column[0] for column in cursor.description or []]
+
+        rowCount = 0
+        while not job.cancelled:
+            batchSize = job.batchSize
+            if job.maxRows is not None:
+                batchSize = min(batchSize, job.maxRows - rowCount)
+                if batchSize <= 0:
+                    break
+
+            rows = cursor.fetchmany(batchSize)
+            if not rows:
+                break
+            rowCount += len(rows)
+            if not self.putBatch(job, rows):
+                break
+
+        cursor.close()
+        return rowCount
+
+    #------------------------------------------------------------------------------------------------------
+    #### UI THREAD ####
+
+    def pump(self):
+        """Deliver finished batches and results. Must be called on the UI thread."""
+        # No more than a queue's worth per call, so a fast worker cannot keep the UI here.
+        for _ in range(self.results.maxsize):
+            try:
+                kind, job, payload = self.results.get_nowait()
+            except queue.Empty:
+                return
+
+            # Whatever a cancelled job produced after cancel() is dropped.
+            if job.cancelled:
+                if kind != "batch" and job.onCancel is not None:
+                    job.onCancel(job)
+                continue
+
+            if kind == "batch":
+                if not job.cancelled and job.onBatch is not None:
+                    job.onBatch(job, payload)
+            elif kind == "done":
+                if job.onDone is not None:
+                    job.onDone(job, payload)
+            elif kind == "error":
+                if job.onError is not None:
+                    job.onError(job, payload)
+            elif kind == "cancelled":
+                if job.onCancel is not None:
+                    job.onCancel(job)
+
+    def startPolling(self, widget, interval=50):
+        def poll():
+            try:
+                self.pump()
+            finally:
+                widget.after(interval, poll)
+        widget.after(interval, poll)
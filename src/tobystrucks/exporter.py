@@ -0,0 +1,144 @@
+"""
+Streaming query export.
+
+The query is read with `fetchmany` and each batch is written straight to the
+output file, so memory use stays the same whatever the size of the result.
+The format is chosen from the file extension: CSV (with a header row), JSON
+Lines (one object per row) or a new SQLite database holding a `results` table.
+
+Rows are written to `<path>.partial` next to the target, which replaces the target
+only once the export has finished, so a failed export leaves any existing file as
+it was. Exporting over the database being queried is refused.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+
+#----------------------------------------------------------------------------------------------------------
+#### FORMATS ####
+
+def columnNames(cursor):
+    """Column names from cursor.description, made unique so they can be keys or table columns."""
+    names = []
+    for column in cursor.description or []:
+        name = column[0] or "column"
+        uniqueName = name
+        suffix = 2
+        while uniqueName in names:
+            uniqueName = f"{name}_{suffix}"
+            suffix += 1
+        names.append(uniqueName)
+    return names
+
+
+def batches(cursor, batchSize):
+    while True:
+        rows = cursor.fetchmany(batchSize)
+        if not rows:
+            return
+        yield rows
+
+
+def jsonValue(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def writeCsv(cursor, path, batchSize):
+    rowCount = 0
+    with open(path, "w", newline="", encoding="utf-8") as outputFile:
+        writer = csv.writer(outputFile)
+        writer.writerow(columnNames(cursor))
+        for rows in batches(cursor, batchSize):
+            writer.writerows([value.hex() if isinstance(value, bytes) else value for value in row] for row in rows)
+            rowCount += len(rows)
+    return rowCount
+
+
+def writeJsonLines(cursor, path, batchSize):
+    names = columnNames(cursor)
+    rowCount = 0
+    with open(path, "w", encoding="utf-8") as outputFile:
+        for rows in batches(cursor, batchSize):
+            outputFile.writelines(json.dumps(dict(zip(names, row)), default=jsonValue) + "\n" for row in rows)
+            rowCount += len(rows)
+    return rowCount
+
+
+def writeSqlite(cursor, path, batchSize):
+    names = columnNames(cursor)
+    quotedNames = ", ".join('"' + name.replace('"', '""') + '"' for name in names)
+
+    rowCount = 0
+    output = sqlite3.connect(path)
+    try:
+        output.execute(f"CREATE TABLE results ({quotedNames})")
+        insertSql = f"INSERT INTO results VALUES ({', '.join('?' * len(names))})"
+        for rows in batches(cursor, batchSize):
+            output.executemany(insertSql, rows)
+            rowCount += len(rows)
+        output.commit()
+    finally:
+        output.close()
+    return rowCount
+
+
+EXPORT_FORMATS = {
+    ".csv": writeCsv,
+    ".jsonl": writeJsonLines,
+    ".db": writeSqlite,
+    ".sqlite": writeSqlite,
+}
+
+#----------------------------------------------------------------------------------------------------------
+#### EXPORT ####
+
+def partialPath(path):
+    """Where an export to path is written until it has finished."""
+    return path + ".partial"
+
+
+def databaseFiles(connection):
+    """Paths of the files behind the connection's main and attached databases."""
+    return [row[2] for row in connection.execute("PRAGMA database_list") if row[2]]
+
+
+def isDatabaseFile(connection, path):
+    if not os.path.exists(path):
+        return False
+    for databaseFile in databaseFiles(connection):
+        for fileName in (databaseFile, databaseFile + "-wal", databaseFile + "-shm", databaseFile + "-journal"):
+            if os.path.exists(fileName) and os.path.samefile(path, fileName):
+                return True
+    return False
+
+
+def exportQuery(connection, sql, path, params=(), batchSize=1000):
+    """Run sql and stream every row into path. Returns the number of rows written.
+
+    If the export fails part way (including being interrupted) the partial file is
+    removed and any file already at path is left untouched."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot export to '{extension}' files, use one of {', '.join(EXPORT_FORMATS)}")
+    if isDatabaseFile(connection, path):
+        raise ValueError(f"Cannot export to {path}: it is the database being queried")
+
+    unfinishedPath = partialPath(path)
+    if os.path.exists(unfinishedPath):
+        os.remove(unfinishedPath)    # left by an export that was killed part way
+
+    cursor = connection.execute(sql, params)
+    try:
+        rowCount = EXPORT_FORMATS[extension](cursor, unfinishedPath, batchSize)
+        os.replace(unfinishedPath, path)
+        return rowCount
+    except BaseException:
+        if os.path.exists(unfinishedPath):
+            os.remove(unfinishedPath)
+        raise
+    finally:
+        cursor.close()
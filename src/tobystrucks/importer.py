@@ -0,0 +1,262 @@
+"""
+Streaming CSV import.
+
+Rows are read one at a time from the CSV file, checked against the table
+schemas in DB_STRUCTURES.md and inserted with `executemany` in large batches,
+all inside a single transaction. Secondary indexes on the target table are
+dropped for the load and rebuilt once at the end. Rows that fail validation or
+break a key are written to a reject file with the reason, and the rest of the
+file still loads.
+
+The transaction holds the database's write lock until the import commits or
+rolls back. Other connections can still read, but a write waits for its busy
+timeout and then fails with "database is locked", so the screens refuse to save
+while an import of theirs is running.
+
+Imported order lines are order history, so they do not move stock: the stock
+ledger's sale trigger is paused for the import (see stockLedgerPauseTable in
+DB_STRUCTURES.md). Import trucks with the stock they have now.
+"""
+
+import csv
+import os
+import sqlite3
+import time
+
+from tobystrucks.dates import toIsoDate
+
+#----------------------------------------------------------------------------------------------------------
+#### TABLE SCHEMAS ####
+
+# table: [(column, type, required), ...] in insert order. Key columns are required.
+TABLE_SCHEMAS = {
+    "truckTable": [
+        ("truckID", "TEXT", True),
+        ("make", "TEXT", False),
+        ("model", "TEXT", False),
+        ("size", "TEXT", False),
+        ("truckSupplierID", "TEXT", False),
+        ("buyingPrice", "FLOAT", False),
+        ("sellingPrice", "FLOAT", False),
+        ("stockLevel", "INTEGER", False),
+        ("reorderLevel", "INTEGER", False),
+        ("reorderAmount", "INTEGER", False),
+    ],
+    "supplierTable": [
+        ("supplierID", "TEXT", True),
+        ("supplierName", "TEXT", False),
+        ("supplierAddress", "TEXT", False),
+        ("supplierPhone", "TEXT", False),
+        ("supplierEmail", "TEXT", False),
+    ],
+    "customerTable": [
+        ("customerID", "TEXT", True),
+        ("customerName", "TEXT", False),
+        ("customerAddress", "TEXT", False),
+        ("customerPhone", "TEXT", False),
+        ("customerEmail", "TEXT", False),
+    ],
+    "orderTable": [
+        ("orderID", "TEXT", True),
+        ("orderCustomerID", "TEXT", False),
+        ("orderDate", "DATE", False),
+        ("paid", "FLAG", False),
+    ],
+    "orderItemsTable": [
+        ("orderItemsOrderID", "TEXT", True),
+        ("orderItemsTruckID", "TEXT", True),
+        ("quantity", "INTEGER", True),
+    ],
+}
+
+
+def convertValue(text, columnType):
+    """Convert one CSV field to the value stored for columnType. Raises ValueError."""
+    if columnType == "INTEGER":
+        return int(text)
+    if columnType == "FLOAT":
+        return float(text)
+    if columnType == "DATE":
+        return toIsoDate(text)
+    if columnType == "FLAG":
+        flag = text.upper()
+        if flag not in ("Y", "N"):
+            raise ValueError(f"'{text}' is not Y or N")
+        return flag
+    return text
+
+
+def validateRow(schema, fields):
+    """Tuple of converted values for one row, in schema order. Raises ValueError with the reason."""
+    values = []
+    for (columnName, columnType, required), text in zip(schema, fields):
+        text = text.strip()
+        if not text:
+            if required:
+                raise ValueError(f"{columnName} is required")
+            values.append(None)
+            continue
+        try:
+            values.append(convertValue(text, columnType))
+        except ValueError:
+            raise ValueError(f"{columnName} '{text}' is not a valid {columnType.lower()}") from None
+    return tuple(values)
+
+#----------------------------------------------------------------------------------------------------------
+#### READING ####
+
+def readCsvRows(path, tableName):
+    """Yield (lineNumber, fields, values, error) for every data row of a CSV file.
+
+    The header row names the columns, in any order and case; fields are returned in
+    schema order. values is None and error says why when a row is invalid."""
+    schema = TABLE_SCHEMAS[tableName]
+
+    with open(path, newline="", encoding="utf-8-sig") as csvFile:
+        reader = csv.reader(csvFile)
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        missing = [columnName for columnName, _, _ in schema if columnName.lower() not in header]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)} has no column for: {', '.join(missing)}")
+        positions = [header.index(columnName.lower()) for columnName, _, _ in schema]
+
+        for fields in reader:
+            if not any(field.strip() for field in fields):
+                continue
+            if len(fields) < len(header):
+                yield reader.line_num, fields, None, f"expected {len(header)} fields, found {len(fields)}"
+                continue
+
+            ordered = [fields[position] for position in positions]
+            try:
+                yield reader.line_num, ordered, validateRow(schema, ordered), None
+            except ValueError as e:
+                yield reader.line_num, ordered, None, str(e)
+
+#----------------------------------------------------------------------------------------------------------
+#### IMPORT ####
+
+class RejectWriter:
+    """Opens the reject file only when the first bad row turns up."""
+
+    def __init__(self, path, columnNames):
+        self.path = path
+        self.columnNames = columnNames
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def reject(self, lineNumber, fields, reason):
+        if self.writer is None:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["line"] + self.columnNames + ["error"])
+        self.writer.writerow([lineNumber] + list(fields) + [reason])
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def secondaryIndexes(connection, tableName):
+    """[(name, sql)] of the explicitly created indexes on a table (not key autoindexes)."""
+    return connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (tableName,)
+    ).fetchall()
+
+
+def importCsv(connection, tableName, path, rejectPath=None, batchSize=5000, onProgress=None, cancelled=None):
+    """Load a CSV file into tableName. Returns a dict of counts.
+
+    onProgress(rowsRead, rowsImported, rowsRejected, seconds) is called after every
+    batch. If cancelled() becomes true the whole import is rolled back."""
+    if tableName not in TABLE_SCHEMAS:
+        raise ValueError(f"Cannot import into {tableName}")
+
+    schema = TABLE_SCHEMAS[tableName]
+    columnNames = [columnName for columnName, _, _ in schema]
+    insertSql = f"INSERT INTO {tableName} ({', '.join(columnNames)}) VALUES ({', '.join('?' * len(columnNames))})"
+
+    rejectPath = rejectPath or os.path.splitext(path)[0] + ".rejects.csv"
+    rejects = RejectWriter(rejectPath, columnNames)
+    pausesLedger = tableName == "orderItemsTable"
+    rowsRead = 0
+    rowsImported = 0
+    started = time.perf_counter()
+
+    def insertBatch(batch):
+        # One executemany per batch; if any row breaks a key, redo that batch row by row.
+        connection.execute("SAVEPOINT importBatch")
+        try:
+            connection.executemany(insertSql, [values for _, _, values in batch])
+            connection.execute("RELEASE importBatch")
+            return len(batch)
+        except sqlite3.IntegrityError:
+            connection.execute("ROLLBACK TO importBatch")
+            connection.execute("RELEASE importBatch")
+
+        inserted = 0
+        for lineNumber, fields, values in batch:
+            try:
+                connection.execute(insertSql, values)
+                inserted += 1
+            except sqlite3.IntegrityError as e:
+                rejects.reject(lineNumber, fields, str(e))
+        return inserted
+
+    if connection.in_transaction:
+        connection.commit()
+
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        if pausesLedger:
+            connection.execute("INSERT INTO stockLedgerPauseTable (reason) VALUES ('Order history import')")
+        indexes = secondaryIndexes(connection, tableName)
+        for indexName, _ in indexes:
+            connection.execute(f"DROP INDEX {indexName}")
+
+        batch = []
+        for lineNumber, fields, values, error in readCsvRows(path, tableName):
+            rowsRead += 1
+            if error is not None:
+                rejects.reject(lineNumber, fields, error)
+                continue
+
+            batch.append((lineNumber, fields, values))
+            if len(batch) >= batchSize:
+                rowsImported += insertBatch(batch)
+                batch = []
+                if onProgress is not None:
+                    onProgress(rowsRead, rowsImported, rejects.count, time.perf_counter() - started)
+                if cancelled is not None and cancelled():
+                    raise InterruptedError("Import cancelled")
+
+        if batch:
+            rowsImported += insertBatch(batch)
+
+        for _, indexSql in indexes:
+            connection.execute(indexSql)
+        connection.execute(f"ANALYZE {tableName}")
+        if pausesLedger:
+            connection.execute("DELETE FROM stockLedgerPauseTable")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        rejects.close()
+
+    seconds = time.perf_counter() - started
+    if onProgress is not None:
+        onProgress(rowsRead, rowsImported, rejects.count, seconds)
+
+    return {
+        "rowsRead": rowsRead,
+        "rowsImported": rowsImported,
+        "rowsRejected": rejects.count,
+        "seconds": seconds,
+        "rejectPath": rejectPath if rejects.count else None,
+    }
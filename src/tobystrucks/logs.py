@@ -0,0 +1,163 @@
+"""
+System log queries shared by the log viewer and the command line, plus log
+retention: rows older than the retention period are moved out of logsTable into
+gzip-compressed JSON Lines files, one segment per month, which can still be searched.
+"""
+
+import glob
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from tobystrucks import queries
+from tobystrucks.dates import ISO_FORMAT
+from tobystrucks.queries import LOG_COLUMNS, LOG_FILTER_COLUMNS
+
+
+def buildLogFilter(userID="", action="", tableName="", recordID="", dateFrom="", dateTo=""):
+    """WHERE clause and parameters for logsTable. Dates are ISO YYYY-MM-DD and inclusive.
+
+    Every condition is a plain equality or range on an indexed column, so the planner
+    can pick whichever of the log indexes is most selective."""
+    conditions = []
+    params = []
+
+    if userID:
+        conditions.append("userID = ?")
+        params.append(userID)
+    if action:
+        conditions.append("action = ?")
+        params.append(action)
+    if tableName:
+        conditions.append("tableName = ?")
+        params.append(tableName)
+    if recordID:
+        conditions.append("recordID = ?")
+        params.append(recordID)
+    if dateFrom:
+        conditions.append("timestamp >= ?")
+        params.append(dateFrom)
+    if dateTo:
+        dayAfter = datetime.strptime(dateTo, ISO_FORMAT) + timedelta(days=1)
+        conditions.append("timestamp < ?")
+        params.append(dayAfter.strftime(ISO_FORMAT))
+
+    return " AND ".join(conditions), params
+
+
+def distinctLogValues(connection, columnName):
+    """Distinct values of an indexed log column, for filter drop-downs."""
+    if columnName not in LOG_FILTER_COLUMNS:
+        raise ValueError(f"Cannot list values of {columnName}")
+    return [row[0] for row in queries.execute(connection, f"{columnName}LogValues")]
+
+#----------------------------------------------------------------------------------------------------------
+#### RETENTION AND ARCHIVING ####
+
+ARCHIVE_PREFIX = "logs-"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}")
+
+
+def archiveSegmentName(timestamp):
+    month = timestamp[:7] if timestamp and MONTH_PATTERN.match(timestamp) else "undated"
+    return ARCHIVE_PREFIX + month + ARCHIVE_SUFFIX
+
+
+def writeArchiveSegments(archiveDirectory, rows):
+    """Append rows to their monthly segment. Each append adds a new gzip member,
+    which gzip readers treat as one continuous stream."""
+    rowsBySegment = {}
+    for row in rows:
+        rowsBySegment.setdefault(archiveSegmentName(row[6]), []).append(row)
+
+    for segmentName, segmentRows in rowsBySegment.items():
+        with gzip.open(os.path.join(archiveDirectory, segmentName), "at", encoding="utf-8") as segment:
+            for row in segmentRows:
+                segment.write(json.dumps(dict(zip(LOG_COLUMNS, row))) + "\n")
+
+
+def archiveOldLogs(connection, archiveDirectory, retentionDays=365, batchSize=500, now=None):
+    """Move log rows older than retentionDays into the archive, batchSize rows at a time.
+
+    Each batch is written to its segment file before it is deleted, and each delete is
+    its own short transaction, so other writers are never held up for long. Returns the
+    number of rows archived."""
+    cutoff = ((now or datetime.now()) - timedelta(days=retentionDays)).strftime("%Y-%m-%d %H:%M:%S")
+    os.makedirs(archiveDirectory, exist_ok=True)
+
+    archivedCount = 0
+    while True:
+        rows = queries.execute(connection, "archivableLogs", (cutoff, batchSize)).fetchall()
+        if not rows:
+            break
+
+        writeArchiveSegments(archiveDirectory, rows)
+        with connection:
+            queries.executemany(connection, "deleteLog", [(row[0],) for row in rows])
+        archivedCount += len(rows)
+
+    return archivedCount
+
+
+def searchArchivedLogs(archiveDirectory, userID="", action="", tableName="", recordID="", dateFrom="", dateTo="", limit=1000,
+                       badSegments=None):
+    """Yield archived log records (as dicts, newest segment first) matching the same
+    filters as buildLogFilter. Segments outside the date range are not opened.
+
+    A segment that cannot be read to the end (truncated, corrupt or not JSON) is
+    skipped after the records read from it so far, and (segmentName, error) is
+    appended to badSegments if a list is given."""
+    filters = {"userID": userID, "action": action, "tableName": tableName, "recordID": recordID}
+    filters = {columnName: value for columnName, value in filters.items() if value}
+    dayAfterTo = ""
+    if dateTo:
+        dayAfterTo = (datetime.strptime(dateTo, ISO_FORMAT) + timedelta(days=1)).strftime(ISO_FORMAT)
+
+    segmentPaths = sorted(glob.glob(os.path.join(archiveDirectory, ARCHIVE_PREFIX + "*" + ARCHIVE_SUFFIX)), reverse=True)
+    seenLogIDs = set()
+    found = 0
+
+    for segmentPath in segmentPaths:
+        month = os.path.basename(segmentPath)[len(ARCHIVE_PREFIX):-len(ARCHIVE_SUFFIX)]
+        if MONTH_PATTERN.match(month):
+            if dateFrom and month < dateFrom[:7]:
+                continue
+            if dateTo and month > dateTo[:7]:
+                continue
+
+        try:
+            yield from searchSegment(segmentPath, filters, dateFrom, dayAfterTo, seenLogIDs, limit - found)
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            # gzip.BadGzipFile is an OSError; a truncated segment raises EOFError
+            if badSegments is not None:
+                badSegments.append((os.path.basename(segmentPath), str(e) or type(e).__name__))
+        found = len(seenLogIDs)
+        if found >= limit:
+            return
+
+
+def searchSegment(segmentPath, filters, dateFrom, dayAfterTo, seenLogIDs, limit):
+    """Yield up to limit matching records from one archive segment, adding their IDs to seenLogIDs."""
+    found = 0
+    with gzip.open(segmentPath, "rt", encoding="utf-8") as segment:
+        for line in segment:
+            record = json.loads(line)
+            timestamp = record.get("timestamp") or ""
+            if any(record.get(columnName) != value for columnName, value in filters.items()):
+                continue
+            if dateFrom and timestamp < dateFrom:
+                continue
+            if dayAfterTo and timestamp >= dayAfterTo:
+                continue
+            # A batch can be archived twice if the app stopped between writing and deleting it
+            if record["logID"] in seenLogIDs:
+                continue
+            seenLogIDs.add(record["logID"])
+
+            yield record
+            found += 1
+            if found >= limit:
+                return
@@ -0,0 +1,513 @@
+"""
+Versioned schema migrations for the Toby's Trucks database.
+
+The schema version is stored in `PRAGMA user_version`. Each migration runs
+once, inside its own transaction, and bumps the version when it commits.
+"""
+
+import sqlite3
+
+#----------------------------------------------------------------------------------------------------------
+#### MIGRATIONS ####
+
+def searchIndexStatements(tableName, keyColumn, title, details):
+    """Backfill and triggers keeping one table's rows in searchIndex (migration 8).
+
+    title and details are SQL expressions with {row} where the row name goes:
+    the table itself for the backfill, NEW or OLD in the triggers."""
+    def searchID(row):
+        return f"(SELECT searchID FROM searchKeyTable WHERE tableName = '{tableName}' AND recordID = IFNULL({row}.{keyColumn}, ''))"
+
+    def addRow(row):
+        return f"""
+            INSERT OR IGNORE INTO searchKeyTable (tableName, recordID) VALUES ('{tableName}', IFNULL({row}.{keyColumn}, ''));
+            INSERT INTO searchIndex (rowid, tableName, recordID, title, details)
+            VALUES ({searchID(row)}, '{tableName}', IFNULL({row}.{keyColumn}, ''), {title.format(row=row)}, {details.format(row=row)});
+        """
+
+    def removeRow(row):
+        return f"""
+            DELETE FROM searchIndex WHERE rowid = {searchID(row)};
+            DELETE FROM searchKeyTable WHERE tableName = '{tableName}' AND recordID = IFNULL({row}.{keyColumn}, '');
+        """
+
+    return [
+        f"""
+        INSERT OR IGNORE INTO searchKeyTable (tableName, recordID)
+        SELECT '{tableName}', IFNULL({keyColumn}, '') FROM {tableName}
+        """,
+        f"""
+        INSERT INTO searchIndex (rowid, tableName, recordID, title, details)
+        SELECT searchID, '{tableName}', recordID, {title.format(row=tableName)}, {details.format(row=tableName)}
+        FROM searchKeyTable JOIN {tableName} ON IFNULL({tableName}.{keyColumn}, '') = recordID
+        WHERE searchKeyTable.tableName = '{tableName}'
+        GROUP BY searchID
+        """,
+        f"CREATE TRIGGER IF NOT EXISTS {tableName}SearchInsert AFTER INSERT ON {tableName} BEGIN {addRow('NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {tableName}SearchDelete AFTER DELETE ON {tableName} BEGIN {removeRow('OLD')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {tableName}SearchUpdate AFTER UPDATE ON {tableName} BEGIN {removeRow('OLD')} {addRow('NEW')} END",
+    ]
+
+# (version, description, statements) - append new migrations, never edit old ones.
+MIGRATIONS = [
+    (1, "Create base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS truckTable (
+            truckID TEXT PRIMARY KEY,
+            make TEXT,
+            model TEXT,
+            size TEXT,
+            truckSupplierID TEXT,
+            buyingPrice FLOAT,
+            sellingPrice FLOAT,
+            stockLevel INTEGER,
+            reorderLevel INTEGER,
+            reorderAmount INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS supplierTable (
+            supplierID TEXT PRIMARY KEY,
+            supplierName TEXT,
+            supplierAddress TEXT,
+            supplierPhone TEXT,
+            supplierEmail TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS customerTable (
+            customerID TEXT PRIMARY KEY,
+            customerName TEXT,
+            customerAddress TEXT,
+            customerPhone TEXT,
+            customerEmail TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orderTable (
+            orderID TEXT PRIMARY KEY,
+            orderCustomerID TEXT,
+            orderDate TEXT,
+            paid TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orderItemsTable (
+            orderItemsOrderID TEXT,
+            orderItemsTruckID TEXT,
+            quantity INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS userTable (
+            userID TEXT PRIMARY KEY,
+            username TEXT UNIQUE,
+            passwordHash TEXT,
+            salt TEXT,
+            role TEXT,
+            createdDate TEXT,
+            isActive TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS logsTable (
+            logID INTEGER PRIMARY KEY AUTOINCREMENT,
+            userID TEXT,
+            username TEXT,
+            action TEXT,
+            tableName TEXT,
+            recordID TEXT,
+            timestamp TEXT,
+            details TEXT
+        )
+        """,
+    ]),
+    (2, "Key orderItemsTable and index join and filter columns", [
+        # Rebuild orderItemsTable with a composite primary key. The screens already
+        # treat (order, truck) as the identity of a line, so duplicates are merged.
+        """
+        CREATE TABLE orderItemsTableNew (
+            orderItemsOrderID TEXT,
+            orderItemsTruckID TEXT,
+            quantity INTEGER,
+            PRIMARY KEY (orderItemsOrderID, orderItemsTruckID)
+        )
+        """,
+        """
+        INSERT INTO orderItemsTableNew (orderItemsOrderID, orderItemsTruckID, quantity)
+        SELECT orderItemsOrderID, orderItemsTruckID, SUM(quantity)
+        FROM orderItemsTable
+        GROUP BY orderItemsOrderID, orderItemsTruckID
+        """,
+        "DROP TABLE orderItemsTable",
+        "ALTER TABLE orderItemsTableNew RENAME TO orderItemsTable",
+        "CREATE INDEX IF NOT EXISTS orderItemsTruckIndex ON orderItemsTable (orderItemsTruckID)",
+        "CREATE INDEX IF NOT EXISTS orderCustomerIndex ON orderTable (orderCustomerID)",
+        "CREATE INDEX IF NOT EXISTS truckSupplierIndex ON truckTable (truckSupplierID)",
+        "CREATE INDEX IF NOT EXISTS logsUserIndex ON logsTable (userID)",
+        "CREATE INDEX IF NOT EXISTS logsTimestampIndex ON logsTable (timestamp)",
+    ]),
+    (3, "Store orderDate as ISO-8601 and index it", [
+        # dd/mm/yyyy -> yyyy-mm-dd; rows already in ISO form are left alone.
+        """
+        UPDATE orderTable
+        SET orderDate = SUBSTR(orderDate, 7, 4) || '-' || SUBSTR(orderDate, 4, 2) || '-' || SUBSTR(orderDate, 1, 2)
+        WHERE orderDate GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'
+        """,
+        "CREATE INDEX IF NOT EXISTS orderDateIndex ON orderTable (orderDate)",
+    ]),
+    (4, "Store the PBKDF2 iteration count per user", [
+        "ALTER TABLE userTable ADD COLUMN iterations INTEGER NOT NULL DEFAULT 100000",
+    ]),
+    (5, "Store log timestamps as ISO-8601 and index the log filter columns", [
+        # 'dd/mm/yyyy HH:MM:SS' -> 'yyyy-mm-dd HH:MM:SS' so date ranges can use logsTimestampIndex
+        """
+        UPDATE logsTable
+        SET timestamp = SUBSTR(timestamp, 7, 4) || '-' || SUBSTR(timestamp, 4, 2) || '-' || SUBSTR(timestamp, 1, 2) || SUBSTR(timestamp, 11)
+        WHERE timestamp GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+        """,
+        "CREATE INDEX IF NOT EXISTS logsActionIndex ON logsTable (action)",
+        "CREATE INDEX IF NOT EXISTS logsRecordIndex ON logsTable (tableName, recordID)",
+    ]),
+    (6, "Keep a per-month, per-truck sales summary for the profit report", [
+        # Quantities only - prices are joined from truckTable when the report is read,
+        # so changing a truck's price needs no summary maintenance.
+        """
+        CREATE TABLE IF NOT EXISTS profitSummaryTable (
+            yearMonth TEXT NOT NULL,
+            truckID TEXT NOT NULL,
+            paid TEXT NOT NULL,
+            trucksSold INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (yearMonth, truckID, paid)
+        )
+        """,
+        """
+        INSERT INTO profitSummaryTable (yearMonth, truckID, paid, trucksSold)
+        SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(orderItemsTruckID, ''),
+               CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END, SUM(CAST(IFNULL(quantity, 0) AS INTEGER))
+        FROM orderTable JOIN orderItemsTable ON orderItemsOrderID = orderID
+        GROUP BY 1, 2, 3
+        """,
+        # Order lines: add the new quantity, take away the old one.
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryItemInsert AFTER INSERT ON orderItemsTable
+        BEGIN
+            INSERT INTO profitSummaryTable (yearMonth, truckID, paid, trucksSold)
+            SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(NEW.orderItemsTruckID, ''),
+                   CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END, CAST(IFNULL(NEW.quantity, 0) AS INTEGER)
+            FROM orderTable WHERE orderID = NEW.orderItemsOrderID
+            ON CONFLICT (yearMonth, truckID, paid) DO UPDATE SET trucksSold = trucksSold + excluded.trucksSold;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryItemDelete AFTER DELETE ON orderItemsTable
+        BEGIN
+            UPDATE profitSummaryTable SET trucksSold = trucksSold - CAST(IFNULL(OLD.quantity, 0) AS INTEGER)
+            WHERE (yearMonth, truckID, paid) = (
+                SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(OLD.orderItemsTruckID, ''),
+                       CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END
+                FROM orderTable WHERE orderID = OLD.orderItemsOrderID
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryItemUpdate
+        AFTER UPDATE OF orderItemsOrderID, orderItemsTruckID, quantity ON orderItemsTable
+        BEGIN
+            UPDATE profitSummaryTable SET trucksSold = trucksSold - CAST(IFNULL(OLD.quantity, 0) AS INTEGER)
+            WHERE (yearMonth, truckID, paid) = (
+                SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(OLD.orderItemsTruckID, ''),
+                       CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END
+                FROM orderTable WHERE orderID = OLD.orderItemsOrderID
+            );
+            INSERT INTO profitSummaryTable (yearMonth, truckID, paid, trucksSold)
+            SELECT IFNULL(SUBSTR(orderDate, 1, 7), ''), IFNULL(NEW.orderItemsTruckID, ''),
+                   CASE WHEN paid = 'Y' THEN 'Y' ELSE 'N' END, CAST(IFNULL(NEW.quantity, 0) AS INTEGER)
+            FROM orderTable WHERE orderID = NEW.orderItemsOrderID
+            ON CONFLICT (yearMonth, truckID, paid) DO UPDATE SET trucksSold = trucksSold + excluded.trucksSold;
+        END
+        """,
+        # Orders: moving an order to another month or paid state moves all of its lines.
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryOrderInsert AFTER INSERT ON orderTable
+        BEGIN
+            INSERT INTO profitSummaryTable (yearMonth, truckID, paid, trucksSold)
+            SELECT IFNULL(SUBSTR(NEW.orderDate, 1, 7), ''), IFNULL(orderItemsTruckID, ''),
+                   CASE WHEN NEW.paid = 'Y' THEN 'Y' ELSE 'N' END, CAST(IFNULL(quantity, 0) AS INTEGER)
+            FROM orderItemsTable WHERE orderItemsOrderID = NEW.orderID
+            ON CONFLICT (yearMonth, truckID, paid) DO UPDATE SET trucksSold = trucksSold + excluded.trucksSold;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryOrderDelete AFTER DELETE ON orderTable
+        BEGIN
+            UPDATE profitSummaryTable SET trucksSold = trucksSold - (
+                SELECT SUM(CAST(IFNULL(quantity, 0) AS INTEGER)) FROM orderItemsTable
+                WHERE orderItemsOrderID = OLD.orderID AND IFNULL(orderItemsTruckID, '') = profitSummaryTable.truckID
+            )
+            WHERE yearMonth = IFNULL(SUBSTR(OLD.orderDate, 1, 7), '')
+            AND paid = CASE WHEN OLD.paid = 'Y' THEN 'Y' ELSE 'N' END
+            AND truckID IN (SELECT IFNULL(orderItemsTruckID, '') FROM orderItemsTable WHERE orderItemsOrderID = OLD.orderID);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS profitSummaryOrderUpdate AFTER UPDATE OF orderID, orderDate, paid ON orderTable
+        BEGIN
+            UPDATE profitSummaryTable SET trucksSold = trucksSold - (
+                SELECT SUM(CAST(IFNULL(quantity, 0) AS INTEGER)) FROM orderItemsTable
+                WHERE orderItemsOrderID = OLD.orderID AND IFNULL(orderItemsTruckID, '') = profitSummaryTable.truckID
+            )
+            WHERE yearMonth = IFNULL(SUBSTR(OLD.orderDate, 1, 7), '')
+            AND paid = CASE WHEN OLD.paid = 'Y' THEN 'Y' ELSE 'N' END
+            AND truckID IN (SELECT IFNULL(orderItemsTruckID, '') FROM orderItemsTable WHERE orderItemsOrderID = OLD.orderID);
+            INSERT INTO profitSummaryTable (yearMonth, truckID, paid, trucksSold)
+            SELECT IFNULL(SUBSTR(NEW.orderDate, 1, 7), ''), IFNULL(orderItemsTruckID, ''),
+                   CASE WHEN NEW.paid = 'Y' THEN 'Y' ELSE 'N' END, CAST(IFNULL(quantity, 0) AS INTEGER)
+            FROM orderItemsTable WHERE orderItemsOrderID = NEW.orderID
+            ON CONFLICT (yearMonth, truckID, paid) DO UPDATE SET trucksSold = trucksSold + excluded.trucksSold;
+        END
+        """,
+    ]),
+    (7, "Count writes per reference table so caches can tell which tables changed", [
+        """
+        CREATE TABLE IF NOT EXISTS tableVersionTable (
+            tableName TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO tableVersionTable (tableName)
+        VALUES ('truckTable'), ('supplierTable'), ('customerTable'), ('orderTable')
+        """,
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tableName}Version{event.title()} AFTER {event} ON {tableName}
+        BEGIN
+            UPDATE tableVersionTable SET version = version + 1 WHERE tableName = '{tableName}';
+        END
+        """
+        for tableName in ("truckTable", "supplierTable", "customerTable", "orderTable")
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]),
+    (8, "Full-text quick search over trucks, customers, suppliers and orders", [
+        # searchKeyTable gives each record a stable integer id to use as the searchIndex rowid,
+        # so the triggers can remove a record's entry without scanning the index.
+        """
+        CREATE TABLE IF NOT EXISTS searchKeyTable (
+            searchID INTEGER PRIMARY KEY,
+            tableName TEXT NOT NULL,
+            recordID TEXT NOT NULL,
+            UNIQUE (tableName, recordID)
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS searchIndex USING fts5(
+            tableName UNINDEXED, recordID UNINDEXED, title, details,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """,
+    ]
+    + searchIndexStatements("truckTable", "truckID",
+                            "IFNULL({row}.truckID, '') || ' ' || IFNULL({row}.make, '') || ' ' || IFNULL({row}.model, '')",
+                            "IFNULL({row}.size, '') || ' ' || IFNULL({row}.truckSupplierID, '')")
+    + searchIndexStatements("customerTable", "customerID",
+                            "IFNULL({row}.customerID, '') || ' ' || IFNULL({row}.customerName, '')",
+                            "IFNULL({row}.customerAddress, '') || ' ' || IFNULL({row}.customerEmail, '')")
+    + searchIndexStatements("supplierTable", "supplierID",
+                            "IFNULL({row}.supplierID, '') || ' ' || IFNULL({row}.supplierName, '')",
+                            "IFNULL({row}.supplierAddress, '') || ' ' || IFNULL({row}.supplierEmail, '')")
+    + searchIndexStatements("orderTable", "orderID",
+                            "IFNULL({row}.orderID, '')",
+                            "IFNULL({row}.orderCustomerID, '') || ' ' || IFNULL({row}.orderDate, '')")),
+    (9, "Stock movement ledger with truckTable.stockLevel as its running balance", [
+        # quantity is the signed change in stock. 'opening' rows record the level a truck
+        # already had when it was added (or when the ledger started); the others move stockLevel.
+        """
+        CREATE TABLE IF NOT EXISTS stockMovementTable (
+            movementID INTEGER PRIMARY KEY,
+            truckID TEXT NOT NULL,
+            movementType TEXT NOT NULL CHECK (movementType IN ('opening', 'sale', 'receipt', 'adjustment')),
+            quantity INTEGER NOT NULL,
+            orderID TEXT,
+            timestamp TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            note TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS stockMovementTruckIndex ON stockMovementTable (truckID, timestamp)",
+        """
+        INSERT INTO stockMovementTable (truckID, movementType, quantity, note)
+        SELECT truckID, 'opening', CAST(IFNULL(stockLevel, 0) AS INTEGER), 'Stock level when the ledger was started'
+        FROM truckTable WHERE truckID IS NOT NULL
+        """,
+        # The ledger is append-only; only the truck ID may change, when the truck is renamed.
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementNoUpdate
+        BEFORE UPDATE OF movementID, movementType, quantity, orderID, timestamp, note ON stockMovementTable
+        BEGIN
+            SELECT RAISE(ABORT, 'stock movements cannot be changed; record an adjustment instead');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementNoDelete BEFORE DELETE ON stockMovementTable
+        BEGIN
+            SELECT RAISE(ABORT, 'stock movements cannot be deleted; record an adjustment instead');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementBalance AFTER INSERT ON stockMovementTable
+        WHEN NEW.movementType <> 'opening'
+        BEGIN
+            UPDATE truckTable SET stockLevel = CAST(IFNULL(stockLevel, 0) AS INTEGER) + NEW.quantity
+            WHERE truckID = NEW.truckID;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementTruckInsert AFTER INSERT ON truckTable
+        WHEN NEW.truckID IS NOT NULL AND CAST(IFNULL(NEW.stockLevel, 0) AS INTEGER) <> 0
+        BEGIN
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, note)
+            VALUES (NEW.truckID, 'opening', CAST(NEW.stockLevel AS INTEGER), 'Stock level when the truck was added');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementTruckRename AFTER UPDATE OF truckID ON truckTable
+        WHEN OLD.truckID IS NOT NEW.truckID
+        BEGIN
+            UPDATE stockMovementTable SET truckID = NEW.truckID WHERE truckID = OLD.truckID;
+        END
+        """,
+        # Order lines: a sale takes the quantity out of stock; removing or changing the line puts it back.
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementItemInsert AFTER INSERT ON orderItemsTable
+        WHEN NEW.orderItemsTruckID IS NOT NULL
+        BEGIN
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note)
+            VALUES (NEW.orderItemsTruckID, 'sale', -CAST(IFNULL(NEW.quantity, 0) AS INTEGER), NEW.orderItemsOrderID, 'Order item added');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementItemDelete AFTER DELETE ON orderItemsTable
+        WHEN OLD.orderItemsTruckID IS NOT NULL
+        BEGIN
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note)
+            VALUES (OLD.orderItemsTruckID, 'sale', CAST(IFNULL(OLD.quantity, 0) AS INTEGER), OLD.orderItemsOrderID, 'Order item removed');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stockMovementItemUpdate AFTER UPDATE OF orderItemsTruckID, quantity ON orderItemsTable
+        WHEN OLD.orderItemsTruckID IS NOT NEW.orderItemsTruckID
+          OR CAST(IFNULL(OLD.quantity, 0) AS INTEGER) <> CAST(IFNULL(NEW.quantity, 0) AS INTEGER)
+        BEGIN
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note)
+            SELECT OLD.orderItemsTruckID, 'sale', CAST(IFNULL(OLD.quantity, 0) AS INTEGER), OLD.orderItemsOrderID, 'Order item changed'
+            WHERE OLD.orderItemsTruckID IS NOT NULL;
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note)
+            SELECT NEW.orderItemsTruckID, 'sale', -CAST(IFNULL(NEW.quantity, 0) AS INTEGER), NEW.orderItemsOrderID, 'Order item changed'
+            WHERE NEW.orderItemsTruckID IS NOT NULL;
+        END
+        """,
+    ]),
+    (10, "Queue trucks at or below their reorder level as their stock changes", [
+        # A truck is queued when stockLevel <= reorderLevel (the test the reorder notes used
+        # to scan truckTable with) and removed once it is restocked above it.
+        """
+        CREATE TABLE IF NOT EXISTS reorderQueueTable (
+            truckID TEXT PRIMARY KEY,
+            supplierID TEXT,
+            queuedAt TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS reorderQueueSupplierIndex ON reorderQueueTable (supplierID, truckID)",
+        """
+        INSERT OR IGNORE INTO reorderQueueTable (truckID, supplierID)
+        SELECT truckID, truckSupplierID FROM truckTable
+        WHERE truckID IS NOT NULL AND stockLevel <= reorderLevel
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS reorderQueueTruckInsert AFTER INSERT ON truckTable
+        WHEN NEW.truckID IS NOT NULL AND NEW.stockLevel <= NEW.reorderLevel
+        BEGIN
+            INSERT OR IGNORE INTO reorderQueueTable (truckID, supplierID) VALUES (NEW.truckID, NEW.truckSupplierID);
+        END
+        """,
+        # queuedAt is kept while the truck stays low, so it records when the level was crossed.
+        """
+        CREATE TRIGGER IF NOT EXISTS reorderQueueTruckUpdate
+        AFTER UPDATE OF truckID, truckSupplierID, stockLevel, reorderLevel ON truckTable
+        BEGIN
+            DELETE FROM reorderQueueTable
+            WHERE truckID = OLD.truckID
+            AND (OLD.truckID IS NOT NEW.truckID OR NOT IFNULL(NEW.stockLevel <= NEW.reorderLevel, 0));
+            INSERT INTO reorderQueueTable (truckID, supplierID)
+            SELECT NEW.truckID, NEW.truckSupplierID
+            WHERE NEW.truckID IS NOT NULL AND NEW.stockLevel <= NEW.reorderLevel
+            ON CONFLICT (truckID) DO UPDATE SET supplierID = excluded.supplierID;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS reorderQueueTruckDelete AFTER DELETE ON truckTable
+        BEGIN
+            DELETE FROM reorderQueueTable WHERE truckID = OLD.truckID;
+        END
+        """,
+    ]),
+    (11, "Let historical order imports add order lines without recording sales", [
+        # While a row is in stockLedgerPauseTable, new order lines are history, not sales: they
+        # leave stock alone. The importer adds the row inside its transaction and removes it
+        # before committing, so no other connection ever sees it.
+        "CREATE TABLE IF NOT EXISTS stockLedgerPauseTable (reason TEXT)",
+        "DROP TRIGGER IF EXISTS stockMovementItemInsert",
+        """
+        CREATE TRIGGER stockMovementItemInsert AFTER INSERT ON orderItemsTable
+        WHEN NEW.orderItemsTruckID IS NOT NULL AND NOT EXISTS (SELECT 1 FROM stockLedgerPauseTable)
+        BEGIN
+            INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note)
+            VALUES (NEW.orderItemsTruckID, 'sale', -CAST(IFNULL(NEW.quantity, 0) AS INTEGER), NEW.orderItemsOrderID, 'Order item added');
+        END
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+#----------------------------------------------------------------------------------------------------------
+#### MIGRATION RUNNER ####
+
+def getSchemaVersion(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrateDatabase(connection):
+    """Apply every migration newer than the stored schema version.
+
+    Returns the list of versions that were applied. Each migration is atomic: if
+    one fails it is rolled back and the error is raised, leaving earlier ones in place.
+    """
+    currentVersion = getSchemaVersion(connection)
+    appliedVersions = []
+
+    if connection.in_transaction:
+        connection.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= currentVersion:
+            continue
+
+        try:
+            connection.execute("BEGIN")
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            raise sqlite3.DatabaseError(f"Migration {version} ({description}) failed: {e}") from e
+
+        appliedVersions.append(version)
+
+    # Refresh planner statistics so the new indexes are actually chosen.
+    if appliedVersions:
+        connection.execute("ANALYZE")
+        connection.commit()
+
+    return appliedVersions
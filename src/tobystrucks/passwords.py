@@ -0,0 +1,65 @@
+"""
+Password hashing with PBKDF2-SHA256.
+
+The iteration count is stored per user, so the cost can be raised on a faster
+machine (set TOBYSTRUCKS_HASH_ITERATIONS) and weaker hashes are upgraded the next
+time that user logs in successfully. A hash is never rehashed at a lower cost.
+
+Run `python -m tobystrucks.passwords [iterations]` to time a hash on this host.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import time
+
+# Cost used by every hash created before iterations were stored per user.
+LEGACY_ITERATIONS = 100000
+DEFAULT_ITERATIONS = int(os.environ.get("TOBYSTRUCKS_HASH_ITERATIONS", LEGACY_ITERATIONS))
+
+
+def newSalt():
+    return secrets.token_hex(32)
+
+
+def hashPassword(password, salt, iterations=DEFAULT_ITERATIONS):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations).hex()
+
+
+def verifyPassword(password, salt, storedHash, iterations=LEGACY_ITERATIONS):
+    return hmac.compare_digest(hashPassword(password, salt, iterations or LEGACY_ITERATIONS), storedHash)
+
+
+def needsRehash(iterations):
+    # Only ever strengthen: a lower (or unset) TOBYSTRUCKS_HASH_ITERATIONS must not weaken stored hashes.
+    return (iterations or LEGACY_ITERATIONS) < DEFAULT_ITERATIONS
+
+#----------------------------------------------------------------------------------------------------------
+#### BENCHMARK ####
+
+def benchmarkHash(iterations=DEFAULT_ITERATIONS, rounds=5):
+    """Average seconds taken by one hashPassword call at the given cost."""
+    salt = newSalt()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        hashPassword("benchmark-password", salt, iterations)
+    return (time.perf_counter() - started) / rounds
+
+
+def suggestIterations(targetSeconds=0.25):
+    """Iteration count that takes roughly targetSeconds on this machine."""
+    secondsPerIteration = benchmarkHash(LEGACY_ITERATIONS, rounds=3) / LEGACY_ITERATIONS
+    return max(LEGACY_ITERATIONS, int(targetSeconds / secondsPerIteration))
+
+
+def main(arguments):
+    iterations = int(arguments[0]) if arguments else DEFAULT_ITERATIONS
+    averageSeconds = benchmarkHash(iterations)
+    print(f"PBKDF2-SHA256 with {iterations} iterations: {averageSeconds * 1000:.1f} ms per hash")
+    print(f"Suggested iterations for a 250 ms login: {suggestIterations()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
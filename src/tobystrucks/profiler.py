@@ -0,0 +1,216 @@
+"""
+Statement profiler.
+
+`StatementProfiler.connectionFactory()` returns a sqlite3.Connection subclass to
+pass to `connectDatabase(factory=...)`. Every statement run through such a
+connection is timed, including the time spent fetching its rows, and recorded
+with its row count in a ring buffer of recent statements and in per-statement
+totals. `set_trace_callback` supplies the statement as SQLite actually ran it
+(with the parameters filled in). The first time a
+statement takes longer than the slow threshold its `EXPLAIN QUERY PLAN` is
+captured, so full table scans show up as "SCAN table".
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def normaliseSql(sql):
+    return " ".join(sql.split())
+
+#----------------------------------------------------------------------------------------------------------
+#### PROFILER ####
+
+class StatementProfiler:
+
+    def __init__(self, capacity=500, slowThresholdMs=50):
+        self.slowThresholdMs = slowThresholdMs
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=capacity)
+        self.statements = {}
+        self.plans = {}
+
+    def begin(self, sql):
+        record = {
+            "sql": normaliseSql(sql),
+            "expandedSql": None,
+            "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "thread": threading.current_thread().name,
+            "durationMs": 0.0,
+            "rows": 0,
+            "plan": None,
+        }
+        with self.lock:
+            self.recent.append(record)
+            totals = self.statements.setdefault(record["sql"], {
+                "sql": record["sql"], "calls": 0, "totalMs": 0.0, "maxMs": 0.0, "rows": 0, "lastExpandedSql": None,
+            })
+            totals["calls"] += 1
+        return record
+
+    def addTime(self, record, elapsedMs, rows=0):
+        """Add execute or fetch time (and rows) to a statement's record and its totals."""
+        with self.lock:
+            record["durationMs"] += elapsedMs
+            record["rows"] += rows
+            totals = self.statements[record["sql"]]
+            totals["totalMs"] += elapsedMs
+            totals["rows"] += rows
+            totals["maxMs"] = max(totals["maxMs"], record["durationMs"])
+            if record["expandedSql"]:
+                totals["lastExpandedSql"] = record["expandedSql"]
+
+    def isSlow(self, record):
+        return record["durationMs"] >= self.slowThresholdMs and record["plan"] is None
+
+    def capturePlan(self, connection, record, params):
+        """EXPLAIN QUERY PLAN for a slow statement, once per distinct statement text."""
+        sql = record["sql"]
+        with self.lock:
+            plan = self.plans.get(sql)
+        if plan is None:
+            plan = ""
+            if EXPLAINABLE.match(sql):
+                try:
+                    rows = sqlite3.Connection.execute(connection, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                    plan = "\n".join(detail for _, _, _, detail in rows)
+                except sqlite3.Error as e:
+                    plan = f"(no plan: {e})"
+            with self.lock:
+                self.plans[sql] = plan
+        record["plan"] = plan
+
+    #------------------------------------------------------------------------------------------------------
+    #### READING THE STATS ####
+
+    def slowestStatements(self, limit=100):
+        """Per-statement totals, slowest single run first, each with its captured plan."""
+        with self.lock:
+            statements = [dict(totals, plan=self.plans.get(sql)) for sql, totals in self.statements.items()]
+        statements.sort(key=lambda totals: totals["maxMs"], reverse=True)
+        return statements[:limit]
+
+    def recentStatements(self):
+        with self.lock:
+            return [dict(record) for record in self.recent]
+
+    def reset(self):
+        with self.lock:
+            self.recent.clear()
+            self.statements.clear()
+            self.plans.clear()
+
+    def exportStats(self, path):
+        """Write the totals and the recent-statement ring buffer to a JSON file."""
+        stats = {
+            "exported": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "slowThresholdMs": self.slowThresholdMs,
+            "statements": self.slowestStatements(limit=None),
+            "recent": self.recentStatements(),
+        }
+        with open(path, "w", encoding="utf-8") as statsFile:
+            json.dump(stats, statsFile, indent=2)
+
+    #------------------------------------------------------------------------------------------------------
+    #### CONNECTION FACTORY ####
+
+    def connectionFactory(self):
+        """A sqlite3.Connection subclass whose statements are recorded by this profiler."""
+        profiler = self
+
+        class ProfiledCursor(sqlite3.Cursor):
+            record = None
+            params = ()
+
+            def execute(self, sql, params=()):
+                self.record = profiler.begin(sql)
+                self.params = params
+                self.connection.currentRecord = self.record
+                started = time.perf_counter()
+                try:
+                    super().execute(sql, params)
+                finally:
+                    self.connection.currentRecord = None
+                    changedRows = max(self.rowcount, 0)
+                    profiler.addTime(self.record, (time.perf_counter() - started) * 1000, changedRows)
+                if profiler.isSlow(self.record):
+                    profiler.capturePlan(self.connection, self.record, params)
+                return self
+
+            def executemany(self, sql, paramsList):
+                self.record = profiler.begin(sql)
+                self.params = None
+                self.connection.currentRecord = self.record
+                started = time.perf_counter()
+                try:
+                    super().executemany(sql, paramsList)
+                finally:
+                    self.connection.currentRecord = None
+                    profiler.addTime(self.record, (time.perf_counter() - started) * 1000, max(self.rowcount, 0))
+                return self
+
+            def timedFetch(self, fetch, *args):
+                started = time.perf_counter()
+                result = fetch(*args)
+                if self.record is not None:
+                    rows = len(result) if isinstance(result, list) else int(result is not None)
+                    profiler.addTime(self.record, (time.perf_counter() - started) * 1000, rows)
+                    # Most of a SELECT's time is spent here rather than in execute().
+                    if profiler.isSlow(self.record):
+                        profiler.capturePlan(self.connection, self.record, self.params)
+                return result
+
+            def fetchone(self):
+                return self.timedFetch(super().fetchone)
+
+            def fetchmany(self, size=None):
+                return self.timedFetch(super().fetchmany, size or self.arraysize)
+
+            def fetchall(self):
+                return self.timedFetch(super().fetchall)
+
+            def __next__(self):
+                row = self.timedFetch(self.fetchNextRow)
+                if row is None:
+                    raise StopIteration
+                return row
+
+            def fetchNextRow(self):
+                try:
+                    return super(ProfiledCursor, self).__next__()
+                except StopIteration:
+                    return None
+
+        class ProfiledConnection(sqlite3.Connection):
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.profiler = profiler
+                self.currentRecord = None
+                self.set_trace_callback(self.traceStatement)
+
+            def cursor(self, factory=ProfiledCursor):
+                return super().cursor(factory)
+
+            def execute(self, sql, params=()):
+                return self.cursor().execute(sql, params)
+
+            def executemany(self, sql, paramsList):
+                return self.cursor().executemany(sql, paramsList)
+
+            def traceStatement(self, statement):
+                record = self.currentRecord
+                if record is None:
+                    return
+                if record["expandedSql"] is None and not statement.startswith("BEGIN"):
+                    # The sqlite3 module's own implicit BEGIN is traced first; skip it.
+                    record["expandedSql"] = statement
+
+        return ProfiledConnection
@@ -0,0 +1,317 @@
+"""
+Catalogue of the named, parameterised statements used by the screens' create,
+read, update and delete paths, the reports, the stock ledger, quick search, the
+reference cache and the system logs.
+
+A statement's text never changes whatever values it is run with, so the sqlite3
+statement cache (keyed on the SQL text) hands back the statement SQLite already
+parsed and planned instead of preparing it again. Run statements by name with
+`execute(connection, name, params)`. Where a statement names a table or column,
+the name comes from a fixed dict in this module, never from input.
+
+Two kinds of query are still built where they are used, because their shape
+depends on what the user is doing: the paged grids' keyset queries (gridview.py,
+sort column and filter) and the bulk edit UPDATEs (bulkedit.py, one per set of
+changed columns). Both take table and column names only from lists fixed in code
+and bind every value.
+
+`stats()` counts how often each named statement is run. It is a catalogue of
+what runs, not a measure of statement cache reuse: sqlite3 does not report its
+cache hits, so nothing here confirms that a statement was reused.
+"""
+
+import threading
+
+# tableName: (key column, SQL expression for the label shown next to the ID)
+REFERENCE_TABLES = {
+    "supplierTable": ("supplierID", "supplierName"),
+    "customerTable": ("customerID", "customerName"),
+    "truckTable": ("truckID", "make || ' ' || model"),
+    "orderTable": ("orderID", "orderCustomerID || ' ' || orderDate"),
+}
+
+LOG_COLUMNS = ["logID", "userID", "username", "action", "tableName", "recordID", "timestamp", "details"]
+
+# Indexed log columns whose distinct values fill the log viewer's filter drop-downs.
+LOG_FILTER_COLUMNS = ["userID", "action", "tableName"]
+
+# Read from profitSummaryTable (kept up to date by triggers), so a year costs a
+# few dozen summary rows whatever the number of orders.
+PROFIT_COLUMNS = """
+    SUM(s.trucksSold),
+    SUM(s.trucksSold * t.buyingPrice),
+    SUM(CASE WHEN s.paid = 'Y' THEN s.trucksSold * t.sellingPrice ELSE 0 END),
+    SUM(CASE WHEN s.paid = 'Y' THEN s.trucksSold * (t.sellingPrice - t.buyingPrice) ELSE 0 END),
+    SUM(CASE WHEN s.paid = 'Y' THEN 0 ELSE s.trucksSold * t.sellingPrice END),
+    SUM(CASE WHEN s.paid = 'Y' THEN 0 ELSE s.trucksSold * (t.sellingPrice - t.buyingPrice) END)
+"""
+
+PROFIT_LINES = """
+    SELECT orderID, orderDate, paid, quantity, truckID, buyingPrice, sellingPrice,
+           (sellingPrice - buyingPrice) * quantity
+    FROM orderTable
+    JOIN orderItemsTable ON orderItemsOrderID = orderID
+    JOIN truckTable ON truckID = orderItemsTruckID
+    WHERE orderDate BETWEEN ? AND ? {keyCondition}
+    ORDER BY orderDate, orderID, orderItemsTruckID
+    LIMIT ?
+"""
+
+# Only the trucks in reorderQueueTable are read; its triggers keep it to the trucks
+# at or below their reorder level, so the rest of truckTable is never scanned.
+REORDER_NOTES = """
+    SELECT
+        s.supplierID, s.supplierName, s.supplierAddress, s.supplierPhone, s.supplierEmail,
+        t.truckID, t.make, t.model, t.size, t.buyingPrice, t.reorderAmount
+    FROM supplierTable s
+    {join} reorderQueueTable q ON q.supplierID = s.supplierID
+    {join} truckTable t ON t.truckID = q.truckID
+    {where}
+    ORDER BY s.supplierID, t.truckID
+"""
+
+STATEMENTS = {
+    #### USERS ####
+    "anyUsers": "SELECT EXISTS (SELECT 1 FROM userTable)",
+    "insertDefaultAdmin": """
+        INSERT OR IGNORE INTO userTable (userID, username, passwordHash, salt, role, createdDate, isActive, iterations)
+        VALUES (?,?,?,?,?,?,?,?)
+    """,
+    "activeUserByName": """
+        SELECT userID, username, passwordHash, salt, role, isActive, iterations
+        FROM userTable
+        WHERE username = ? AND isActive = 'Y'
+    """,
+    "updateUserPassword": "UPDATE userTable SET passwordHash = ?, salt = ?, iterations = ? WHERE userID = ?",
+
+    #### TRUCKS ####
+    "insertTruck": "INSERT INTO truckTable VALUES (?,?,?,?,?,?,?,?,?,?)",
+    # stockLevel is left out: it only changes through the stock ledger.
+    "updateTruck": """
+        UPDATE truckTable
+        SET
+            truckID = ?,
+            make = ?,
+            model = ?,
+            size = ?,
+            truckSupplierID = ?,
+            buyingPrice = ?,
+            sellingPrice = ?,
+            reorderLevel = ?,
+            reorderAmount = ?
+        WHERE
+            truckID = ?
+    """,
+    "deleteTruck": "DELETE FROM truckTable WHERE truckID = ?",
+
+    #### SUPPLIERS ####
+    "insertSupplier": "INSERT INTO supplierTable VALUES (?,?,?,?,?)",
+    "updateSupplier": """
+        UPDATE supplierTable
+        SET
+            supplierID = ?,
+            supplierName = ?,
+            supplierAddress = ?,
+            supplierPhone = ?,
+            supplierEmail = ?
+        WHERE
+            supplierID = ?
+    """,
+    "deleteSupplier": "DELETE FROM supplierTable WHERE supplierID = ?",
+
+    #### CUSTOMERS ####
+    "insertCustomer": "INSERT INTO customerTable VALUES (?,?,?,?,?)",
+    "updateCustomer": """
+        UPDATE customerTable
+        SET
+            customerID = ?,
+            customerName = ?,
+            customerAddress = ?,
+            customerPhone = ?,
+            customerEmail = ?
+        WHERE
+            customerID = ?
+    """,
+    "deleteCustomer": "DELETE FROM customerTable WHERE customerID = ?",
+
+    #### ORDERS ####
+    "insertOrder": "INSERT INTO orderTable VALUES (?,?,?,?)",
+    "updateOrder": """
+        UPDATE orderTable
+        SET
+            orderID = ?,
+            orderCustomerID = ?,
+            orderDate = ?,
+            paid = ?
+        WHERE
+            orderID = ?
+    """,
+    "deleteOrder": "DELETE FROM orderTable WHERE orderID = ?",
+
+    #### ORDER ITEMS ####
+    "selectOrderItem": """
+        SELECT * FROM orderItemsTable
+        WHERE orderItemsOrderID = ?
+        AND orderItemsTruckID = ?
+    """,
+    "insertOrderItem": "INSERT INTO orderItemsTable VALUES (?,?,?)",
+    "updateOrderItem": """
+        UPDATE orderItemsTable
+        SET
+            orderItemsOrderID = ?,
+            orderItemsTruckID = ?,
+            quantity = ?
+        WHERE
+            orderItemsOrderID = ?
+        AND orderItemsTruckID = ?
+    """,
+    "deleteOrderItem": "DELETE FROM orderItemsTable WHERE orderItemsOrderID = ? AND orderItemsTruckID = ?",
+
+    #### STOCK LEDGER ####
+    "insertStockMovement": "INSERT INTO stockMovementTable (truckID, movementType, quantity, orderID, note) VALUES (?,?,?,?,?)",
+    "truckStockLevel": "SELECT CAST(IFNULL(stockLevel, 0) AS INTEGER) FROM truckTable WHERE truckID = ?",
+    "stockAt": "SELECT IFNULL(SUM(quantity), 0) FROM stockMovementTable WHERE truckID = ? AND timestamp <= ?",
+    "stockHistory": """
+        SELECT movementID, timestamp, movementType, quantity,
+               SUM(quantity) OVER (ORDER BY timestamp, movementID) AS balance,
+               IFNULL(orderID, ''), IFNULL(note, '')
+        FROM stockMovementTable
+        WHERE truckID = ?
+        ORDER BY timestamp, movementID
+    """,
+    "reorderQueueCount": "SELECT COUNT(*) FROM reorderQueueTable",
+    "ledgerMismatches": """
+        SELECT truckID, CAST(IFNULL(stockLevel, 0) AS INTEGER) AS level, IFNULL(ledger, 0)
+        FROM truckTable
+        LEFT JOIN (SELECT truckID AS ledgerTruckID, SUM(quantity) AS ledger FROM stockMovementTable GROUP BY truckID)
+            ON ledgerTruckID = truckID
+        WHERE level <> IFNULL(ledger, 0)
+        ORDER BY truckID
+    """,
+
+    #### REPORTS ####
+    "profitByMonth": f"""
+        SELECT s.yearMonth, {PROFIT_COLUMNS}
+        FROM profitSummaryTable s JOIN truckTable t ON t.truckID = s.truckID
+        WHERE s.yearMonth BETWEEN ? AND ?
+        GROUP BY s.yearMonth
+        HAVING SUM(s.trucksSold) <> 0
+        ORDER BY s.yearMonth
+    """,
+    "profitTotals": f"""
+        SELECT {PROFIT_COLUMNS}
+        FROM profitSummaryTable s JOIN truckTable t ON t.truckID = s.truckID
+        WHERE s.yearMonth BETWEEN ? AND ?
+    """,
+    "profitLines": PROFIT_LINES.format(keyCondition=""),
+    "profitLinesAfter": PROFIT_LINES.format(keyCondition="AND (orderDate, orderID, orderItemsTruckID) > (?, ?, ?)"),
+    "reorderNotes": REORDER_NOTES.format(join="JOIN", where=""),
+    "supplierReorderNote": REORDER_NOTES.format(join="LEFT JOIN", where="WHERE s.supplierID = ?"),
+    "stockReport": "SELECT truckID, make, model, size, stockLevel FROM truckTable ORDER BY truckID",
+    "receiptOrder": """
+        SELECT
+            orderID, orderCustomerID, orderDate, paid,
+            customerID, customerName, customerAddress,
+            customerPhone, customerEmail
+        FROM orderTable JOIN customerTable ON orderCustomerID = customerID
+        WHERE orderID = ?
+    """,
+    "receiptTrucks": """
+        SELECT
+            orderItemsOrderID, orderItemsTruckID, quantity,
+            truckID, make, model, size, sellingPrice
+        FROM orderItemsTable JOIN truckTable ON orderItemsTruckID = truckID
+        WHERE orderItemsOrderID = ?
+        ORDER BY orderItemsTruckID
+    """,
+
+    #### SEARCH ####
+    "quickSearch": "SELECT tableName, recordID, title, details FROM searchIndex WHERE searchIndex MATCH ? ORDER BY rank LIMIT ?",
+
+    #### REFERENCE CACHE ####
+    "dataVersion": "PRAGMA data_version",
+    "tableVersions": "SELECT tableName, version FROM tableVersionTable",
+
+    #### SYSTEM LOGS ####
+    "archivableLogs": f"""
+        SELECT {", ".join(LOG_COLUMNS)}
+        FROM logsTable
+        WHERE timestamp < ?
+        ORDER BY timestamp, logID
+        LIMIT ?
+    """,
+    "deleteLog": "DELETE FROM logsTable WHERE logID = ?",
+}
+
+# {tableName}Record and {tableName}Labels for each reference table.
+STATEMENTS.update({
+    f"{tableName}Record": f"SELECT * FROM {tableName} WHERE {keyColumn} = ?"
+    for tableName, (keyColumn, _) in REFERENCE_TABLES.items()
+})
+STATEMENTS.update({
+    f"{tableName}Labels": f"SELECT {keyColumn}, IFNULL({labelExpression}, '') FROM {tableName} ORDER BY {keyColumn}"
+    for tableName, (keyColumn, labelExpression) in REFERENCE_TABLES.items()
+})
+
+# {columnName}LogValues for each log filter column.
+STATEMENTS.update({
+    f"{columnName}LogValues": f"SELECT DISTINCT {columnName} FROM logsTable WHERE {columnName} <> '' ORDER BY {columnName}"
+    for columnName in LOG_FILTER_COLUMNS
+})
+
+#----------------------------------------------------------------------------------------------------------
+#### CATALOGUE ####
+
+class QueryCatalogue:
+
+    def __init__(self, statements):
+        self.statements = dict(statements)
+        self.lock = threading.Lock()
+        self.calls = {}                 # name: number of times run
+
+    def sql(self, name):
+        return self.statements[name]
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def execute(self, connection, name, params=()):
+        sql = self.statements[name]
+        self.count(name)
+        return connection.execute(sql, params)
+
+    def executemany(self, connection, name, paramsList):
+        sql = self.statements[name]
+        self.count(name)
+        return connection.executemany(sql, paramsList)
+
+    def stats(self):
+        """{name: {"calls"}} for every statement run so far, plus "total" with "calls" and "statements"."""
+        with self.lock:
+            stats = {name: {"calls": calls} for name, calls in self.calls.items()}
+        stats["total"] = {"calls": sum(counts["calls"] for counts in stats.values()), "statements": len(stats)}
+        return stats
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+
+
+catalogue = QueryCatalogue(STATEMENTS)
+
+
+def sql(name):
+    return catalogue.sql(name)
+
+
+def execute(connection, name, params=()):
+    return catalogue.execute(connection, name, params)
+
+
+def executemany(connection, name, paramsList):
+    return catalogue.executemany(connection, name, paramsList)
+
+
+def stats():
+    return catalogue.stats()
@@ -0,0 +1,100 @@
+"""
+In-memory cache of reference data: the IDs (and display labels) of suppliers,
+customers, trucks and orders that fill comboboxes and validate typed-in IDs,
+and single records fetched for the edit forms.
+
+Entries are kept in least-recently-used order and evicted once the cache holds
+more than `maxRows` rows in total. The screens invalidate a table after each of
+their own writes. Writes by other connections or processes are noticed through
+`PRAGMA data_version`; the per-table counters in tableVersionTable (bumped by
+triggers) then say which tables actually changed, so audit log writes do not
+throw the whole cache away.
+"""
+
+from collections import OrderedDict
+
+from tobystrucks import queries
+from tobystrucks.queries import REFERENCE_TABLES
+
+#----------------------------------------------------------------------------------------------------------
+#### CACHE ####
+
+class ReferenceCache:
+
+    def __init__(self, connection, maxRows=50000):
+        self.connection = connection
+        self.maxRows = maxRows
+        self.entries = OrderedDict()    # key: (rowCount, value)
+        self.rowCount = 0
+        self.dataVersion = None
+        self.tableVersions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        self.checkForExternalWrites()
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][1]
+
+        self.misses += 1
+        rows, value = load()
+        if rows <= self.maxRows:
+            self.entries[key] = (rows, value)
+            self.rowCount += rows
+            while self.rowCount > self.maxRows:
+                _, (evictedRows, _) = self.entries.popitem(last=False)
+                self.rowCount -= evictedRows
+        return value
+
+    def invalidate(self, tableName=None):
+        """Forget everything cached from tableName (or from every table)."""
+        for key in list(self.entries):
+            if tableName is None or key[1] == tableName:
+                rows, _ = self.entries.pop(key)
+                self.rowCount -= rows
+
+    def checkForExternalWrites(self):
+        # data_version only changes when a different connection commits.
+        dataVersion = queries.execute(self.connection, "dataVersion").fetchone()[0]
+        if dataVersion == self.dataVersion:
+            return
+        self.dataVersion = dataVersion
+
+        tableVersions = dict(queries.execute(self.connection, "tableVersions").fetchall())
+        for tableName in REFERENCE_TABLES:
+            if tableVersions.get(tableName) != self.tableVersions.get(tableName):
+                self.invalidate(tableName)
+        self.tableVersions = tableVersions
+
+    #------------------------------------------------------------------------------------------------------
+    #### LOOKUPS ####
+
+    def labels(self, tableName):
+        """[(ID, label), ...] in ID order, e.g. for a combobox."""
+        return self.referenceData(tableName)["labels"]
+
+    def ids(self, tableName):
+        return [recordID for recordID, _ in self.labels(tableName)]
+
+    def exists(self, tableName, recordID):
+        return str(recordID).strip() in self.referenceData(tableName)["ids"]
+
+    def record(self, tableName, recordID):
+        """The whole row (SELECT *) for one ID, or None if there is no such record."""
+        def loadRecord():
+            row = queries.execute(self.connection, f"{tableName}Record", (recordID,)).fetchone()
+            return 1, row
+
+        return self.get(("record", tableName, str(recordID)), loadRecord)
+
+    def referenceData(self, tableName):
+        def loadReferenceData():
+            labels = queries.execute(self.connection, f"{tableName}Labels").fetchall()
+            return len(labels), {"labels": labels, "ids": {str(recordID) for recordID, _ in labels}}
+
+        return self.get(("ids", tableName), loadReferenceData)
+
+    def stats(self):
+        return {"entries": len(self.entries), "rows": self.rowCount, "hits": self.hits, "misses": self.misses}
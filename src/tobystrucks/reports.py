@@ -0,0 +1,283 @@
+"""
+Report queries and their printed layout. Query functions take a connection and
+return plain rows or values, running the named statements in queries.py; the format functions turn those into the text lines
+shown in the report Listboxes and printed by `python -m tobystrucks`, so the
+screens and the command line produce identical reports.
+"""
+
+import os
+import re
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+
+from tobystrucks import queries
+from tobystrucks.dates import ISO_FORMAT, toDisplayDate, yearRange
+
+
+def reportDate():
+    return date.today().strftime('%d-%m-%Y')
+
+#----------------------------------------------------------------------------------------------------------
+#### PROFIT REPORT ####
+
+PROFIT_TOTAL_KEYS = ("trucksSold", "outGoings", "income", "profit", "unPaidIncome", "unPaidProfit")
+
+
+def monthRange(year):
+    """First and last yearMonth of a year, for `yearMonth BETWEEN ? AND ?`."""
+    return (f"{int(year):04d}-01", f"{int(year):04d}-12")
+
+
+def profitByMonth(connection, year):
+    """[(yearMonth, trucksSold, outGoings, income, profit, unPaidIncome, unPaidProfit), ...]"""
+    return queries.execute(connection, "profitByMonth", monthRange(year)).fetchall()
+
+
+def profitTotals(connection, year):
+    """Totals for the year as a dict keyed by PROFIT_TOTAL_KEYS."""
+    row = queries.execute(connection, "profitTotals", monthRange(year)).fetchone()
+    return {key: value or 0 for key, value in zip(PROFIT_TOTAL_KEYS, row)}
+
+
+def profitHeaderLines(year, createdDate=None):
+    return [
+        " ",
+        " =====================================================================",
+        "         TOBY'S TRUCKS - PROFIT REPORT FOR " + str(year),
+        " =====================================================================",
+        "         Created on  : " + (createdDate or reportDate()),
+        " ---------------------------------------------------------------------",
+        " Month        Sold  Out Goings      Income      Profit Unpaid Income",
+        " -------  -------- ----------- ----------- ----------- -------------",
+    ]
+
+
+def profitMonthLine(row):
+    yearMonth, trucksSold, outGoings, income, profit, unPaidIncome, _ = row  # unpaid profit is only totalled
+    return (" %-8s %8d £%10.2f £%10.2f £%10.2f £%12.2f"
+            % (yearMonth, trucksSold or 0, outGoings or 0, income or 0, profit or 0, unPaidIncome or 0))
+
+
+def profitTotalLines(totals):
+    return [
+        " =====================================================================",
+        " Total Trucks Sold        " + "  %8d" % (totals["trucksSold"]),
+        " Total Out Goings        " + "£%9.2f" % (totals["outGoings"]),
+        " Total Actual Income     " + "£%9.2f" % (totals["income"]),
+        " ---------------------------------------------------------------------",
+        " TOTAL ACTUAL PROFIT     " + "£%9.2f" % (totals["profit"]),
+        " ---------------------------------------------------------------------",
+        " Missing Unpaid Income   " + "£%9.2f" % (totals["unPaidIncome"]),
+        " Missing Unpaid Profit   " + "£%9.2f" % (totals["unPaidProfit"]),
+        " =====================================================================",
+    ]
+
+
+PROFIT_LINE_HEADER = [
+    " ",
+    " Order Order      Paid Quantity Truck  Buying     Selling    Order Item ",
+    " ID    Date                     ID    Price      Price      Profit     ",
+    " ----- ---------- ---- -------- ----  ---------- ---------- ---------- ",
+]
+
+
+def profitLine(row):
+    return ("%-6s" % (row[0]) + "%-12s" % (toDisplayDate(row[1])) + "%-8s" % (row[2]) + "%-5s" % (row[3]) +
+            "%-5s" % (row[4]) + "£%8.2f" % (row[5] or 0) + "£%8.2f" % (row[6] or 0) + "£%8.2f" % (row[7] or 0))
+
+
+def profitReport(connection, year, includeLines=False, pageSize=1000):
+    """Every line of the profit report for a year; order lines are read a page at a time."""
+    lines = profitHeaderLines(year)
+    lines += [profitMonthLine(row) for row in profitByMonth(connection, year)]
+    lines += profitTotalLines(profitTotals(connection, year))
+
+    if includeLines:
+        lines += PROFIT_LINE_HEADER
+        page = profitLines(connection, year, limit=pageSize)
+        while page:
+            lines += [profitLine(row) for row in page]
+            page = profitLines(connection, year, page[-1], pageSize) if len(page) == pageSize else []
+    return lines
+
+
+def profitLines(connection, year, after=None, limit=100):
+    """One page of order lines for the year, in (orderDate, orderID, truckID) order.
+
+    Pass the last row of the previous page as `after` to get the next page.
+    Rows are (orderID, orderDate, paid, quantity, truckID, buyingPrice, sellingPrice, lineProfit)."""
+    if after is None:
+        return queries.execute(connection, "profitLines", [*yearRange(year), limit]).fetchall()
+    return queries.execute(connection, "profitLinesAfter", [*yearRange(year), after[1], after[0], after[4], limit]).fetchall()
+
+#----------------------------------------------------------------------------------------------------------
+#### REORDER NOTES ####
+
+def reorderNotes(connection, supplierID=None):
+    """[(supplierRow, truckRows), ...] from one joined query, grouped in a single pass.
+
+    With a supplierID that supplier is always returned, even with nothing to order;
+    without one, only suppliers that have trucks at or below their reorder level."""
+    if supplierID is None:
+        cursor = queries.execute(connection, "reorderNotes")
+    else:
+        cursor = queries.execute(connection, "supplierReorderNote", (supplierID,))
+
+    notes = []
+    for _, rows in groupby(cursor, key=itemgetter(0)):
+        rows = list(rows)
+        truckRows = [row[5:] for row in rows if row[5] is not None]
+        notes.append((rows[0][:5], truckRows))
+    return notes
+
+
+def formatReorderNote(supplierRow, truckRows):
+    """The printable lines of one supplier's order note."""
+    lines = [
+        "  ",
+        " =====================================================================",
+        "          TOBY'S TRUCKS - FOR ALL YOUR TRUCKING NEEDS                 ",
+        " ---------------------------------------------------------------------",
+        "    Toby's Trucks, Spokane, South Wales.     Tel 018871 8181181       ",
+        "    enquiries@TobysTrucks.com          VAT Reg Number 120987245       ",
+        " ---------------------------------------------------------------------",
+        "               Order Note for Supplier ID :" + str(supplierRow[0]),
+        " ---------------------------------------------------------------------",
+        "               Supplier Name     : " + str(supplierRow[1] or ""),
+        "               Supplier Address  : " + str(supplierRow[2] or ""),
+        "               Supplier Phone    : " + str(supplierRow[3] or ""),
+        "               Supplier Email    : " + str(supplierRow[4] or ""),
+        " ---------------------------------------------------------------------",
+        " Please send the following trucks :",
+        " ---------------------------------------------------------------------",
+        " Truck Truck     Truck     Truck  Truck      ReOrder  Sub",
+        " ID   Make     Model    Size  Price     Amount   Total",
+        " ---- -------- -------- ----  --------- -------  ---------",
+    ]
+
+    grandTotal = float(0)
+    for truckID, make, model, size, buyingPrice, reorderAmount in truckRows:
+        buyingPrice = buyingPrice or 0
+        reorderAmount = reorderAmount or 0
+        lines.append(" %-5s" % (truckID) + "%-9s" % (make) + "%-10s" % (model) + "%-5s" % (size) +
+                     "£%8.2f" % (buyingPrice) + "%4d" % (reorderAmount) + "£%8.2f" % (buyingPrice * reorderAmount))
+        grandTotal += buyingPrice * reorderAmount
+
+    lines.append(" =====================================================================")
+    if grandTotal > 0:
+        lines.append(" " * 30 + "      Grand Total  £" + "%8.2f" % (grandTotal))
+    else:
+        lines.append("               ***  NO TRUCKS TO ORDER CURRENTLY  ***                 ")
+    lines.append(" =====================================================================")
+    return lines
+
+
+def writeReorderNotes(notes, directory, noteDate=None):
+    """Write one text file per supplier note into directory. Returns the paths written."""
+    noteDate = noteDate or date.today().strftime(ISO_FORMAT)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for supplierRow, truckRows in notes:
+        safeSupplierID = re.sub(r"[^A-Za-z0-9_-]", "_", str(supplierRow[0]))
+        path = os.path.join(directory, f"reorder-note-{safeSupplierID}-{noteDate}.txt")
+        with open(path, "w", encoding="utf-8") as noteFile:
+            noteFile.write("\n".join(formatReorderNote(supplierRow, truckRows)) + "\n")
+        paths.append(path)
+    return paths
+
+#----------------------------------------------------------------------------------------------------------
+#### STOCK REPORT ####
+
+def stockHeaderLines(createdDate=None):
+    return [
+        " ",
+        " =====================================================================",
+        "    TOBY'S TRUCKS - STOCK REPORT WITH TOTAL                           ",
+        " =====================================================================",
+        "         Created on  : " + (createdDate or reportDate()),
+        " ---------------------------------------------------------------------",
+        " Truck Truck     Truck     Truck   Stock ",
+        " ID   Make     Model    Size   Level",
+        " ---- -------- -------- ----   --------",
+    ]
+
+
+def stockLine(row):
+    truckID, make, model, size, stockLevel = row
+    return " %-4s %-8s %-8s  %-4s %4d" % (truckID, make, model, size, stockLevel or 0)
+
+
+def stockTotalLines(totalStock):
+    return [
+        " ---------------------------------------------------------------------",
+        " =====================================================================",
+        " Total Trucks in stock :         " + str(totalStock),
+        " =====================================================================",
+    ]
+
+
+def stockReport(connection):
+    lines = stockHeaderLines()
+    totalStock = 0
+    for row in queries.execute(connection, "stockReport"):
+        lines.append(stockLine(row))
+        totalStock += row[4] or 0
+    return lines + stockTotalLines(totalStock)
+
+#----------------------------------------------------------------------------------------------------------
+#### RECEIPT ####
+
+def receipt(connection, orderID):
+    """(orderRows, truckRows) for one order: the order with its customer, and its lines with truck details."""
+    orderRows = queries.execute(connection, "receiptOrder", (orderID,)).fetchall()
+    truckRows = queries.execute(connection, "receiptTrucks", (orderID,)).fetchall()
+    return orderRows, truckRows
+
+
+def formatReceipt(orderRows, truckRows, createdDate=None):
+    createdDate = createdDate or reportDate()
+    lines = []
+    for row in orderRows:
+        lines += [
+            " ",
+            " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~",
+            "          TOBY'S TRUCKS - RECEIPT - THANK YOU FOR YOUR ORDER          ",
+            " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~",
+            " Toby's Trucks, Truck Island, Scotland.        Tel 018871 8181181     ",
+            " E-Mail  enquiries@TobysTrucks.com          VAT Reg Number 120987245  ",
+            " ---------------------------------------------------------------------",
+            "   Receipt for Order ID : " + str(row[0]) + "        Date : " + createdDate,
+            " ---------------------------------------------------------------------",
+            " ORDER ID    : " + "%-14s" % (row[0]) + " CUSTOMER ID : " + str(row[4]),
+            " Order Date  : " + "%-14s" % (toDisplayDate(row[2])) + " Name        : " + str(row[5] or ""),
+            " Paid        : " + "%-14s" % (row[3]) + " Address     : " + str(row[6] or ""),
+            " " * 29 + " Phone       : " + str(row[7] or ""),
+            " " * 29 + " Email       : " + str(row[8] or ""),
+            " ---------------------------------------------------------------------",
+            " Truck Truck     Truck     Truck  Truck      Truck     Sub",
+            " ID   Make     Model    Size  Price     Quantity Total",
+            " ---- -------- -------- ----  --------- -------  ---------",
+        ]
+
+    grandTotal = float(0)
+    for truckRow in truckRows:
+        sellingPrice = truckRow[7] or 0
+        lines.append(" %-5s" % (truckRow[3]) + "%-9s" % (truckRow[4]) + "%-10s" % (truckRow[5]) + "%-5s" % (truckRow[6]) +
+                     "£%8.2f" % (sellingPrice) + "%4d" % (truckRow[2]) + "£%8.2f" % (sellingPrice * truckRow[2]))
+        grandTotal += sellingPrice * truckRow[2]
+
+    if grandTotal > 0:
+        lines += [
+            " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~",
+            " " * 30 + "      Grand Total  £" + "%8.2f" % (grandTotal),
+            " ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~",
+        ]
+    else:
+        lines += [
+            "=====================================================================",
+            "                    ***  NO TRUCKS ON THE ORDER   ***                ",
+            "=====================================================================",
+        ]
+    return lines
@@ -0,0 +1,218 @@
+"""
+Sandboxed runner for user-written SQL.
+
+Each query runs in its own worker process (`python -m tobystrucks.sandbox`) on a
+read-only connection (`mode=ro` plus `PRAGMA query_only`), so a runaway query
+can never hold a write lock or freeze the screens. Inside the worker a progress
+handler stops the query at the wall-clock timeout and the row cap ends the result
+early. SQLite's heap and, where the platform allows, the whole process's
+address space are limited. The parent kills the process on Cancel or if it
+ever outlives its timeout.
+
+The request is one JSON object on stdin; results come back as JSON lines on
+stdout: {"columns": [...]}, {"rows": [[...], ...]}, then {"done": rowCount,
+"truncated": bool} or {"error": message}.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from tobystrucks.exporter import exportQuery, jsonValue, partialPath
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Extra seconds the parent allows for process start-up and shutdown before it kills a worker.
+KILL_GRACE = 5
+
+#----------------------------------------------------------------------------------------------------------
+#### PARENT SIDE ####
+
+class SandboxedQuery:
+    """One custom query running in a worker process.
+
+    Call `pump()` regularly on the UI thread; it delivers onColumns(columns),
+    onBatch(rows), onDone(rowCount, truncated), onError(message) and onCancel()
+    and returns True once the query has finished."""
+
+    def __init__(self, databasePath, sql, timeout=30, maxRows=1000, batchSize=200, memoryLimit=256 * 1024 * 1024,
+                 exportPath=None, onColumns=None, onBatch=None, onDone=None, onError=None, onCancel=None):
+        self.request = {
+            "database": os.path.abspath(databasePath),
+            "sql": sql,
+            "timeout": timeout,
+            "maxRows": maxRows,
+            "batchSize": batchSize,
+            "memoryLimit": memoryLimit,
+            "exportPath": os.path.abspath(exportPath) if exportPath else None,
+        }
+        self.onColumns = onColumns
+        self.onBatch = onBatch
+        self.onDone = onDone
+        self.onError = onError
+        self.onCancel = onCancel
+
+        self.messages = queue.Queue()
+        self.process = None
+        self.deadline = None
+        self.cancelled = False
+        self.finished = False
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "tobystrucks.sandbox"], cwd=SOURCE_DIRECTORY,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8"
+        )
+        self.deadline = time.monotonic() + self.request["timeout"] + KILL_GRACE
+        self.process.stdin.write(json.dumps(self.request))
+        self.process.stdin.close()
+        threading.Thread(target=self.readMessages, name="SandboxReader", daemon=True).start()
+        return self
+
+    def cancel(self):
+        if not self.finished and not self.cancelled:
+            self.cancelled = True
+            self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+
+    def readMessages(self):
+        """Reader thread: parse the worker's stdout into the message queue."""
+        finalMessage = None
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if "done" in message or "error" in message:
+                finalMessage = message
+            self.messages.put(message)
+
+        self.process.wait()
+        if finalMessage is None:
+            errorOutput = self.process.stderr.read().strip().splitlines()
+            reason = errorOutput[-1] if errorOutput else f"exit code {self.process.returncode}"
+            self.messages.put({"error": f"The query process stopped unexpectedly ({reason})"})
+        self.process.stderr.close()
+
+    def pump(self):
+        if self.finished:
+            return True
+
+        if self.cancelled:
+            self.finish(succeeded=False)
+            if self.onCancel is not None:
+                self.onCancel()
+            return True
+
+        # Backstop for anything the progress handler cannot interrupt.
+        if time.monotonic() > self.deadline and self.process.poll() is None:
+            self.kill()
+
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return False
+
+            if "columns" in message:
+                if self.onColumns is not None:
+                    self.onColumns(message["columns"])
+            elif "rows" in message:
+                if self.onBatch is not None:
+                    self.onBatch(message["rows"])
+            elif "done" in message:
+                self.finish(succeeded=True)
+                if self.onDone is not None:
+                    self.onDone(message["done"], message.get("truncated", False))
+                return True
+            elif "error" in message:
+                self.finish(succeeded=False)
+                if self.onError is not None:
+                    self.onError(message["error"])
+                return True
+
+    def finish(self, succeeded):
+        self.finished = True
+        self.kill()
+        # A killed worker can leave its unfinished export behind; the file being replaced is never touched.
+        exportPath = self.request["exportPath"]
+        if not succeeded and exportPath and os.path.exists(partialPath(exportPath)):
+            os.remove(partialPath(exportPath))
+
+#----------------------------------------------------------------------------------------------------------
+#### WORKER PROCESS ####
+
+def send(message):
+    sys.stdout.write(json.dumps(message, default=jsonValue) + "\n")
+    sys.stdout.flush()
+
+
+def limitMemory(memoryLimit):
+    sqlite3.connect(":memory:").execute(f"PRAGMA hard_heap_limit = {int(memoryLimit)}").close()
+    if resource is not None and hasattr(resource, "RLIMIT_AS"):
+        # SQLite's own heap limit leaves room for the interpreter; the address space limit is a backstop.
+        addressSpaceLimit = int(memoryLimit) * 2 + 256 * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (addressSpaceLimit, addressSpaceLimit))
+
+
+def openReadOnly(databasePath, timeout):
+    connection = sqlite3.connect(f"file:{databasePath}?mode=ro", uri=True, timeout=5)
+    connection.execute("PRAGMA query_only = ON")
+
+    deadline = time.monotonic() + timeout
+    connection.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+    return connection, deadline
+
+
+def runRequest(request):
+    limitMemory(request["memoryLimit"])
+    connection, deadline = openReadOnly(request["database"], request["timeout"])
+
+    try:
+        if request["exportPath"]:
+            send({"done": exportQuery(connection, request["sql"], request["exportPath"]), "truncated": False})
+            return
+
+        cursor = connection.execute(request["sql"])
+        send({"columns": [column[0] for column in cursor.description or []]})
+
+        rowCount = 0
+        maxRows = request["maxRows"]
+        while rowCount < maxRows:
+            rows = cursor.fetchmany(min(request["batchSize"], maxRows - rowCount))
+            if not rows:
+                break
+            rowCount += len(rows)
+            send({"rows": rows})
+
+        truncated = rowCount >= maxRows and cursor.fetchone() is not None
+        send({"done": rowCount, "truncated": truncated})
+    except sqlite3.OperationalError as e:
+        if time.monotonic() > deadline:
+            send({"error": f"The query was stopped after {request['timeout']} seconds"})
+        else:
+            send({"error": str(e)})
+    except MemoryError:
+        send({"error": f"The query needed more than {request['memoryLimit'] // (1024 * 1024)} MB of memory"})
+    except (sqlite3.Error, OSError, ValueError) as e:
+        send({"error": str(e) or type(e).__name__})
+    finally:
+        connection.close()
+
+
+def main():
+    runRequest(json.loads(sys.stdin.read()))
+
+
+if __name__ == "__main__":
+    main()
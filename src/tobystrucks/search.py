@@ -0,0 +1,26 @@
+"""
+Quick search over trucks, customers, suppliers and orders.
+
+searchIndex is an FTS5 table kept up to date by triggers on the four tables
+(migration 8), so a search is one indexed MATCH however many rows there are.
+Every word typed is matched as a prefix, so "merc act" finds a Mercedes Actros.
+"""
+
+import re
+
+from tobystrucks import queries
+
+WORD = re.compile(r"\w+")
+
+
+def searchQuery(text):
+    """An FTS5 query matching rows that contain every word of text as a prefix, or "" if there are none."""
+    return " ".join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def quickSearch(connection, text, limit=50):
+    """[(tableName, recordID, title, details), ...], best match first."""
+    query = searchQuery(text)
+    if not query:
+        return []
+    return queries.execute(connection, "quickSearch", (query, limit)).fetchall()
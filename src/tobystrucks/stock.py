@@ -0,0 +1,64 @@
+"""
+Stock movement ledger.
+
+Every change to a truck's stock is a row in stockMovementTable: 'sale' rows are
+written by triggers on orderItemsTable, 'receipt' and 'adjustment' rows by the
+functions here. A trigger adds each movement to truckTable.stockLevel, so the
+current level is still a single-row read, while the stock held at any earlier
+time is the sum of the ledger up to then (stockMovementTruckIndex covers it).
+
+The functions here do not commit: call them inside the caller's transaction so
+the movement and whatever caused it are saved together.
+"""
+
+from tobystrucks import queries
+
+MOVEMENT_TYPES = ("opening", "sale", "receipt", "adjustment")
+
+
+def recordMovement(connection, truckID, movementType, quantity, orderID=None, note=None):
+    if movementType not in MOVEMENT_TYPES:
+        raise ValueError(f"Unknown stock movement type: {movementType}")
+    queries.execute(connection, "insertStockMovement", (truckID, movementType, int(quantity), orderID, note))
+
+
+def receiveStock(connection, truckID, quantity, note=None):
+    """Record trucks arriving from the supplier."""
+    if int(quantity) <= 0:
+        raise ValueError("The quantity received must be more than 0")
+    recordMovement(connection, truckID, "receipt", quantity, note=note)
+
+
+def setStockLevel(connection, truckID, newLevel, note=None):
+    """Record an adjustment taking truckID's stock to newLevel (e.g. after a stock count).
+
+    Returns the change recorded, 0 if the level was already right."""
+    row = queries.execute(connection, "truckStockLevel", (truckID,)).fetchone()
+    if row is None:
+        raise ValueError(f"No truck {truckID}")
+    change = int(newLevel) - row[0]
+    if change:
+        recordMovement(connection, truckID, "adjustment", change, note=note)
+    return change
+
+#----------------------------------------------------------------------------------------------------------
+#### READING THE LEDGER ####
+
+def stockAt(connection, truckID, timestamp):
+    """Stock held at 'yyyy-mm-dd[ HH:MM:SS]' (a date alone means before that day began)."""
+    return queries.execute(connection, "stockAt", (truckID, timestamp)).fetchone()[0]
+
+
+def stockHistory(connection, truckID):
+    """[(movementID, timestamp, movementType, quantity, balance, orderID, note), ...] oldest first."""
+    return queries.execute(connection, "stockHistory", (truckID,)).fetchall()
+
+
+def reorderQueueCount(connection):
+    """How many trucks are at or below their reorder level (reorderQueueTable is kept by triggers)."""
+    return queries.execute(connection, "reorderQueueCount").fetchone()[0]
+
+
+def ledgerMismatches(connection):
+    """[(truckID, stockLevel, ledger total), ...] for trucks whose stockLevel was changed outside the ledger."""
+    return queries.execute(connection, "ledgerMismatches").fetchall()